@@ -17,5 +17,5 @@ class DecompileArtifact:
 
 
 class DecompileBackend(Protocol):
-    def run(self, job: Job, job_dir: str, top_n: int | None, timeout: int) -> None:
+    def run(self, job: Job, job_dir: str, top_n: int | None, timeout: int) -> dict | None:
         ...
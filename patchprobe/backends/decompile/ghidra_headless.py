@@ -1,16 +1,41 @@
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
 import os
+import shutil
+import subprocess
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # not on Windows; the project cache is then unlocked
+    fcntl = None
 
 from .base import DecompileBackend
+from .worker_pool import ADDRESS_PLACEHOLDER, GhidraWorker, WorkerPool
 from ...core.artifacts import write_artifact
-from ...core.job import Job
+from ...core.job import BinaryInfo, Job, resolve_binary_path
+from ...core.pairs import load_pair_table
+from ...errors import DecompileError
+from ...formats import macho
+from ...storage.cache import cache_key, get_cache
+from ...storage.object_store import get_object_store
+from ...utils.concurrency import map_timed
+from ...utils.mapping import map_file
 from ...utils.subprocess import run_command
+from ...utils.time import now_iso
 
 DEFAULT_RUNNER = Path(__file__).resolve().parents[3] / "scripts" / "run_ghidra_headless.sh"
 DEFAULT_POST_SCRIPT = Path(__file__).resolve().parents[3] / "scripts" / "ghidra_decompile.py"
+DEFAULT_WORKER_SCRIPT = Path(__file__).resolve().parents[3] / "scripts" / "ghidra_worker.py"
+# Smallest heap a headless session is given when `decompile.memory_budget_mb` is split between workers.
+MIN_SESSION_MEMORY_MB = 1024
+# Written into a cached project once its import and auto-analysis finished; projects without it are redone.
+PROJECT_MARKER = "patchprobe_project.json"
 
 
 def _load_json(path: Path, default: object) -> object:
@@ -32,21 +57,6 @@ def _select_ranked_candidates(job_dir: Path, top_n: int | None) -> list[dict]:
     return [c for c in candidates if isinstance(c, dict)]
 
 
-def _load_function_pairs(job_dir: Path) -> dict[str, dict]:
-    pairs_path = job_dir / "artifacts" / "diff" / "function_pairs.json"
-    pairs = _load_json(pairs_path, default=[])
-    if not isinstance(pairs, list):
-        return {}
-    out: dict[str, dict] = {}
-    for pair in pairs:
-        if not isinstance(pair, dict):
-            continue
-        key = pair.get("func_pair_id")
-        if isinstance(key, str):
-            out[key] = pair
-    return out
-
-
 def _build_stub_pseudocode(symbol_name: str) -> str:
     return (
         f"int {symbol_name}(void) {{\n"
@@ -56,12 +66,13 @@ def _build_stub_pseudocode(symbol_name: str) -> str:
     )
 
 
+def _decompile_config(job: Job) -> dict:
+    cfg = job.config.get("decompile", {}) if isinstance(job.config, dict) else {}
+    return cfg if isinstance(cfg, dict) else {}
+
+
 def _resolve_runner(job: Job) -> str | None:
-    cfg_runner = (
-        job.config.get("decompile", {}).get("ghidra_runner")
-        if isinstance(job.config, dict)
-        else None
-    )
+    cfg_runner = _decompile_config(job).get("ghidra_runner")
     runner = cfg_runner or os.environ.get("PATCHDIFF_GHIDRA_RUNNER") or str(DEFAULT_RUNNER)
     path = Path(runner)
     if path.exists():
@@ -69,128 +80,554 @@ def _resolve_runner(job: Job) -> str | None:
     return None
 
 
+def ghidra_version(job: Job) -> str:
+    """Configured Ghidra version, else `application.version` of the install the runner will use."""
+    configured = _decompile_config(job).get("ghidra_version") or os.environ.get("PATCHDIFF_GHIDRA_VERSION")
+    if configured:
+        return str(configured)
+    candidates = []
+    if os.environ.get("PATCHDIFF_GHIDRA_ANALYZE_HEADLESS"):
+        candidates.append(Path(os.environ["PATCHDIFF_GHIDRA_ANALYZE_HEADLESS"]).resolve().parents[1])
+    if os.environ.get("GHIDRA_INSTALL_DIR"):
+        candidates.append(Path(os.environ["GHIDRA_INSTALL_DIR"]))
+    for install_dir in candidates:
+        try:
+            lines = (install_dir / "Ghidra" / "application.properties").read_text(encoding="utf-8").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            key, _, value = line.partition("=")
+            if key.strip() == "application.version" and value.strip():
+                return value.strip()
+    return "unknown"
+
+
+def _project_cache_dir(job: Job, binary: BinaryInfo, version: str) -> Path | None:
+    if _decompile_config(job).get("project_cache", {}).get("enabled", True) is False:
+        return None
+    # Slices of one fat Mach-O share a sha256 but are imported as separate programs.
+    key = cache_key(binary.sha256, binary.arch, version)
+    return Path(get_object_store(job.config).local_path(f"ghidra_projects/{key[:2]}/{key}"))
+
+
+@contextmanager
+def _project_lock(project_dir: Path, shared: bool = False) -> Iterator[None]:
+    """Hold an flock on the lockfile next to a cached project: shared to copy it, exclusive to import or invalidate."""
+    project_dir.parent.mkdir(parents=True, exist_ok=True)
+    with open(project_dir.parent / f"{project_dir.name}.lock", "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def _read_marker(project_dir: Path) -> dict | None:
+    try:
+        marker = json.loads((project_dir / PROJECT_MARKER).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return marker if isinstance(marker, dict) and isinstance(marker.get("program"), str) else None
+
+
+def _import_path(binary_path: str, binary: BinaryInfo, work_dir: Path, session: str) -> str:
+    """The file Ghidra imports: the binary itself, or the job's slice cut out of a fat Mach-O.
+
+    The slice keeps the binary's file name, so the program inside the project is named the same either way.
+    """
+    if binary.file_type != "Mach-O":
+        return binary_path
+    with map_file(Path(binary_path)) as data:
+        if not macho.is_fat(data):
+            return binary_path
+        hdr = macho.parse_slice(data, binary.arch)
+        if hdr is None:
+            raise DecompileError(
+                "no matching slice in fat Mach-O", details={"path": binary_path, "arch": binary.arch}
+            )
+        target = work_dir / f"slice_{session}" / Path(binary_path).name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data[hdr.base : hdr.base + hdr.size])
+    return str(target)
+
+
+Result = tuple[str, str | None, str, str | None]
+
+
+def _failed(symbol_name: str, error: str) -> Result:
+    return _build_stub_pseudocode(symbol_name), f"int {symbol_name}(void)", "ghidra_headless_failed", error
+
+
+def _script_output(target: dict) -> dict:
+    """The post-script's JSON record for `target`, or {} when it is missing or unreadable."""
+    try:
+        parsed = json.loads(Path(target["output_json"]).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _read_output(target: dict) -> Result:
+    symbol_name = target["function_name"]
+    output_txt = Path(target["output_txt"])
+    if not output_txt.exists():
+        return _failed(symbol_name, "runner succeeded but pseudocode output file missing")
+    pseudocode = output_txt.read_text(encoding="utf-8", errors="replace")
+    parsed = _script_output(target)
+    prototype = parsed.get("prototype") if isinstance(parsed.get("prototype"), str) else None
+    script_status = parsed.get("status")
+    if isinstance(script_status, str) and script_status != "ok":
+        # The script still writes a placeholder for function_not_found / decompile_failed.
+        return pseudocode, prototype or f"int {symbol_name}(void)", "ghidra_headless_failed", script_status
+    return pseudocode, prototype or f"int {symbol_name}(void)", "ghidra_headless_success", None
+
+
+def _clear_outputs(target: dict) -> None:
+    Path(target["output_txt"]).unlink(missing_ok=True)
+    Path(target["output_json"]).unlink(missing_ok=True)
+
+
 def _attempt_ghidra_decompile(
     runner: str,
-    job_dir: Path,
-    binary_path: str,
-    symbol_name: str,
-    item_dir: Path,
+    project_dir: Path,
+    mode: str,
+    program: str,
+    targets: list[dict],
+    targets_path: Path,
     timeout: int,
-) -> tuple[str, str | None, str, str | None]:
-    output_json = item_dir / "ghidra_output.json"
-    output_txt = item_dir / "pseudocode.txt"
-    project_dir = job_dir / "artifacts" / "decompile" / "ghidra_project"
+    env: dict[str, str] | None = None,
+) -> tuple[list[Result], str]:
+    """Decompile every target in one headless session; returns per-target results and the session outcome.
+
+    The outcome is "ok", "timeout", or "failed" when the runner exited non-zero (for example, the program
+    could not be opened). `timeout` is per function; the session gets one more share of it for import and analysis.
+    """
     project_dir.mkdir(parents=True, exist_ok=True)
+    for target in targets:
+        _clear_outputs(target)
+    targets_path.write_text(json.dumps(targets, indent=2), encoding="utf-8")
+
+    session_timeout = timeout * (len(targets) + 1)
+    try:
+        result = run_command(
+            [runner, str(project_dir), program, str(DEFAULT_POST_SCRIPT), str(targets_path), str(timeout), mode],
+            timeout=session_timeout,
+            env=env,
+        )
+    except subprocess.TimeoutExpired:
+        return [_failed(target["function_name"], f"session timed out after {session_timeout}s") for target in targets], "timeout"
+    if result.returncode != 0:
+        error = (result.stderr or result.stdout or f"exit={result.returncode}").strip()
+        return [_failed(target["function_name"], error) for target in targets], "failed"
+    return [_read_output(target) for target in targets], "ok"
+
+
+def _chunks(items: list, count: int) -> list[list]:
+    size = -(-len(items) // max(1, count))
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _project_copy(project_dir: Path, directory: Path) -> Path:
+    # Ghidra locks a project to one process, so concurrent sessions each open a private copy.
+    shutil.rmtree(directory, ignore_errors=True)
+    shutil.copytree(project_dir, directory, ignore=shutil.ignore_patterns("*.lock", "*.lock~"))
+    return directory
+
+
+def _parallel_sessions(
+    runner: str,
+    project_dir: Path,
+    program: str,
+    chunks: list[list[dict]],
+    work_dir: Path,
+    session: str,
+    timeout: int,
+    env: dict[str, str] | None,
+) -> tuple[list[Result], bool]:
+    """Decompile each chunk in its own session over an analyzed project; results stay in chunk order.
+
+    Also returns whether every session opened the program.
+    """
+    copies_dir = work_dir / f"sessions_{session}"
+    directories = [project_dir] + [_project_copy(project_dir, copies_dir / str(i)) for i in range(1, len(chunks))]
 
-    result = run_command(
-        [
+    def attempt(index: int) -> tuple[list[Result], str]:
+        return _attempt_ghidra_decompile(
             runner,
-            str(project_dir),
-            binary_path,
-            str(DEFAULT_POST_SCRIPT),
-            symbol_name,
-            str(output_json),
-            str(output_txt),
-            str(timeout),
-        ],
-        timeout=timeout,
+            directories[index],
+            "process",
+            program,
+            chunks[index],
+            work_dir / f"targets_{session}_{index}.json",
+            timeout,
+            env,
+        )
+
+    outputs, _timing = map_timed(attempt, list(range(len(chunks))), max_workers=len(chunks))
+    shutil.rmtree(copies_dir, ignore_errors=True)
+    return [result for results, _outcome in outputs for result in results], all(
+        outcome != "failed" for _results, outcome in outputs
     )
-    if result.returncode != 0:
-        return (
-            _build_stub_pseudocode(symbol_name),
-            f"int {symbol_name}(void)",
-            "ghidra_headless_failed",
-            (result.stderr or result.stdout or f"exit={result.returncode}").strip(),
+
+
+def _worker_pool_config(job: Job) -> dict | None:
+    cfg = _decompile_config(job).get("worker_pool", {})
+    if not isinstance(cfg, dict) or cfg.get("enabled", False) is not True:
+        return None
+    return cfg
+
+
+def _decompile_with_workers(
+    runner: str,
+    project_dir: Path,
+    mode: str,
+    program: str,
+    targets: list[dict],
+    work_dir: Path,
+    session: str,
+    timeout: int,
+    pool_cfg: dict,
+    slots: int,
+    env: dict[str, str] | None,
+) -> tuple[list[Result], bool, dict]:
+    """Send each target to a warm worker with a hard per-request deadline.
+
+    Returns the results, whether the project is usable (in import mode: an import was saved; otherwise: the
+    program opened) and the pool stats. Until an import worker has exited cleanly, and so saved the program,
+    replacements import again into an emptied project. After that they reopen the analyzed program: the
+    shared project when only one runs at a time, otherwise a private copy. Up to `slots` workers serve
+    requests concurrently once analysis exists.
+    """
+    size = slots if mode == "process" else 1
+    copies_dir = work_dir / f"workers_{session}"
+    startup_timeout = float(pool_cfg.get("startup_timeout", 600))
+    imports: list[GhidraWorker] = []
+
+    def start(index: int) -> GhidraWorker:
+        directory, worker_mode, worker_program = project_dir, mode, program
+        if mode == "import":
+            if any(worker.clean_exit for worker in imports):
+                worker_mode, worker_program = "process", Path(program).name
+            elif index:
+                # The previous import worker was killed before saving; nothing in the project can be reopened.
+                shutil.rmtree(project_dir, ignore_errors=True)
+        if index and size > 1:
+            directory = _project_copy(project_dir, copies_dir / str(index))
+        directory.mkdir(parents=True, exist_ok=True)
+        worker = GhidraWorker(
+            [runner, str(directory), worker_program, str(DEFAULT_WORKER_SCRIPT), ADDRESS_PLACEHOLDER, str(timeout), worker_mode],
+            startup_timeout=startup_timeout,
+            log_path=work_dir / f"worker_{session}.log",
+            env=env,
+            # Saving a freshly analyzed program can take as long as the analysis itself.
+            shutdown_timeout=startup_timeout if worker_mode == "import" else 10.0,
         )
-    if not output_txt.exists():
-        return (
-            _build_stub_pseudocode(symbol_name),
-            f"int {symbol_name}(void)",
-            "ghidra_headless_failed",
-            "runner succeeded but pseudocode output file missing",
+        if worker_mode == "import":
+            imports.append(worker)
+        return worker
+
+    request_timeout = float(pool_cfg.get("request_timeout") or timeout + 10)
+    with WorkerPool(
+        start,
+        size=size,
+        max_requests=int(pool_cfg.get("max_requests", 200)),
+        health_check_seconds=float(pool_cfg.get("health_check_seconds", 30)),
+    ) as pool:
+
+        def decompile(target: dict) -> Result:
+            if pool.startup_error is not None:
+                # The program could not be opened; starting again would repeat the same failure.
+                return _failed(target["function_name"], pool.startup_error.message)
+            _clear_outputs(target)
+            try:
+                pool.request("decompile", request_timeout, target=target)
+            except DecompileError as exc:
+                return _failed(target["function_name"], exc.message)
+            return _read_output(target)
+
+        results, _timing = map_timed(decompile, targets, max_workers=size)
+    shutil.rmtree(copies_dir, ignore_errors=True)
+    if mode == "import":
+        usable = any(worker.clean_exit for worker in imports)
+    else:
+        usable = pool.startup_error is None
+    return results, usable, pool.stats()
+
+
+def _run_sessions(
+    runner: str,
+    project_dir: Path,
+    mode: str,
+    program: str,
+    targets: list[dict],
+    work_dir: Path,
+    session: str,
+    timeout: int,
+    slots: int,
+    env: dict[str, str] | None,
+    pool_cfg: dict | None,
+) -> tuple[list[Result], bool, dict | None]:
+    """Decompile `targets` over `project_dir` in `mode`; returns the results, whether the project was usable and pool stats."""
+    if pool_cfg is not None:
+        return _decompile_with_workers(
+            runner, project_dir, mode, program, targets, work_dir, session, timeout, pool_cfg, slots, env
         )
-    pseudocode = output_txt.read_text(encoding="utf-8", errors="replace")
-    prototype: str | None = None
-    if output_json.exists():
-        try:
-            parsed = json.loads(output_json.read_text(encoding="utf-8"))
-            p = parsed.get("prototype")
-            if isinstance(p, str):
-                prototype = p
-        except Exception:  # noqa: BLE001
-            prototype = None
-    return pseudocode, prototype or f"int {symbol_name}(void)", "ghidra_headless_success", None
+    if mode == "process":
+        results, ok = _parallel_sessions(runner, project_dir, program, _chunks(targets, slots), work_dir, session, timeout, env)
+        return results, ok, None
+    # Import and analysis happen once, in the first session; the remaining targets then fan out.
+    head = _chunks(targets, slots)[0] if slots > 1 and mode == "import" else targets
+    results, outcome = _attempt_ghidra_decompile(
+        runner, project_dir, mode, program, head, work_dir / f"targets_{session}.json", timeout, env
+    )
+    ok = outcome == "ok"
+    rest = targets[len(head) :]
+    if rest and ok:
+        results += _parallel_sessions(
+            runner, project_dir, Path(program).name, _chunks(rest, slots), work_dir, session, timeout, env
+        )[0]
+    elif rest:
+        results += [_failed(target["function_name"], results[0][3] or "import failed") for target in rest]
+    return results, ok, None
+
+
+def _decompile_binary(
+    job: Job,
+    runner: str,
+    job_dir: Path,
+    binary: BinaryInfo,
+    targets: list[dict],
+    session: str,
+    timeout: int,
+    slots: int = 1,
+    env: dict[str, str] | None = None,
+) -> tuple[list[Result], str, dict | None]:
+    """Decompile `binary`'s targets in up to `slots` concurrent sessions, reusing its analyzed project when cached.
+
+    The cached project is shared between jobs and processes: it is imported under an exclusive lock, and
+    sessions only ever open a private copy of it. Returns the results in target order, the project state
+    and, when the worker pool ran, its stats.
+    """
+    binary_path = resolve_binary_path(job, binary)
+    work_dir = job_dir / "artifacts" / "decompile" / "ghidra_project"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    version = ghidra_version(job)
+    project_dir = _project_cache_dir(job, binary, version)
+    pool_cfg = _worker_pool_config(job)
+    private_dir = work_dir / f"project_{session}"
+    if project_dir is None:
+        # Throwaway projects are analyzed per session, so each side runs a single one in its own directory.
+        program = _import_path(binary_path, binary, work_dir, session)
+        results, _ok, pool_stats = _run_sessions(
+            runner, private_dir, "temp", program, targets, work_dir, session, timeout, 1, env, pool_cfg
+        )
+        shutil.rmtree(work_dir / f"slice_{session}", ignore_errors=True)
+        return results, "temporary", pool_stats
+
+    with _project_lock(project_dir, shared=True):
+        marker = _read_marker(project_dir)
+        if marker is not None:
+            _project_copy(project_dir, private_dir)
+    if marker is None:
+        with _project_lock(project_dir):
+            # Another process may have finished the import while this one waited for the lock.
+            marker = _read_marker(project_dir)
+            if marker is not None:
+                _project_copy(project_dir, private_dir)
+            else:
+                shutil.rmtree(project_dir, ignore_errors=True)
+                program = _import_path(binary_path, binary, work_dir, session)
+                results, ok, pool_stats = _run_sessions(
+                    runner, project_dir, "import", program, targets, work_dir, session, timeout, slots, env, pool_cfg
+                )
+                shutil.rmtree(work_dir / f"slice_{session}", ignore_errors=True)
+                if not ok:
+                    shutil.rmtree(project_dir, ignore_errors=True)
+                    return results, "failed", pool_stats
+                (project_dir / PROJECT_MARKER).write_text(
+                    json.dumps(
+                        {
+                            "program": Path(binary_path).name,
+                            "binary_sha256": binary.sha256,
+                            "arch": binary.arch,
+                            "ghidra_version": version,
+                            "created_at": now_iso(),
+                        },
+                        indent=2,
+                    ),
+                    encoding="utf-8",
+                )
+                return results, "analyzed", pool_stats
+
+    # Analysis is already in the project; the runner opens the copy with -process -noanalysis.
+    results, ok, pool_stats = _run_sessions(
+        runner, private_dir, "process", marker["program"], targets, work_dir, session, timeout, slots, env, pool_cfg
+    )
+    shutil.rmtree(private_dir, ignore_errors=True)
+    if not ok:
+        # The cached project could not be opened; the next run imports and analyzes again, unless another
+        # process has already replaced it.
+        with _project_lock(project_dir):
+            if _read_marker(project_dir) == marker:
+                (project_dir / PROJECT_MARKER).unlink(missing_ok=True)
+        return results, "invalidated", pool_stats
+    return results, "reused", pool_stats
+
+
+@functools.lru_cache(maxsize=None)
+def _script_hash(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def _session_budget(job: Job) -> tuple[int, int | None]:
+    """Concurrent Ghidra processes per job and the heap each may use, from `decompile.workers` and `memory_budget_mb`."""
+    cfg = _decompile_config(job)
+    workers = max(1, int(cfg.get("workers", 1)))
+    budget = cfg.get("memory_budget_mb")
+    if not budget:
+        return workers, None
+    workers = max(1, min(workers, int(budget) // MIN_SESSION_MEMORY_MB))
+    return workers, int(budget) // workers
 
 
 class GhidraHeadlessBackend(DecompileBackend):
-    def run(self, job: Job, job_dir: str, top_n: int | None, timeout: int) -> None:
+    def run(self, job: Job, job_dir: str, top_n: int | None, timeout: int) -> dict:
         out_dir = Path(job_dir) / "artifacts" / "decompile"
         out_dir.mkdir(parents=True, exist_ok=True)
         runner = _resolve_runner(job)
 
         job_path = Path(job_dir)
         ranked = _select_ranked_candidates(job_path, top_n=top_n)
-        by_pair = _load_function_pairs(job_path)
+        pairs = load_pair_table(job_path / "artifacts" / "diff", [c.get("func_pair_id") for c in ranked])
         artifacts: list[dict] = []
 
+        items: list[dict] = []
         for candidate in ranked:
             func_pair_id = candidate.get("func_pair_id")
             if not isinstance(func_pair_id, str):
                 continue
-            pair = by_pair.get(func_pair_id, {})
-            func_id_a = pair.get("func_id_a")
-            func_id_b = pair.get("func_id_b")
-            symbol_name = "unknown_function"
-            evidence = pair.get("evidence", [])
-            if isinstance(evidence, list):
-                for item in evidence:
-                    if isinstance(item, str) and item.startswith("symbol_name="):
-                        symbol_name = item.split("=", 1)[1] or symbol_name
-                        break
-
-            for side, func_id, binary_sha in (
-                ("A", func_id_a, job.binary_a.sha256),
-                ("B", func_id_b, job.binary_b.sha256),
+            row = pairs.get(func_pair_id)
+            if row is None:
+                continue
+            for side, func_id, symbol_name, address, binary_sha in (
+                ("A", row.func_id_a, row.symbol_name_a or "unknown_function", row.address_a, job.binary_a.sha256),
+                ("B", row.func_id_b, row.symbol_name or "unknown_function", row.address_b, job.binary_b.sha256),
             ):
-                if not isinstance(func_id, str):
+                if not func_id:
                     continue
                 item_dir = out_dir / func_id
                 item_dir.mkdir(parents=True, exist_ok=True)
-                if runner:
-                    pseudocode, prototype, status, error = _attempt_ghidra_decompile(
-                        runner=runner,
-                        job_dir=job_path,
-                        binary_path=job.binary_a.path if side == "A" else job.binary_b.path,
-                        symbol_name=symbol_name,
-                        item_dir=item_dir,
-                        timeout=timeout,
-                    )
-                    backend_name = "ghidra_headless"
-                else:
-                    pseudocode = _build_stub_pseudocode(symbol_name)
-                    prototype = f"int {symbol_name}(void)"
-                    status = "ghidra_headless_unavailable"
-                    error = "runner not found"
-                    backend_name = "ghidra_headless_stub"
-                pseudocode_path = item_dir / "pseudocode.txt"
-                pseudocode_path.write_text(pseudocode, encoding="utf-8")
-                meta = {
-                    "func_id": func_id,
-                    "func_pair_id": func_pair_id,
-                    "binary_side": side,
-                    "binary_sha": binary_sha,
-                    "prototype": prototype,
-                    "pseudocode": pseudocode,
-                    "callers": [],
-                    "callees": [],
-                    "strings": [],
-                    "status": status,
-                    "error": error,
-                    "timeout_seconds": timeout,
-                    "backend": backend_name,
-                }
-                (item_dir / "metadata.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
-                artifacts.append(meta)
+                items.append(
+                    {
+                        "func_pair_id": func_pair_id,
+                        "func_id": func_id,
+                        "side": side,
+                        "binary_sha": binary_sha,
+                        "target": {
+                            "function_name": symbol_name,
+                            "address": address,
+                            "output_json": str(item_dir / "ghidra_output.json"),
+                            "output_txt": str(item_dir / "pseudocode.txt"),
+                        },
+                    }
+                )
+
+        # Results the post-script reported as "ok" are cached by (binary sha256, arch, entry address, Ghidra
+        # version, post-script hash); targets without an address are always decompiled.
+        outputs: dict[int, Result] = {}
+        cache = get_cache(job.config, "decompile") if runner else None
+        keys: dict[int, str] = {}
+        if cache is not None:
+            version = ghidra_version(job)
+            script = DEFAULT_WORKER_SCRIPT if _worker_pool_config(job) is not None else DEFAULT_POST_SCRIPT
+            for idx, item in enumerate(items):
+                address = item["target"]["address"]
+                if address is None:
+                    continue
+                arch = (job.binary_a if item["side"] == "A" else job.binary_b).arch
+                keys[idx] = cache_key(item["binary_sha"], arch, address, "ghidra_headless", version, _script_hash(script))
+                cached = cache.get(keys[idx])
+                if isinstance(cached, dict) and cached.get("status") == "ghidra_headless_success":
+                    outputs[idx] = (cached["pseudocode"], cached["prototype"], cached["status"], None)
+        # Cache hits never reach a Ghidra session.
+        hits = set(outputs)
+
+        # Each side gets its own sessions and project directories; A and B run concurrently when workers allow.
+        workers, heap_mb = _session_budget(job)
+        env = {**os.environ, "MAXMEM": f"{heap_mb}M"} if heap_mb is not None else None
+        sides = [
+            (side, binary, [idx for idx, item in enumerate(items) if item["side"] == side and idx not in outputs])
+            for side, binary in (("A", job.binary_a), ("B", job.binary_b))
+        ]
+        sides = [entry for entry in sides if entry[2]]
+        # Spare slots go to side A, which is decompiled first.
+        slots = [workers // len(sides) + (1 if i < workers % len(sides) else 0) for i in range(len(sides))] if sides else []
+
+        def decompile_side(index: int) -> tuple[list[Result], str | None, dict | None]:
+            side, binary, batch = sides[index]
+            if not runner:
+                return (
+                    [
+                        (
+                            _build_stub_pseudocode(items[idx]["target"]["function_name"]),
+                            f"int {items[idx]['target']['function_name']}(void)",
+                            "ghidra_headless_unavailable",
+                            "runner not found",
+                        )
+                        for idx in batch
+                    ],
+                    None,
+                    None,
+                )
+            return _decompile_binary(
+                job,
+                runner,
+                job_path,
+                binary,
+                [items[idx]["target"] for idx in batch],
+                side.lower(),
+                timeout,
+                max(1, slots[index]),
+                env,
+            )
+
+        side_outputs, timing = map_timed(decompile_side, list(range(len(sides))), max_workers=workers)
+        projects: dict[str, str] = {}
+        pools: dict[str, dict] = {}
+        for (side, _binary, batch), (results, state, pool_stats) in zip(sides, side_outputs):
+            outputs.update(zip(batch, results))
+            if state is not None:
+                projects[side.lower()] = state
+            if pool_stats is not None:
+                pools[side.lower()] = pool_stats
+
+        backend_name = "ghidra_headless" if runner else "ghidra_headless_stub"
+        for idx, item in enumerate(items):
+            pseudocode, prototype, status, error = outputs[idx]
+            item_dir = out_dir / item["func_id"]
+            (item_dir / "pseudocode.txt").write_text(pseudocode, encoding="utf-8")
+            meta = {
+                "func_id": item["func_id"],
+                "func_pair_id": item["func_pair_id"],
+                "binary_side": item["side"],
+                "binary_sha": item["binary_sha"],
+                "prototype": prototype,
+                "pseudocode": pseudocode,
+                "callers": [],
+                "callees": [],
+                "strings": [],
+                "status": status,
+                "error": error,
+                "timeout_seconds": timeout,
+                "backend": backend_name,
+            }
+            (item_dir / "metadata.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+            artifacts.append(meta)
+            # Only results the post-script itself reported as "ok" are kept; failures are retried next run.
+            if idx in keys and idx not in hits and _script_output(item["target"]).get("status") == "ok":
+                cache.put(keys[idx], {k: meta[k] for k in ("pseudocode", "prototype", "callers", "callees", "status")})
 
         (out_dir / "decompile_artifacts.json").write_text(json.dumps(artifacts, indent=2), encoding="utf-8")
         write_artifact(
@@ -206,3 +643,10 @@ class GhidraHeadlessBackend(DecompileBackend):
             payload_is_list=True,
             job_dir=Path(job_dir),
         )
+        details: dict = {"projects": projects, "sessions": {**timing, "max_memory_mb": heap_mb}}
+        if cache is not None:
+            cache.evict()
+            details["cache"] = cache.stats()
+        if pools:
+            details["workers"] = pools
+        return details
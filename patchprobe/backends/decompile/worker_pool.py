@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import queue
+import socket
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Mapping, Sequence
+
+from ...errors import DecompileError
+
+# Workers speak JSON lines over a loopback TCP connection they open back to the pool:
+#   worker -> pool  {"event": "ready", "program": <name>}
+#   pool -> worker  {"id": n, "op": "ping" | "decompile" | "shutdown", ...}
+#   worker -> pool  {"id": n, "ok": true, ...}
+ADDRESS_PLACEHOLDER = "{address}"
+
+
+class GhidraWorker:
+    """One long-lived headless process with a program open, serving requests until shut down."""
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        startup_timeout: float,
+        log_path: Path | None = None,
+        env: Mapping[str, str] | None = None,
+        shutdown_timeout: float | None = 10.0,
+    ) -> None:
+        self.requests = 0
+        # Set by close() when the worker acknowledged shutdown and exited with status 0.
+        self.clean_exit = False
+        self.shutdown_timeout = shutdown_timeout
+        self.last_used = time.monotonic()
+        self._next_id = 0
+        listener = socket.create_server(("127.0.0.1", 0))
+        address = f"127.0.0.1:{listener.getsockname()[1]}"
+        log = open(log_path, "ab") if log_path is not None else subprocess.DEVNULL
+        try:
+            self.process = subprocess.Popen(
+                [address if arg == ADDRESS_PLACEHOLDER else arg for arg in command],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                env=env,
+            )
+        except OSError as exc:
+            listener.close()
+            raise DecompileError("worker could not be started", details={"command": list(command), "error": str(exc)}) from exc
+        finally:
+            if log_path is not None:
+                log.close()
+        try:
+            self._conn = self._accept(listener, startup_timeout)
+            self._reader = self._conn.makefile("rb")
+            ready = self._read(startup_timeout)
+            if ready.get("event") != "ready":
+                raise DecompileError("worker did not report ready", details={"message": ready})
+        except DecompileError:
+            self.kill()
+            raise
+        finally:
+            listener.close()
+        self.program = ready.get("program")
+
+    def _accept(self, listener: socket.socket, startup_timeout: float) -> socket.socket:
+        # Import and auto-analysis happen before the worker connects, so startup is polled, not awaited blindly.
+        deadline = time.monotonic() + startup_timeout
+        listener.settimeout(0.2)
+        while True:
+            try:
+                conn, _addr = listener.accept()
+                return conn
+            except socket.timeout:
+                pass
+            if self.process.poll() is not None:
+                raise DecompileError("worker exited during startup", details={"returncode": self.process.returncode})
+            if time.monotonic() > deadline:
+                raise DecompileError("worker startup timed out", details={"timeout_seconds": startup_timeout})
+
+    def _read(self, timeout: float) -> dict:
+        self._conn.settimeout(timeout)
+        try:
+            line = self._reader.readline()
+        except (socket.timeout, OSError) as exc:
+            raise DecompileError("worker request timed out", details={"timeout_seconds": timeout}) from exc
+        if not line:
+            raise DecompileError("worker closed the connection", details={"returncode": self.process.poll()})
+        try:
+            message = json.loads(line)
+        except ValueError as exc:
+            raise DecompileError("worker sent invalid JSON", details={"line": line[:200].decode("utf-8", "replace")}) from exc
+        if not isinstance(message, dict):
+            raise DecompileError("worker sent a non-object message")
+        return message
+
+    def request(self, op: str, timeout: float, **fields: object) -> dict:
+        self._next_id += 1
+        payload = {"id": self._next_id, "op": op, **fields}
+        try:
+            self._conn.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        except OSError as exc:
+            raise DecompileError("worker connection lost", details={"op": op}) from exc
+        response = self._read(timeout)
+        if response.get("id") != self._next_id:
+            raise DecompileError("worker response out of order", details={"expected": self._next_id, "got": response.get("id")})
+        self.last_used = time.monotonic()
+        return response
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Ask the worker to exit, waiting up to `shutdown_timeout` (unbounded when None) before killing it.
+
+        A headless import only saves the program after the post-script returns, so the wait covers that save.
+        """
+        if self.alive():
+            try:
+                self.request("shutdown", timeout)
+                self.clean_exit = self.process.wait(timeout=self.shutdown_timeout) == 0
+            except (DecompileError, subprocess.TimeoutExpired):
+                pass
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        for closable in (getattr(self, "_reader", None), getattr(self, "_conn", None)):
+            if closable is not None:
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+
+
+class WorkerPool:
+    """Up to `size` workers for one program, recycled after `max_requests` and replaced when they fail.
+
+    `factory(index)` starts the index-th worker of the pool's lifetime.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[int], GhidraWorker],
+        size: int = 1,
+        max_requests: int = 200,
+        health_check_seconds: float = 30.0,
+    ) -> None:
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_requests = max(1, max_requests)
+        self.health_check_seconds = health_check_seconds
+        self._idle: queue.Queue[GhidraWorker] = queue.Queue()
+        self._lock = threading.Lock()
+        self._running = 0
+        self.started = 0
+        self.recycled = 0
+        self.timeouts = 0
+        self.failed = 0
+        self.health_failures = 0
+        self.startup_error: DecompileError | None = None
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _healthy(self, worker: GhidraWorker) -> bool:
+        if not worker.alive():
+            return False
+        if time.monotonic() - worker.last_used < self.health_check_seconds:
+            return True
+        try:
+            return worker.request("ping", timeout=10.0).get("ok") is True
+        except DecompileError:
+            return False
+
+    def _checkout(self) -> GhidraWorker:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    start = self._running < self.size
+                    if start:
+                        self._running += 1
+                        index = self.started
+                        self.started += 1
+                if start:
+                    try:
+                        return self.factory(index)
+                    except DecompileError as exc:
+                        with self._lock:
+                            self._running -= 1
+                            self.startup_error = exc
+                        raise
+                worker = self._idle.get()
+            if self._healthy(worker):
+                return worker
+            self._discard(worker)
+            with self._lock:
+                self.health_failures += 1
+
+    def _discard(self, worker: GhidraWorker) -> None:
+        worker.kill()
+        with self._lock:
+            self._running -= 1
+
+    def request(self, op: str, timeout: float, **fields: object) -> dict:
+        worker = self._checkout()
+        try:
+            response = worker.request(op, timeout, **fields)
+        except DecompileError as exc:
+            # A timed out or broken worker may be stuck inside the decompiler; it is never reused.
+            self._discard(worker)
+            with self._lock:
+                if "timeout_seconds" in exc.details:
+                    self.timeouts += 1
+                else:
+                    self.failed += 1
+            raise
+        worker.requests += 1
+        if worker.requests >= self.max_requests:
+            worker.close()
+            with self._lock:
+                self._running -= 1
+                self.recycled += 1
+        else:
+            self._idle.put(worker)
+        return response
+
+    def close(self) -> None:
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.close()
+            with self._lock:
+                self._running -= 1
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "recycled": self.recycled,
+            "timeouts": self.timeouts,
+            "failed": self.failed,
+            "health_failures": self.health_failures,
+            "startup_error": self.startup_error.message if self.startup_error is not None else None,
+        }
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import base64
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .callgraph import call_targets
+from .fingerprint import Fingerprint, Fingerprinter, mask_relocations
+from .minhash import MinHashConfig, Signature, signature
+from ...formats.symbols import Symbol
+from ...utils.mapping import map_file
+
+# Bump when anything stored in a BinaryAnalysis is computed differently.
+ANALYSIS_VERSION = "4"
+
+FunctionKey = tuple[int, int]
+
+
+class FingerprintTable:
+    """Function fingerprints keyed by (address, size), with the Fingerprinter lookup interface."""
+
+    __slots__ = ("entries",)
+
+    def __init__(self, entries: dict[FunctionKey, Fingerprint] | None = None) -> None:
+        self.entries = entries if entries is not None else {}
+
+    def fingerprint(self, address: int, size: int) -> Fingerprint | None:
+        return self.entries.get((address, size))
+
+    def subset(self, keys: list[FunctionKey]) -> "FingerprintTable":
+        return FingerprintTable({key: self.entries[key] for key in keys if key in self.entries})
+
+
+@dataclass
+class BinaryAnalysis:
+    """Everything the matcher needs from one binary, independent of the binary it is diffed against."""
+
+    arch: str
+    symbols: list[Symbol]
+    source: str
+    discovered: list[Symbol]
+    fingerprints: FingerprintTable = field(default_factory=FingerprintTable)
+    calls: dict[FunctionKey, list[int]] = field(default_factory=dict)
+    # MinHash signatures are filled lazily, only for functions left unmatched by name.
+    num_perm: int = 0
+    signatures: dict[FunctionKey, Signature | None] = field(default_factory=dict)
+    dirty: bool = False
+
+    def functions(self) -> list[FunctionKey]:
+        return sorted({(s.address, s.size) for s in (*self.symbols, *self.discovered) if s.size > 0})
+
+    def to_json(self) -> dict:
+        return {
+            "arch": self.arch,
+            "source": self.source,
+            "symbols": [_symbol_row(s) for s in self.symbols],
+            "discovered": [_symbol_row(s) for s in self.discovered],
+            "fingerprints": [
+                [address, size, fp.raw, fp.masked, fp.size] for (address, size), fp in self.fingerprints.entries.items()
+            ],
+            "calls": [[address, size, targets] for (address, size), targets in self.calls.items() if targets],
+            "num_perm": self.num_perm,
+            "signatures": [
+                [address, size, _encode_signature(sig)] for (address, size), sig in self.signatures.items()
+            ],
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "BinaryAnalysis":
+        return cls(
+            arch=data["arch"],
+            source=data["source"],
+            symbols=[Symbol(address=a, symbol_type=t, name=n, size=s) for a, t, n, s in data["symbols"]],
+            discovered=[Symbol(address=a, symbol_type=t, name=n, size=s) for a, t, n, s in data["discovered"]],
+            fingerprints=FingerprintTable(
+                {(a, s): Fingerprint(raw=raw, masked=masked, size=n) for a, s, raw, masked, n in data["fingerprints"]}
+            ),
+            calls={(a, s): targets for a, s, targets in data["calls"]},
+            num_perm=data.get("num_perm", 0),
+            signatures={(a, s): _decode_signature(sig) for a, s, sig in data.get("signatures", [])},
+        )
+
+    def missing_signatures(self, functions: list[Symbol], config: MinHashConfig) -> list[Symbol]:
+        if self.num_perm != config.num_perm:
+            self.signatures = {}
+            self.num_perm = config.num_perm
+        seen: set[FunctionKey] = set()
+        missing = []
+        for sym in functions:
+            key = (sym.address, sym.size)
+            if sym.size >= config.min_size and key not in self.signatures and key not in seen:
+                seen.add(key)
+                missing.append(sym)
+        return missing
+
+    def add_signatures(self, functions: list[Symbol], signatures: list[Signature | None]) -> None:
+        for sym, sig in zip(functions, signatures):
+            self.signatures[(sym.address, sym.size)] = sig
+        if functions:
+            self.dirty = True
+
+    def signature(self, sym: Symbol) -> Signature | None:
+        return self.signatures.get((sym.address, sym.size))
+
+
+def analysis_shard(task: tuple[str, dict, list[FunctionKey]]) -> tuple[list[Fingerprint | None], list[list[int]]]:
+    """Fingerprint and collect direct call targets for a slice of one binary's functions."""
+    path, summary, functions = task
+    fingerprints: list[Fingerprint | None] = []
+    calls: list[list[int]] = []
+    with map_file(Path(path)) as data:
+        fingerprinter = Fingerprinter(data, summary)
+        for address, size in functions:
+            fingerprints.append(fingerprinter.fingerprint(address, size))
+            code = fingerprinter.function_bytes(address, size)
+            calls.append(call_targets(code, address, fingerprinter.arch) if code else [])
+    return fingerprints, calls
+
+
+def signature_shard(task: tuple[str, dict, list[Symbol], MinHashConfig]) -> list[Signature | None]:
+    path, summary, functions, config = task
+    sigs: list[Signature | None] = []
+    with map_file(Path(path)) as data:
+        fingerprinter = Fingerprinter(data, summary)
+        for sym in functions:
+            code = fingerprinter.function_bytes(sym.address, sym.size)
+            sigs.append(signature(mask_relocations(code, fingerprinter.arch), config.num_perm) if code else None)
+    return sigs
+
+
+def _symbol_row(sym: Symbol) -> list:
+    return [sym.address, sym.symbol_type, sym.name, sym.size]
+
+
+def _encode_signature(sig: Signature | None) -> str | None:
+    if sig is None:
+        return None
+    return base64.b64encode(struct.pack(f"<{len(sig)}Q", *sig)).decode("ascii")
+
+
+def _decode_signature(raw: str | None) -> Signature | None:
+    if raw is None:
+        return None
+    packed = base64.b64decode(raw)
+    return struct.unpack(f"<{len(packed) // 8}Q", packed)
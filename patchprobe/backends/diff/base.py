@@ -31,5 +31,5 @@ class DiffResult:
 
 
 class DiffBackend(Protocol):
-    def run(self, job: Job, job_dir: str) -> None:
+    def run(self, job: Job, job_dir: str, workers: int = 1) -> dict | None:
         ...
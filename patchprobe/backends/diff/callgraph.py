@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+from .fingerprint import x86_instructions
+
+_ARM64_BL_TOP = re.compile(rb"[\x94-\x97]")
+
+
+@dataclass
+class CallGraph:
+    """Call edges in CSR form: callees of node i are `callees[callee_offsets[i]:callee_offsets[i + 1]]`."""
+
+    node_count: int
+    callee_offsets: array
+    callees: array
+    caller_offsets: array
+    callers: array
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.callees)
+
+    def callees_of(self, node: int) -> array:
+        return self.callees[self.callee_offsets[node]:self.callee_offsets[node + 1]]
+
+    def callers_of(self, node: int) -> array:
+        return self.callers[self.caller_offsets[node]:self.caller_offsets[node + 1]]
+
+
+def _csr(node_count: int, sources: array, targets: array) -> tuple[array, array]:
+    # Counting sort by source; duplicate edges are kept out by the caller.
+    offsets = array("q", bytes(8 * (node_count + 1)))
+    for src in sources:
+        offsets[src + 1] += 1
+    for node in range(node_count):
+        offsets[node + 1] += offsets[node]
+    fill = array("q", offsets)
+    out = array("q", bytes(8 * len(targets)))
+    for src, dst in zip(sources, targets):
+        out[fill[src]] = dst
+        fill[src] += 1
+    return offsets, out
+
+
+def build_call_graph(node_count: int, edges: Iterable[tuple[int, int]]) -> CallGraph:
+    # Edges are packed into single ints so deduplication and sorting never hold a tuple per edge.
+    sources = array("q")
+    targets = array("q")
+    for key in sorted({(src * node_count) + dst for src, dst in edges}):
+        src, dst = divmod(key, node_count)
+        sources.append(src)
+        targets.append(dst)
+    callee_offsets, callees = _csr(node_count, sources, targets)
+    caller_offsets, callers = _csr(node_count, targets, sources)
+    return CallGraph(
+        node_count=node_count,
+        callee_offsets=callee_offsets,
+        callees=callees,
+        caller_offsets=caller_offsets,
+        callers=callers,
+    )
+
+
+def call_targets(code: bytes, address: int, arch: str) -> list[int]:
+    """Direct call targets: x86/x64 E8 rel32 on decoded instruction boundaries and arm64 BL imm26."""
+    targets: list[int] = []
+    if arch in {"x86", "x64"}:
+        for pos, op, length, _ in x86_instructions(code, arch == "x64"):
+            if op == 0xE8 and length >= 5:
+                end = pos + length
+                targets.append(address + end + int.from_bytes(code[end - 4:end], "little", signed=True))
+    elif arch == "arm64":
+        for match in _ARM64_BL_TOP.finditer(code[3::4]):
+            pos = match.start() * 4
+            imm = int.from_bytes(code[pos:pos + 4], "little") & 0x03FFFFFF
+            if imm & 0x02000000:
+                imm -= 0x04000000
+            targets.append(address + pos + (imm * 4))
+    return targets
+
+
+def node_index(addresses: Sequence[int], address: int) -> int:
+    """Index of the function starting exactly at `address` in the sorted address list, or -1."""
+    pos = bisect_left(addresses, address)
+    if pos < len(addresses) and addresses[pos] == address:
+        return pos
+    return -1
+
+
+def propagate(
+    graph_a: CallGraph,
+    graph_b: CallGraph,
+    anchors: Iterable[tuple[int, int]],
+    max_degree: int = 256,
+) -> list[tuple[int, int, int, int, str]]:
+    """Match unique unmatched callees/callers of matched pairs until nothing changes.
+
+    Returns `(node_a, node_b, anchor_a, anchor_b, relation)` for each new pair, relation being
+    "callee" or "caller" of the anchor. Neighbour lists longer than `max_degree` (hubs such as
+    allocators) are not scanned; they would be rescanned on every nearby match.
+    """
+    match_a = array("q", [-1]) * graph_a.node_count
+    match_b = array("q", [-1]) * graph_b.node_count
+    worklist: list[tuple[int, int]] = []
+    for node_a, node_b in anchors:
+        if match_a[node_a] < 0 and match_b[node_b] < 0:
+            match_a[node_a] = node_b
+            match_b[node_b] = node_a
+            worklist.append((node_a, node_b))
+
+    found: list[tuple[int, int, int, int, str]] = []
+    while worklist:
+        next_round: dict[tuple[int, int], None] = {}
+        for anchor_a, anchor_b in worklist:
+            for relation, side_a, side_b in (
+                ("callee", graph_a.callees_of(anchor_a), graph_b.callees_of(anchor_b)),
+                ("caller", graph_a.callers_of(anchor_a), graph_b.callers_of(anchor_b)),
+            ):
+                if len(side_a) > max_degree or len(side_b) > max_degree:
+                    continue
+                free_a = [n for n in side_a if match_a[n] < 0]
+                if len(free_a) != 1:
+                    continue
+                free_b = [n for n in side_b if match_b[n] < 0]
+                if len(free_b) != 1:
+                    continue
+                node_a, node_b = free_a[0], free_b[0]
+                match_a[node_a] = node_b
+                match_b[node_b] = node_a
+                found.append((node_a, node_b, anchor_a, anchor_b, relation))
+                next_round[(node_a, node_b)] = None
+                # Matched neighbours of the new pair just lost a free neighbour; re-check them as anchors.
+                for neighbour in (*graph_a.callers_of(node_a), *graph_a.callees_of(node_a)):
+                    partner = match_a[neighbour]
+                    if partner >= 0:
+                        next_round[(neighbour, partner)] = None
+        worklist = list(next_round)
+    return found
@@ -1,25 +1,44 @@
 from __future__ import annotations
 
 import hashlib
-import json
 import re
 from dataclasses import dataclass
 from pathlib import Path
 
+from .analysis import ANALYSIS_VERSION, BinaryAnalysis, FingerprintTable, analysis_shard, signature_shard
 from .base import DiffBackend
-from ...core.job import Job
-from ...core.artifacts import write_artifact
+from .callgraph import CallGraph, build_call_graph, node_index, propagate
+from .fingerprint import FINGERPRINT_STATES, classify
+from .minhash import MinHashConfig, match_signatures
+from ...constants import VERSION
+from ...core.job import BinaryInfo, Job, resolve_binary_path
+from ...core.normalize import SectionStates, load_normalized
+from ...core.records import DIFF_RESULTS, FUNCTION_PAIRS, record_format, write_records
+from ...formats.symbols import Symbol, discover_functions, read_function_symbols
+from ...storage.cache import JsonCache, cache_key, get_cache
+from ...utils.concurrency import map_timed
+from ...utils.mapping import map_file
 from ...utils.subprocess import run_command
 
 _NM_LINE = re.compile(r"^([0-9A-Fa-f]+)\s+([A-Za-z])\s+(.+)$")
 _FUNC_TYPES = {"t", "T", "w", "W"}
+# Structural evidence only: a unique neighbour of a matched pair, with no byte similarity behind it.
+_CALLGRAPH_SCORE = 0.7
+# Below this many functions per shard, pickling and process start-up outweigh the work.
+_MIN_SHARD = 512
+# Fingerprints, call targets and signatures for every function of a large binary run to tens of MB.
+_ANALYSIS_CACHE_BYTES = 1024 * 1024 * 1024
 
 
 @dataclass
-class Symbol:
-    address: int
-    symbol_type: str
-    name: str
+class _DiffContext:
+    """What a shard worker needs besides its slice of functions."""
+
+    job: Job
+    path_a: str
+    path_b: str
+    normalized: dict | None
+    source: str
 
 
 def _stable_id(prefix: str, *parts: str) -> str:
@@ -51,16 +70,36 @@ def _parse_nm_output(stdout: str) -> list[Symbol]:
     return symbols
 
 
-def _read_symbols(binary_path: str) -> list[Symbol]:
-    result = run_command(["nm", "-n", binary_path], timeout=60)
+def _read_symbols(binary_path: str, binary: BinaryInfo | None = None) -> tuple[list[Symbol], str]:
+    """Read function symbols from the mapped file; `nm` is only a fallback for formats the reader cannot parse."""
+    if binary is not None:
+        with map_file(Path(binary_path)) as data:
+            symbols = read_function_symbols(data, binary.file_type, binary.arch)
+        if symbols is not None:
+            return symbols, "symtab"
+    try:
+        result = run_command(["nm", "-n", binary_path], timeout=60)
+    except OSError:
+        return [], "nm"
     if result.returncode != 0:
-        return []
-    return _parse_nm_output(result.stdout)
+        return [], "nm"
+    return _parse_nm_output(result.stdout), "nm"
+
+
+def _by_name(symbols: list[Symbol]) -> dict[str, Symbol]:
+    return {_normalize_name(s.name): s for s in symbols if _normalize_name(s.name)}
 
 
-def _match_symbols(symbols_a: list[Symbol], symbols_b: list[Symbol], job: Job) -> tuple[list[dict], list[dict]]:
-    by_name_a = {_normalize_name(s.name): s for s in symbols_a if _normalize_name(s.name)}
-    by_name_b = {_normalize_name(s.name): s for s in symbols_b if _normalize_name(s.name)}
+def _match_symbols(
+    symbols_a: list[Symbol],
+    symbols_b: list[Symbol],
+    job: Job,
+    sections: SectionStates | None = None,
+    source: str = "nm",
+    fingerprints: tuple[FingerprintTable, FingerprintTable] | None = None,
+) -> tuple[list[dict], list[dict]]:
+    by_name_a = _by_name(symbols_a)
+    by_name_b = _by_name(symbols_b)
     matched_names = sorted(set(by_name_a) & set(by_name_b))
     function_pairs: list[dict] = []
     diff_results: list[dict] = []
@@ -83,55 +122,405 @@ def _match_symbols(symbols_a: list[Symbol], symbols_b: list[Symbol], job: Job) -
                     f"addr_b=0x{sym_b.address:x}",
                 ],
                 "metadata": {
-                    "source": "nm",
+                    "source": source,
+                    "symbol_name": name,
+                    "address_a": sym_a.address,
+                    "address_b": sym_b.address,
                     "symbol_type_a": sym_a.symbol_type,
                     "symbol_type_b": sym_b.symbol_type,
+                    "size_a": sym_a.size,
+                    "size_b": sym_b.size,
                 },
             }
         )
+        change_summary = {
+            "symbol_name": name,
+            "address_changed": sym_a.address != sym_b.address,
+            "source": source,
+        }
+        severity = 0.2 if sym_a.address != sym_b.address else 0.05
+        if sections is not None:
+            located = sections.section_state(sym_b.address)
+            if located is not None:
+                change_summary["section"], change_summary["section_state"] = located
+            if sections.identical_section(sym_a.address, sym_b.address):
+                change_summary["unchanged"] = True
+                change_summary["unchanged_reason"] = "identical_section"
+                severity = 0.0
+        if fingerprints is not None and not change_summary.get("unchanged"):
+            fp_a = fingerprints[0].fingerprint(sym_a.address, sym_a.size)
+            fp_b = fingerprints[1].fingerprint(sym_b.address, sym_b.size)
+            state = classify(fp_a, fp_b, sym_a.address, sym_b.address)
+            change_summary["byte_state"] = state
+            if state in {"identical", "moved"}:
+                change_summary["unchanged"] = True
+                change_summary["unchanged_reason"] = "identical_bytes"
+                severity = 0.0
+            elif state == "modified":
+                change_summary["size_changed"] = fp_a.size != fp_b.size
+                severity = 0.6 if fp_a.size != fp_b.size else 0.5
+            elif state == "retargeted":
+                severity = 0.4
         diff_results.append(
             {
                 "func_pair_id": func_pair_id,
-                "change_summary": {
-                    "symbol_name": name,
-                    "address_changed": sym_a.address != sym_b.address,
-                    "source": "nm",
-                },
-                "severity_hint": 0.2 if sym_a.address != sym_b.address else 0.05,
+                "change_summary": change_summary,
+                "severity_hint": severity,
             }
         )
     return function_pairs, diff_results
 
 
+def _shards(items: list, workers: int) -> list[list]:
+    """Contiguous slices, a few per worker so uneven shards still balance; one slice when not parallel."""
+    if workers <= 1 or len(items) <= _MIN_SHARD:
+        return [items]
+    count = min(workers * 4, -(-len(items) // _MIN_SHARD))
+    size = -(-len(items) // count)
+    return [items[idx:idx + size] for idx in range(0, len(items), size)]
+
+
+def _analysis_key(binary: BinaryInfo) -> str:
+    return cache_key(binary.sha256, VERSION, ANALYSIS_VERSION, binary.file_type, binary.arch)
+
+
+def _analyze_binary(
+    binary: BinaryInfo, path: str, summary: dict | None, cache: JsonCache | None, workers: int
+) -> tuple[BinaryAnalysis, dict | None]:
+    """Load the binary's analysis from the cache, or compute it with its functions sharded across workers."""
+    if summary is not None and cache is not None:
+        cached = cache.get(_analysis_key(binary))
+        if isinstance(cached, dict):
+            return BinaryAnalysis.from_json(cached), None
+    symbols, source = _read_symbols(path, binary)
+    analysis = BinaryAnalysis(
+        arch=(summary or {}).get("arch", binary.arch), symbols=symbols, source=source, discovered=[]
+    )
+    if summary is None:
+        return analysis, None
+    with map_file(Path(path)) as data:
+        analysis.discovered = discover_functions(data, binary.file_type, binary.arch)
+    shards = _shards(analysis.functions(), workers)
+    outputs, timing = map_timed(
+        analysis_shard, [(path, summary, shard) for shard in shards], max_workers=workers, processes=True
+    )
+    for shard, (fingerprints, calls) in zip(shards, outputs):
+        for function, fingerprint, targets in zip(shard, fingerprints, calls):
+            if fingerprint is not None:
+                analysis.fingerprints.entries[function] = fingerprint
+            if targets:
+                analysis.calls[function] = targets
+    analysis.dirty = True
+    return analysis, timing
+
+
+def _name_shard(
+    task: tuple[_DiffContext, list[tuple[Symbol, Symbol]], tuple[FingerprintTable, FingerprintTable] | None],
+) -> tuple[list[dict], list[dict]]:
+    context, matched, fingerprints = task
+    symbols_a = [sym_a for sym_a, _sym_b in matched]
+    symbols_b = [sym_b for _sym_a, sym_b in matched]
+    sections = SectionStates(context.normalized) if context.normalized is not None else None
+    return _match_symbols(symbols_a, symbols_b, context.job, sections, context.source, fingerprints)
+
+
+def _match_names(
+    symbols_a: list[Symbol],
+    symbols_b: list[Symbol],
+    context: _DiffContext,
+    analyses: tuple[BinaryAnalysis, BinaryAnalysis],
+    workers: int,
+) -> tuple[list[dict], list[dict], dict]:
+    # Shards are slices of the sorted name list, so concatenating them reproduces the single-process order.
+    by_name_a = _by_name(symbols_a)
+    by_name_b = _by_name(symbols_b)
+    matched = [(by_name_a[name], by_name_b[name]) for name in sorted(set(by_name_a) & set(by_name_b))]
+    shards = _shards(matched, workers)
+    tasks = []
+    for shard in shards:
+        fingerprints = None
+        if context.normalized is not None:
+            fingerprints = (analyses[0].fingerprints, analyses[1].fingerprints)
+            if len(shards) > 1:
+                # Ship each worker only the fingerprints its slice looks up.
+                fingerprints = (
+                    fingerprints[0].subset([(a.address, a.size) for a, _b in shard]),
+                    fingerprints[1].subset([(b.address, b.size) for _a, b in shard]),
+                )
+        tasks.append((context, shard, fingerprints))
+    outputs, timing = map_timed(_name_shard, tasks, max_workers=workers, processes=True)
+    function_pairs = [pair for shard_pairs, _results in outputs for pair in shard_pairs]
+    diff_results = [result for _pairs, shard_results in outputs for result in shard_results]
+    return function_pairs, diff_results, timing
+
+
+def _unmatched(symbols: list[Symbol], matched_names: set[str], discovered: list[Symbol]) -> list[Symbol]:
+    """Named symbols left over after name matching, plus discovered functions no symbol covers."""
+    leftover = [s for s in symbols if _normalize_name(s.name) not in matched_names]
+    known = {s.address for s in symbols}
+    leftover.extend(s for s in discovered if s.address not in known)
+    return leftover
+
+
+def _match_minhash(
+    functions_a: list[Symbol],
+    functions_b: list[Symbol],
+    context: _DiffContext,
+    analyses: tuple[BinaryAnalysis, BinaryAnalysis],
+    config: MinHashConfig,
+    workers: int,
+) -> tuple[list[tuple[Symbol, Symbol, float]], dict]:
+    # Only signatures not already in the (possibly cached) analyses are computed.
+    normalized = context.normalized or {}
+    missing_a = analyses[0].missing_signatures(functions_a, config)
+    missing_b = analyses[1].missing_signatures(functions_b, config)
+    shards_a = [shard for shard in _shards(missing_a, workers) if shard]
+    shards_b = [shard for shard in _shards(missing_b, workers) if shard]
+    tasks = [(context.path_a, normalized.get("binary_a", {}), shard, config) for shard in shards_a]
+    tasks += [(context.path_b, normalized.get("binary_b", {}), shard, config) for shard in shards_b]
+    outputs, timing = map_timed(signature_shard, tasks, max_workers=workers, processes=True)
+    analyses[0].add_signatures(missing_a, [sig for shard in outputs[:len(shards_a)] for sig in shard])
+    analyses[1].add_signatures(missing_b, [sig for shard in outputs[len(shards_a):] for sig in shard])
+    sigs_a = [analyses[0].signature(sym) if sym.size >= config.min_size else None for sym in functions_a]
+    sigs_b = [analyses[1].signature(sym) if sym.size >= config.min_size else None for sym in functions_b]
+    matches = match_signatures(sigs_a, sigs_b, config)
+    return [(functions_a[i], functions_b[j], score) for i, j, score in matches], timing
+
+
+def _function_table(symbols: list[Symbol], discovered: list[Symbol]) -> list[Symbol]:
+    """One function per start address, sorted; named symbols win over discovered ones."""
+    by_address = {s.address: s for s in discovered}
+    by_address.update((s.address, s) for s in symbols)
+    return [by_address[address] for address in sorted(by_address)]
+
+
+def _call_graph(functions: list[Symbol], analysis: BinaryAnalysis) -> CallGraph:
+    addresses = [s.address for s in functions]
+
+    def edges():
+        for idx, sym in enumerate(functions):
+            for target in analysis.calls.get((sym.address, sym.size), ()):
+                callee = node_index(addresses, target)
+                if callee >= 0 and callee != idx:
+                    yield idx, callee
+
+    return build_call_graph(len(functions), edges())
+
+
+def _match_callgraph(
+    functions_a: list[Symbol],
+    functions_b: list[Symbol],
+    anchors: list[tuple[Symbol, Symbol]],
+    analyses: tuple[BinaryAnalysis, BinaryAnalysis],
+) -> tuple[list[tuple[Symbol, Symbol, Symbol, str]], dict]:
+    graph_a = _call_graph(functions_a, analyses[0])
+    graph_b = _call_graph(functions_b, analyses[1])
+    addresses_a = [s.address for s in functions_a]
+    addresses_b = [s.address for s in functions_b]
+    anchor_nodes = []
+    for sym_a, sym_b in anchors:
+        node_a = node_index(addresses_a, sym_a.address)
+        node_b = node_index(addresses_b, sym_b.address)
+        if node_a >= 0 and node_b >= 0:
+            anchor_nodes.append((node_a, node_b))
+    found = [
+        (functions_a[node_a], functions_b[node_b], functions_b[anchor_b], relation)
+        for node_a, node_b, _anchor_a, anchor_b, relation in propagate(graph_a, graph_b, anchor_nodes)
+    ]
+    stats = {"edges_a": graph_a.edge_count, "edges_b": graph_b.edge_count, "matched": len(found)}
+    return found, stats
+
+
+def _fuzzy_pair(
+    sym_a: Symbol,
+    sym_b: Symbol,
+    job: Job,
+    fingerprints: tuple[FingerprintTable, FingerprintTable],
+    source: str,
+    score: float,
+    evidence: list[str],
+) -> tuple[dict, dict]:
+    name_a = _normalize_name(sym_a.name)
+    name_b = _normalize_name(sym_b.name)
+    func_pair_id = _stable_id("fp", source, name_a, name_b)
+    pair = {
+        "func_pair_id": func_pair_id,
+        "func_id_a": _stable_id("fa", job.binary_a.sha256, name_a, hex(sym_a.address)),
+        "func_id_b": _stable_id("fb", job.binary_b.sha256, name_b, hex(sym_b.address)),
+        "match_score": round(score, 4),
+        "status": f"matched_by_{source}",
+        "evidence": [
+            f"symbol_name={name_b}",
+            f"symbol_name_a={name_a}",
+            *evidence,
+            f"addr_a=0x{sym_a.address:x}",
+            f"addr_b=0x{sym_b.address:x}",
+        ],
+        "metadata": {
+            "source": source,
+            "symbol_name": name_b,
+            "symbol_name_a": name_a,
+            "address_a": sym_a.address,
+            "address_b": sym_b.address,
+            "symbol_type_a": sym_a.symbol_type,
+            "symbol_type_b": sym_b.symbol_type,
+            "size_a": sym_a.size,
+            "size_b": sym_b.size,
+        },
+    }
+    state = classify(
+        fingerprints[0].fingerprint(sym_a.address, sym_a.size),
+        fingerprints[1].fingerprint(sym_b.address, sym_b.size),
+        sym_a.address,
+        sym_b.address,
+    )
+    change_summary = {
+        "symbol_name": name_b,
+        "symbol_name_a": name_a,
+        "address_changed": sym_a.address != sym_b.address,
+        "source": source,
+        "byte_state": state,
+    }
+    severity = 0.6 if sym_a.size != sym_b.size else 0.5
+    if state in {"identical", "moved"}:
+        change_summary["unchanged"] = True
+        change_summary["unchanged_reason"] = "identical_bytes"
+        severity = 0.0
+    return pair, {"func_pair_id": func_pair_id, "change_summary": change_summary, "severity_hint": severity}
+
+
+def _fuzzy_pass(
+    symbols_a: list[Symbol],
+    symbols_b: list[Symbol],
+    context: _DiffContext,
+    analyses: tuple[BinaryAnalysis, BinaryAnalysis],
+    minhash: MinHashConfig | None,
+    callgraph: bool,
+    workers: int = 1,
+) -> tuple[list[dict], list[dict], dict, dict | None]:
+    by_name_a = _by_name(symbols_a)
+    by_name_b = _by_name(symbols_b)
+    matched = set(by_name_a) & set(by_name_b)
+    job = context.job
+    discovered_a = analyses[0].discovered
+    discovered_b = analyses[1].discovered
+    fingerprints = (analyses[0].fingerprints, analyses[1].fingerprints)
+    function_pairs: list[dict] = []
+    diff_results: list[dict] = []
+    stats: dict = {}
+    timing = None
+    anchors = [(by_name_a[name], by_name_b[name]) for name in sorted(matched)]
+    if minhash is not None:
+        leftover_a = _unmatched(symbols_a, matched, discovered_a)
+        leftover_b = _unmatched(symbols_b, matched, discovered_b)
+        matches, timing = _match_minhash(leftover_a, leftover_b, context, analyses, minhash, workers)
+        for sym_a, sym_b, score in matches:
+            pair, result = _fuzzy_pair(
+                sym_a, sym_b, job, fingerprints, "minhash", score, [f"minhash_similarity={score:.4f}"]
+            )
+            function_pairs.append(pair)
+            diff_results.append(result)
+            anchors.append((sym_a, sym_b))
+        stats["minhash"] = {"unmatched_a": len(leftover_a), "unmatched_b": len(leftover_b), "matched": len(matches)}
+    if callgraph:
+        found, stats["callgraph"] = _match_callgraph(
+            _function_table(symbols_a, discovered_a), _function_table(symbols_b, discovered_b), anchors, analyses
+        )
+        for sym_a, sym_b, anchor, relation in found:
+            evidence = [f"callgraph={relation}_of:{_normalize_name(anchor.name)}"]
+            pair, result = _fuzzy_pair(sym_a, sym_b, job, fingerprints, "callgraph", _CALLGRAPH_SCORE, evidence)
+            function_pairs.append(pair)
+            diff_results.append(result)
+    return function_pairs, diff_results, stats, timing
+
+
+def _byte_state_summary(diff_results: list[dict]) -> dict[str, int]:
+    summary = {state: 0 for state in FINGERPRINT_STATES}
+    for result in diff_results:
+        state = result["change_summary"].get("byte_state")
+        if state in summary:
+            summary[state] += 1
+    return summary
+
+
 class DiaphoraBackend(DiffBackend):
-    def run(self, job: Job, job_dir: str) -> None:
+    def run(self, job: Job, job_dir: str, workers: int = 1) -> dict:
         out_dir = Path(job_dir) / "artifacts" / "diff"
         out_dir.mkdir(parents=True, exist_ok=True)
-        symbols_a = _read_symbols(job.binary_a.path)
-        symbols_b = _read_symbols(job.binary_b.path)
-        function_pairs, diff_results = _match_symbols(symbols_a, symbols_b, job)
-        (out_dir / "function_pairs.json").write_text(json.dumps(function_pairs, indent=2), encoding="utf-8")
-        (out_dir / "diff_results.json").write_text(json.dumps(diff_results, indent=2), encoding="utf-8")
+        path_a = resolve_binary_path(job, job.binary_a)
+        path_b = resolve_binary_path(job, job.binary_b)
+        normalized = load_normalized(job_dir)
+        # Per-binary analysis needs the normalized section table, so only then is it cached and reused.
+        cache = get_cache(job.config, "analysis", _ANALYSIS_CACHE_BYTES) if normalized is not None else None
+        details: dict = {"workers": workers}
+        shard_timing: dict = {}
+        analyses: list[BinaryAnalysis] = []
+        reused: dict[str, bool] = {}
+        for side, binary, path in (("a", job.binary_a, path_a), ("b", job.binary_b, path_b)):
+            summary = normalized.get(f"binary_{side}", {}) if normalized is not None else None
+            if analyses and _analysis_key(binary) == _analysis_key(job.binary_a):
+                analyses.append(analyses[0])
+                reused[side] = reused["a"]
+                continue
+            analysis, timing = _analyze_binary(binary, path, summary, cache, workers)
+            analyses.append(analysis)
+            reused[side] = timing is None and summary is not None
+            if timing is not None:
+                shard_timing[f"analysis_{side}"] = timing
+        analysis_a, analysis_b = analyses
+        symbols_a, symbols_b = analysis_a.symbols, analysis_b.symbols
+        source_a, source_b = analysis_a.source, analysis_b.source
+        source = source_a if source_a == source_b else f"{source_a}+{source_b}"
+        context = _DiffContext(job=job, path_a=path_a, path_b=path_b, normalized=normalized, source=source)
+        diff_cfg = job.config.get("diff", {}) if isinstance(job.config, dict) else {}
+        minhash_cfg = diff_cfg.get("minhash", {}) or {}
+        callgraph_cfg = diff_cfg.get("callgraph", {}) or {}
+        function_pairs, diff_results, shard_timing["names"] = _match_names(
+            symbols_a, symbols_b, context, (analysis_a, analysis_b), workers
+        )
+        minhash = MinHashConfig.from_config(minhash_cfg) if minhash_cfg.get("enabled", True) else None
+        callgraph = bool(callgraph_cfg.get("enabled", True))
+        if normalized is not None and (minhash is not None or callgraph):
+            fuzzy_pairs, fuzzy_results, fuzzy_stats, signature_timing = _fuzzy_pass(
+                symbols_a, symbols_b, context, (analysis_a, analysis_b), minhash, callgraph, workers
+            )
+            function_pairs.extend(fuzzy_pairs)
+            diff_results.extend(fuzzy_results)
+            details.update(fuzzy_stats)
+            if signature_timing is not None:
+                shard_timing["signatures"] = signature_timing
+        details["shards"] = shard_timing
+        if cache is not None:
+            for binary, analysis in ((job.binary_a, analysis_a), (job.binary_b, analysis_b)):
+                if analysis.dirty:
+                    cache.put(_analysis_key(binary), analysis.to_json())
+                    analysis.dirty = False
+            cache.evict()
+            details["analysis"] = {"reused_a": reused["a"], "reused_b": reused["b"], "cache": cache.stats()}
         inputs = {
             "binary_a_sha256": job.binary_a.sha256,
             "binary_b_sha256": job.binary_b.sha256,
             "upstream_artifact_hashes": [],
         }
-        write_artifact(
-            out_dir / "function_pairs.artifact.json",
-            "diff.function_pairs",
-            inputs,
+        fmt = record_format(job.config)
+        write_records(
+            out_dir,
+            FUNCTION_PAIRS,
             function_pairs,
+            fmt,
+            artifact_type="diff.function_pairs",
+            inputs=inputs,
             payload_schema="function_pair.schema.json",
-            payload_is_list=True,
             job_dir=Path(job_dir),
         )
-        write_artifact(
-            out_dir / "diff_results.artifact.json",
-            "diff.results",
-            inputs,
+        write_records(
+            out_dir,
+            DIFF_RESULTS,
             diff_results,
+            fmt,
+            artifact_type="diff.results",
+            inputs=inputs,
             payload_schema="diff_result.schema.json",
-            payload_is_list=True,
             job_dir=Path(job_dir),
         )
+        return {"pairs": len(function_pairs), "byte_states": _byte_state_summary(diff_results), **details}
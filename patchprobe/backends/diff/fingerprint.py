@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import hashlib
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from ...core.normalize import section_file_range
+from ...utils.mapping import Buffer
+
+# "retargeted": same address and bytes equal once call/jmp targets are masked, but the raw bytes differ.
+FINGERPRINT_STATES = ("identical", "moved", "retargeted", "modified", "unknown")
+
+# x86/x64 instruction lengths, enough to find rel32 and RIP-relative operands on instruction boundaries.
+# Decoding stops at the first opcode not covered here; the rest of the function is left unmasked.
+_X86_PREFIXES = frozenset(b"\x26\x2e\x36\x3e\x64\x65\x66\x67\xf0\xf2\xf3")
+_X86_MODRM = frozenset(
+    [op for base in range(0x00, 0x40, 0x08) for op in range(base, base + 4)]
+    + [0x62, 0x63, 0x69, 0x6B, *range(0x80, 0x90), 0xC0, 0xC1, 0xC4, 0xC5, 0xC6, 0xC7]
+    + [0xD0, 0xD1, 0xD2, 0xD3, *range(0xD8, 0xE0), 0xF6, 0xF7, 0xFE, 0xFF]
+)
+_X86_IMM8 = frozenset(
+    [base + 4 for base in range(0x00, 0x40, 0x08)]
+    + [0x6A, 0x6B, *range(0x70, 0x80), 0x80, 0x82, 0x83, 0xA8, *range(0xB0, 0xB8), 0xC0, 0xC1, 0xC6, 0xCD]
+    + [0xD4, 0xD5, *range(0xE0, 0xE8), 0xEB]
+)
+_X86_IMMZ = frozenset([base + 5 for base in range(0x00, 0x40, 0x08)] + [0x68, 0x69, 0x81, 0xA9, 0xC7, 0xE8, 0xE9])
+_X86_INVALID_64 = frozenset(b"\x06\x07\x0e\x16\x17\x1e\x1f\x27\x2f\x37\x3f\x60\x61\x62\x82\x9a\xce\xd4\xd5\xd6\xea")
+_X86_0F_NO_MODRM = frozenset(
+    [0x05, 0x06, 0x07, 0x08, 0x09, 0x0B, 0x0E, *range(0x30, 0x38), 0x77, *range(0x80, 0x90)]
+    + [0xA0, 0xA1, 0xA2, 0xA8, 0xA9, 0xAA, *range(0xC8, 0xD0)]
+)
+_X86_0F_IMM8 = frozenset([0x70, 0x71, 0x72, 0x73, 0xA4, 0xAC, 0xBA, 0xC2, 0xC4, 0xC5, 0xC6])
+# arm64: B/BL imm26, ADR/ADRP immhi:immlo, and the imm12 of ADD (64-bit) / LDR/STR (unsigned offset).
+_ARM64_B_BL = 0x14000000
+_ARM64_B_MASK = 0x7C000000
+_ARM64_ADR = 0x10000000
+_ARM64_ADR_MASK = 0x1F000000
+_ARM64_ADD_IMM = 0x91000000
+_ARM64_ADD_IMM_MASK = 0xFF800000
+_ARM64_LDST_UIMM = 0x39000000
+_ARM64_LDST_UIMM_MASK = 0x3B000000
+
+
+@dataclass
+class Fingerprint:
+    raw: str
+    masked: str
+    size: int
+
+
+class Fingerprinter:
+    """Hashes function bytes sliced from the mapped binary using the normalized section table."""
+
+    def __init__(self, data: Buffer, summary: dict) -> None:
+        self.data = data
+        self.arch = summary.get("arch", "unknown")
+        spans = []
+        for section in summary.get("sections", []):
+            span = section_file_range(section)
+            address = int(section.get("address") or 0)
+            if span is None or address <= 0 or span[1] <= 0:
+                continue
+            spans.append((address, span[1], span[0]))
+        spans.sort()
+        self._starts = [span[0] for span in spans]
+        self._spans = spans
+
+    def function_bytes(self, address: int, size: int) -> bytes | None:
+        if size <= 0:
+            return None
+        pos = bisect_right(self._starts, address) - 1
+        if pos < 0:
+            return None
+        start, length, offset = self._spans[pos]
+        if address + size > start + length:
+            return None
+        file_offset = offset + (address - start)
+        if file_offset + size > len(self.data):
+            return None
+        return bytes(self.data[file_offset:file_offset + size])
+
+    def fingerprint(self, address: int, size: int) -> Fingerprint | None:
+        code = self.function_bytes(address, size)
+        if code is None:
+            return None
+        masked = mask_relocations(code, self.arch)
+        return Fingerprint(
+            raw=hashlib.sha256(code).hexdigest(),
+            masked=hashlib.sha256(masked).hexdigest(),
+            size=size,
+        )
+
+
+def _x86_modrm_length(code: bytes, pos: int) -> int:
+    """Length of a ModRM byte plus its SIB and displacement (32/64-bit addressing)."""
+    modrm = code[pos]
+    mod, rm = modrm >> 6, modrm & 7
+    if mod == 3:
+        return 1
+    length = 1
+    if rm == 4:
+        length += 1
+        if mod == 0 and pos + 1 < len(code) and code[pos + 1] & 7 == 5:
+            length += 4
+    elif mod == 0 and rm == 5:
+        length += 4
+    return length + (1 if mod == 1 else 4 if mod == 2 else 0)
+
+
+def _x86_rip_disp(code: bytes, pos: int, is64: bool) -> int | None:
+    """Offset of the disp32 after the ModRM at `pos` when it is RIP-relative (mod=00, rm=101 in 64-bit mode)."""
+    return pos + 1 if is64 and code[pos] & 0xC7 == 0x05 else None
+
+
+def _x86_length(code: bytes, pos: int, is64: bool) -> tuple[int, int, int | None] | None:
+    """(opcode, instruction length, RIP-relative disp32 offset or None) at `pos`, or None for anything not decoded.
+
+    Two-byte opcodes are reported as 0x0F00 | second byte.
+    """
+    start = pos
+    operand16 = address16 = rex_w = False
+    while pos < len(code) and code[pos] in _X86_PREFIXES:
+        operand16 |= code[pos] == 0x66
+        address16 |= code[pos] == 0x67
+        pos += 1
+    if address16 and not is64:
+        return None
+    if is64 and pos < len(code) and 0x40 <= code[pos] <= 0x4F:
+        rex_w = bool(code[pos] & 8)
+        pos += 1
+    if pos >= len(code):
+        return None
+    op = code[pos]
+    pos += 1
+    immz = 2 if operand16 else 4
+    disp = None
+    if op in (0xC4, 0xC5) and (is64 or (pos < len(code) and code[pos] >= 0xC0)):
+        # VEX: map from the first payload byte (C4) or implied 0F (C5), then opcode and ModRM.
+        if op == 0xC5:
+            vex_map, pos = 1, pos + 1
+        else:
+            if pos >= len(code):
+                return None
+            vex_map, pos = code[pos] & 0x1F, pos + 2
+        if pos + 1 >= len(code) or vex_map not in (1, 2, 3):
+            return None
+        vex_op = code[pos]
+        pos += 1
+        disp = _x86_rip_disp(code, pos, is64)
+        pos += _x86_modrm_length(code, pos)
+        if vex_map == 3 or (vex_map == 1 and vex_op in _X86_0F_IMM8):
+            pos += 1
+        return op, pos - start, None if disp is None else disp - start
+    if is64 and op in _X86_INVALID_64:
+        return None
+    if op == 0x0F:
+        if pos >= len(code):
+            return None
+        op2 = code[pos]
+        pos += 1
+        if op2 in (0x38, 0x3A):
+            pos += 1
+            if pos >= len(code):
+                return None
+            disp = _x86_rip_disp(code, pos, is64)
+            pos += _x86_modrm_length(code, pos)
+            pos += 1 if op2 == 0x3A else 0
+        elif op2 in _X86_0F_NO_MODRM:
+            pos += immz if 0x80 <= op2 <= 0x8F else 0
+        elif op2 == 0x0F:
+            return None
+        else:
+            if pos >= len(code):
+                return None
+            disp = _x86_rip_disp(code, pos, is64)
+            pos += _x86_modrm_length(code, pos)
+            pos += 1 if op2 in _X86_0F_IMM8 else 0
+        return 0x0F00 | op2, pos - start, None if disp is None else disp - start
+    if op in _X86_MODRM:
+        if pos >= len(code):
+            return None
+        reg = (code[pos] >> 3) & 7
+        disp = _x86_rip_disp(code, pos, is64)
+        pos += _x86_modrm_length(code, pos)
+        if op == 0xF6 and reg < 2:
+            pos += 1
+        elif op == 0xF7 and reg < 2:
+            pos += immz
+    if op in _X86_IMM8:
+        pos += 1
+    elif op in _X86_IMMZ:
+        pos += 4 if op in (0xE8, 0xE9) and is64 else immz
+    elif 0xB8 <= op <= 0xBF:
+        pos += 8 if rex_w else immz
+    elif 0xA0 <= op <= 0xA3:
+        pos += (4 if address16 else 8) if is64 else 4
+    elif op in (0xC2, 0xCA):
+        pos += 2
+    elif op == 0xC8:
+        pos += 3
+    elif op in (0x9A, 0xEA):
+        pos += 2 + immz
+    return op, pos - start, None if disp is None else disp - start
+
+
+def x86_instructions(code: bytes, is64: bool):
+    """Yield (offset, opcode, length, RIP-relative disp32 offset or None) by linear decoding from offset 0."""
+    pos = 0
+    while pos < len(code):
+        decoded = _x86_length(code, pos, is64)
+        if decoded is None or pos + decoded[1] > len(code):
+            return
+        op, length, disp = decoded
+        yield pos, op, length, None if disp is None else pos + disp
+        pos += length
+
+
+def _x86_pc_relative_fields(code: bytes, is64: bool) -> list[int]:
+    """Offsets of E8 call / E9 jmp rel32 operands and RIP-relative disp32 fields."""
+    fields = []
+    for pos, op, length, disp in x86_instructions(code, is64):
+        if op in (0xE8, 0xE9) and length >= 5:
+            fields.append(pos + length - 4)
+        if disp is not None:
+            fields.append(disp)
+    return fields
+
+
+def _arm64_mask(code: bytes) -> bytes:
+    # ADRP sets a page register; the :lo12: ADD or LDR/STR immediate off that register is masked with it.
+    buf = bytearray(code)
+    pages: set[int] = set()
+    for off in range(0, len(code) - 3, 4):
+        word = int.from_bytes(code[off:off + 4], "little")
+        rd, rn = word & 0x1F, (word >> 5) & 0x1F
+        if word & _ARM64_B_MASK == _ARM64_B_BL:
+            word &= 0xFC000000
+        elif word & _ARM64_ADR_MASK == _ARM64_ADR:
+            word &= 0x9F00001F
+            if word & 0x80000000:
+                pages.add(rd)
+            else:
+                pages.discard(rd)
+        elif word & _ARM64_ADD_IMM_MASK == _ARM64_ADD_IMM:
+            if rn in pages:
+                word &= 0xFFC003FF
+            pages.discard(rd)
+        elif word & _ARM64_LDST_UIMM_MASK == _ARM64_LDST_UIMM:
+            if rn in pages:
+                word &= 0xFFC003FF
+            if word & 0x00C00000:
+                pages.discard(rd)
+        else:
+            # Anything else may overwrite its low register field; stop pairing with it.
+            pages.discard(rd)
+            continue
+        buf[off:off + 4] = word.to_bytes(4, "little")
+    return bytes(buf)
+
+
+def mask_relocations(code: bytes, arch: str) -> bytes:
+    """Zero out PC-relative call/branch/address immediates so relinked but unchanged code hashes equal."""
+    if arch in {"x86", "x64"}:
+        buf = bytearray(code)
+        for start in _x86_pc_relative_fields(code, arch == "x64"):
+            buf[start:start + 4] = b"\x00\x00\x00\x00"
+        return bytes(buf)
+    if arch == "arm64":
+        return _arm64_mask(code)
+    return code
+
+
+def classify(fp_a: Fingerprint | None, fp_b: Fingerprint | None, address_a: int, address_b: int) -> str:
+    if fp_a is None or fp_b is None:
+        return "unknown"
+    if fp_a.raw == fp_b.raw:
+        return "identical" if address_a == address_b else "moved"
+    if fp_a.masked == fp_b.masked:
+        # In place, a differing call/jmp target is a real change; only relocated code is expected to differ there.
+        return "moved" if address_a != address_b else "retargeted"
+    return "modified"
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Sequence
+
+_MASK64 = (1 << 64) - 1
+_MIX = 0x9E3779B97F4A7C15
+_DENSIFY = 0xC2B2AE3D27D4EB4F
+# Overlapping 4-byte shingles are read as native 32-bit words, four strided passes per function.
+_GRAM = "I" if array("I").itemsize == 4 else "L"
+
+Signature = tuple[int, ...]
+
+
+@dataclass
+class MinHashConfig:
+    num_perm: int = 64
+    bands: int = 16
+    threshold: float = 0.5
+    min_size: int = 16
+    max_bucket: int = 64
+
+    @classmethod
+    def from_config(cls, cfg: dict) -> "MinHashConfig":
+        config = cls(**{k: v for k, v in cfg.items() if k in cls.__dataclass_fields__})
+        if config.num_perm <= 0 or config.num_perm & (config.num_perm - 1):
+            raise ValueError("minhash num_perm must be a power of two")
+        if config.bands <= 0 or config.num_perm % config.bands:
+            raise ValueError("minhash bands must divide num_perm")
+        return config
+
+
+def shingles(code: bytes) -> set[int]:
+    grams: set[int] = set()
+    last = len(code) - 4
+    for start in range(min(4, last + 1)):
+        count = ((last - start) // 4) + 1
+        grams.update(array(_GRAM, code[start:start + (count * 4)]))
+    return grams
+
+
+def signature(code: bytes, num_perm: int = 64) -> Signature | None:
+    """One-permutation MinHash: one hash per shingle, the top bits pick the bin, the minimum per bin is kept."""
+    grams = shingles(code)
+    if not grams:
+        return None
+    shift = 64 - (num_perm.bit_length() - 1)
+    low = (1 << shift) - 1
+    hashes = sorted(map(_MASK64.__and__, map(_MIX.__mul__, grams)))
+    # Walking the sorted hashes backwards, the last write per bin is that bin's minimum.
+    minima = {h >> shift: h & low for h in reversed(hashes)}
+    if len(minima) < num_perm:
+        # Rotation densification: an empty bin borrows from the next filled bin, offset by the distance.
+        filled = sorted(minima)
+        for b in range(num_perm):
+            if b not in minima:
+                pos = bisect_left(filled, b)
+                src = filled[pos] if pos < len(filled) else filled[0]
+                minima[b] = (minima[src] + (((src - b) % num_perm) * _DENSIFY)) & low
+    return tuple(minima[b] for b in range(num_perm))
+
+
+def similarity(sig_a: Signature, sig_b: Signature) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class LshIndex:
+    """Banded LSH buckets over one side's signatures; oversized buckets are ignored as uninformative."""
+
+    def __init__(self, signatures: Sequence[Signature | None], bands: int, max_bucket: int) -> None:
+        self.bands = bands
+        self.max_bucket = max_bucket
+        self.signatures = signatures
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in range(bands)]
+        for idx, sig in enumerate(signatures):
+            if sig is None:
+                continue
+            for band, key in enumerate(self._keys(sig)):
+                self._buckets[band].setdefault(key, []).append(idx)
+
+    def _keys(self, sig: Signature) -> list[int]:
+        rows = len(sig) // self.bands
+        return [hash(sig[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def candidates(self, sig: Signature) -> set[int]:
+        found: set[int] = set()
+        for band, key in enumerate(self._keys(sig)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None and len(bucket) <= self.max_bucket:
+                found.update(bucket)
+        return found
+
+
+def match_signatures(
+    signatures_a: Sequence[Signature | None],
+    signatures_b: Sequence[Signature | None],
+    config: MinHashConfig,
+) -> list[tuple[int, int, float]]:
+    """Return one-to-one `(index_a, index_b, similarity)` matches, best similarity first."""
+    index = LshIndex(signatures_b, config.bands, config.max_bucket)
+    scored: list[tuple[float, int, int]] = []
+    for i, sig_a in enumerate(signatures_a):
+        if sig_a is None:
+            continue
+        for j in index.candidates(sig_a):
+            score = similarity(sig_a, signatures_b[j])  # type: ignore[arg-type]
+            if score >= config.threshold:
+                scored.append((score, i, j))
+    scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+    used_a: set[int] = set()
+    used_b: set[int] = set()
+    matches: list[tuple[int, int, float]] = []
+    for score, i, j in scored:
+        if i in used_a or j in used_b:
+            continue
+        used_a.add(i)
+        used_b.add(j)
+        matches.append((i, j, score))
+    return matches
@@ -9,7 +9,7 @@ from .config import load_config, resolve_config_path, validate_config
 from .constants import DEFAULT_LOG_LEVEL, ENV_LOG_LEVEL
 from .logging import configure_logging
 from .errors import CliArgumentError, PatchdiffError
-from .core import pipeline
+from .core import batch, pipeline
 
 
 class PatchdiffArgumentParser(argparse.ArgumentParser):
@@ -29,6 +29,7 @@ def _build_parser() -> argparse.ArgumentParser:
         "  patchdiff validate --job ./jobs/job_001\n"
         "  patchdiff report --job ./jobs/job_001 --format markdown\n"
         "  patchdiff run --a ./before.bin --b ./after.bin --out ./jobs/job_001 --top 30\n"
+        "  patchdiff batch --manifest ./pairs.jsonl --workers 4\n"
     )
     p = PatchdiffArgumentParser(
         prog="patchdiff",
@@ -51,6 +52,7 @@ def _build_parser() -> argparse.ArgumentParser:
     ingest.add_argument("--b", required=True)
     ingest.add_argument("--tag", default=None)
     ingest.add_argument("--out", required=True)
+    ingest.add_argument("--arch", default=None, help="Slice to select from universal Mach-O binaries")
 
     diff = sub.add_parser(
         "diff",
@@ -60,6 +62,7 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     diff.add_argument("--job", required=True)
     diff.add_argument("--backend", default=None)
+    diff.add_argument("--workers", type=int, default=None, help="Processes for sharded matching")
 
     normalize = sub.add_parser(
         "normalize",
@@ -126,6 +129,7 @@ def _build_parser() -> argparse.ArgumentParser:
     run.add_argument("--b", required=True)
     run.add_argument("--tag", default=None)
     run.add_argument("--out", required=True)
+    run.add_argument("--arch", default=None, help="Slice to select from universal Mach-O binaries")
     run.add_argument("--backend", default=None)
     run.add_argument("--top", type=int, default=None)
     run.add_argument("--timeout", type=int, default=90)
@@ -134,6 +138,27 @@ def _build_parser() -> argparse.ArgumentParser:
     run.add_argument("--max-rounds", type=int, default=None)
     run.add_argument("--format", default=None)
 
+    batch = sub.add_parser(
+        "batch",
+        help="Run the pipeline for every pair in a manifest",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=(
+            "Example:\n  patchdiff batch --manifest ./pairs.jsonl --workers 4\n\n"
+            "Manifest rows (JSONL objects or CSV with a header) need a, b and out; tag is optional."
+        ),
+    )
+    batch.add_argument("--manifest", required=True)
+    batch.add_argument("--workers", type=int, default=None)
+    batch.add_argument("--summary", default=None)
+    batch.add_argument("--arch", default=None)
+    batch.add_argument("--backend", default=None)
+    batch.add_argument("--top", type=int, default=None)
+    batch.add_argument("--timeout", type=int, default=90)
+    batch.add_argument("--provider", default=None)
+    batch.add_argument("--model", default=None)
+    batch.add_argument("--max-rounds", type=int, default=None)
+    batch.add_argument("--format", default=None)
+
     return p
 
 
@@ -165,6 +190,8 @@ def main() -> None:
             pipeline.run_report(cfg, args)
         elif args.command == "run":
             pipeline.run_all(cfg, args)
+        elif args.command == "batch":
+            batch.run(cfg, args)
         else:
             parser.error("Unknown command")
     except PatchdiffError as e:
@@ -72,18 +72,21 @@ def write_artifact(
     }
     validate_data(str(ARTIFACT_SCHEMA_PATH), envelope)
     path.write_text(json.dumps(envelope, indent=2), encoding="utf-8")
-    artifact_sha256 = sha256_file(path)
+    record_artifact(path, envelope, job_dir)
 
+
+def record_artifact(path: Path, envelope: dict, job_dir: Path | None = None) -> None:
+    """Add a written envelope to the job's artifact index."""
     actual_job_dir = job_dir or _infer_job_dir(path)
     if actual_job_dir:
         _update_artifact_index(
             actual_job_dir,
             {
                 "artifact_id": envelope["artifact_id"],
-                "artifact_type": artifact_type,
+                "artifact_type": envelope["artifact_type"],
                 "created_at": envelope["created_at"],
                 "path": str(path),
-                "payload_sha256": payload_sha256,
-                "artifact_sha256": artifact_sha256,
+                "payload_sha256": envelope["payload_sha256"],
+                "artifact_sha256": sha256_file(path),
             },
         )
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import csv
+import json
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from ..errors import BatchError, PatchdiffError
+from ..utils.time import now_iso
+from . import pipeline
+
+MANIFEST_FIELDS = ("a", "b", "out", "tag")
+# Per-row overrides accepted in a manifest; anything else falls back to the batch flags.
+_RUN_OPTIONS = ("arch", "backend", "top", "timeout", "provider", "model", "max_rounds", "format")
+
+
+def load_manifest(path: Path) -> list[dict]:
+    if not path.exists():
+        raise BatchError(f"manifest not found: {path}")
+    if path.suffix.lower() == ".csv":
+        with path.open("r", encoding="utf-8", newline="") as f:
+            rows = [dict(row) for row in csv.DictReader(f)]
+    else:
+        rows = []
+        for line_no, line in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise BatchError(f"invalid manifest line {line_no}: {e}")
+            if not isinstance(row, dict):
+                raise BatchError(f"invalid manifest line {line_no}: expected an object")
+            rows.append(row)
+    items: list[dict] = []
+    for idx, row in enumerate(rows):
+        missing = [k for k in ("a", "b", "out") if not row.get(k)]
+        if missing:
+            raise BatchError(f"manifest row {idx} missing fields: {', '.join(missing)}")
+        item = {k: row.get(k) or None for k in MANIFEST_FIELDS}
+        for key in _RUN_OPTIONS:
+            if row.get(key) not in (None, ""):
+                item[key] = row[key]
+        items.append(item)
+    return items
+
+
+def _run_args(item: dict, defaults: dict) -> Namespace:
+    values = {key: defaults.get(key) for key in _RUN_OPTIONS}
+    values.update({k: v for k, v in item.items() if k in _RUN_OPTIONS})
+    for key in ("top", "timeout", "max_rounds"):
+        if values.get(key) is not None:
+            values[key] = int(values[key])
+    if values.get("timeout") is None:
+        values["timeout"] = 90
+    return Namespace(a=item["a"], b=item["b"], out=item["out"], tag=item.get("tag"), job=None, **values)
+
+
+def _run_item(cfg: dict, index: int, item: dict, defaults: dict) -> dict:
+    start = time.perf_counter()
+    entry = {
+        "index": index,
+        "a": item["a"],
+        "b": item["b"],
+        "out": item["out"],
+        "tag": item.get("tag"),
+        "status": "success",
+        "exit_code": 0,
+        "error": None,
+    }
+    try:
+        pipeline.run_all(cfg, _run_args(item, defaults))
+    except PatchdiffError as e:
+        entry.update({"status": "error", "exit_code": e.code, "error": e.message})
+    except Exception as e:  # noqa: BLE001
+        entry.update({"status": "error", "exit_code": 1, "error": str(e)})
+    entry["duration_seconds"] = round(time.perf_counter() - start, 6)
+    return entry
+
+
+def run(cfg: dict, args) -> dict:
+    manifest_path = Path(args.manifest)
+    items = load_manifest(manifest_path)
+    workers = max(1, int(args.workers or cfg.get("batch", {}).get("workers", 1)))
+    defaults = {key: getattr(args, key, None) for key in _RUN_OPTIONS}
+    summary_path = Path(args.summary) if args.summary else manifest_path.with_name("batch_summary.json")
+
+    start = time.perf_counter()
+    results: list[dict] = []
+    if workers == 1 or len(items) <= 1:
+        results = [_run_item(cfg, idx, item, defaults) for idx, item in enumerate(items)]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(items))) as pool:
+            futures = [pool.submit(_run_item, cfg, idx, item, defaults) for idx, item in enumerate(items)]
+            for idx, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:  # noqa: BLE001
+                    # A worker crash surfaces here; keep collecting the remaining rows.
+                    results.append(
+                        {
+                            "index": idx,
+                            **{k: items[idx].get(k) for k in MANIFEST_FIELDS},
+                            "status": "error",
+                            "exit_code": 1,
+                            "error": f"worker failed: {e}",
+                            "duration_seconds": None,
+                        }
+                    )
+
+    failed = [r for r in results if r["status"] != "success"]
+    summary = {
+        "created_at": now_iso(),
+        "manifest": str(manifest_path),
+        "workers": workers,
+        "total": len(results),
+        "succeeded": len(results) - len(failed),
+        "failed": len(failed),
+        "wall_seconds": round(time.perf_counter() - start, 6),
+        "jobs": results,
+    }
+    summary_path.parent.mkdir(parents=True, exist_ok=True)
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    if failed:
+        raise BatchError(
+            f"{len(failed)} of {len(results)} batch job(s) failed",
+            details={"summary": str(summary_path), "failed_indexes": [r["index"] for r in failed]},
+        )
+    return summary
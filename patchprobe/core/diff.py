@@ -4,8 +4,9 @@ from .job import load_job
 from ..backends.diff import get_backend
 
 
-def run(cfg: dict, args) -> None:
+def run(cfg: dict, args) -> dict | None:
     job = load_job(args.job)
     backend_name = args.backend or cfg.get("backends", {}).get("diff", "diaphora")
     backend = get_backend(backend_name)
-    backend.run(job, args.job)
+    workers = getattr(args, "workers", None) or cfg.get("diff", {}).get("workers", 1)
+    return backend.run(job, args.job, workers=max(1, int(workers)))
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Protocol
+
+from .job import BinaryInfo, Job, resolve_binary_path
+from .normalize import load_normalized
+from .pairs import PairRow
+from ..backends.diff.callgraph import call_targets
+from ..backends.diff.fingerprint import Fingerprinter, x86_instructions
+from ..constants import VERSION
+from ..storage.cache import JsonCache, cache_key, get_cache
+from ..utils.mapping import map_file
+
+# Conditional branches: decoded x86/x64 Jcc rel8 (70-7F) and rel32 (0F 80-8F);
+# arm64 B.cond, CBZ/CBNZ and TBZ/TBNZ by their top byte.
+_X86_JCC = frozenset([*range(0x70, 0x80), *range(0x0F80, 0x0F90)])
+_ARM64_COND_TOP = frozenset((0x54, 0x34, 0x35, 0xB4, 0xB5, 0x36, 0x37, 0xB6, 0xB7))
+
+
+@dataclass(frozen=True)
+class Feature:
+    """One scored column. `weight` is the default for `ranking.weights.<name>`."""
+
+    name: str
+    weight: float = 0.0
+    # Scaled to min(value, saturate) / saturate before weighting, so large deltas stop adding score.
+    saturate: float | None = None
+    signal: str | None = None
+    integral: bool = False
+
+    def scale(self, value: float) -> float:
+        return min(value, self.saturate) / self.saturate if self.saturate else value
+
+    def evidence(self, value: float) -> str:
+        return str(int(value)) if self.integral else str(value)
+
+
+class FeatureExtractor(Protocol):
+    name: str
+    version: str
+    features: tuple[Feature, ...]
+
+    def extract(self, row: PairRow, context: "FeatureContext") -> tuple[float, ...]:
+        ...
+
+
+class FunctionFeatureExtractor(Protocol):
+    """An extractor whose per-function measurements are cached; `combine` turns the A/B measurements into features."""
+
+    name: str
+    version: str
+    features: tuple[Feature, ...]
+
+    def measure(self, code: bytes, arch: str) -> dict[str, float]:
+        ...
+
+    def combine(self, measured_a: dict[str, float] | None, measured_b: dict[str, float] | None) -> tuple[float, ...]:
+        ...
+
+
+class DiffFeatures:
+    """Severity, match score and evidence count straight from the diff records."""
+
+    name = "diff"
+    version = "1"
+    features = (
+        Feature("severity_hint", weight=0.6),
+        Feature("match_score", weight=0.3),
+        Feature("evidence", weight=0.1, saturate=5.0, signal="evidence_count", integral=True),
+    )
+
+    def extract(self, row: PairRow, context: "FeatureContext") -> tuple[float, ...]:
+        return (row.severity_hint, row.match_score, row.evidence_count)
+
+
+class CodeFeatures:
+    """Size, conditional-branch and direct-call deltas between the A and B function bytes."""
+
+    name = "code"
+    version = "2"
+    features = (
+        Feature("size_delta", saturate=1.0),
+        Feature("branch_delta", saturate=8.0, integral=True),
+        Feature("call_delta", saturate=8.0, integral=True),
+    )
+
+    def measure(self, code: bytes, arch: str) -> dict[str, float]:
+        if arch in {"x86", "x64"}:
+            branches = calls = 0
+            for _, op, length, _ in x86_instructions(code, arch == "x64"):
+                branches += op in _X86_JCC
+                calls += op == 0xE8 and length >= 5
+            return {"size": len(code), "branches": branches, "calls": calls}
+        if arch == "arm64":
+            branches = sum(1 for top in code[3::4] if top in _ARM64_COND_TOP)
+        else:
+            branches = 0
+        return {"size": len(code), "branches": branches, "calls": len(call_targets(code, 0, arch))}
+
+    def combine(self, measured_a: dict[str, float] | None, measured_b: dict[str, float] | None) -> tuple[float, ...]:
+        if measured_a is None or measured_b is None:
+            return (0.0, 0, 0)
+        size_delta = abs(measured_b["size"] - measured_a["size"]) / max(measured_a["size"], 1)
+        return (
+            size_delta,
+            abs(measured_b["branches"] - measured_a["branches"]),
+            abs(measured_b["calls"] - measured_a["calls"]),
+        )
+
+
+_EXTRACTORS: dict[str, FeatureExtractor | FunctionFeatureExtractor] = {}
+
+
+def register_extractor(extractor: FeatureExtractor | FunctionFeatureExtractor) -> None:
+    _EXTRACTORS[extractor.name] = extractor
+
+
+def get_extractor(name: str) -> FeatureExtractor | FunctionFeatureExtractor:
+    try:
+        return _EXTRACTORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown rank feature extractor: {name}") from None
+
+
+def select_extractors(weights: dict) -> list[FeatureExtractor | FunctionFeatureExtractor]:
+    """The diff extractor plus every extractor with a feature weighted non-zero, in registration order."""
+    return [
+        extractor
+        for extractor in _EXTRACTORS.values()
+        if extractor.name == DiffFeatures.name
+        or any(float(weights.get(f.name, f.weight)) != 0.0 for f in extractor.features)
+    ]
+
+
+register_extractor(DiffFeatures())
+register_extractor(CodeFeatures())
+
+
+@dataclass
+class _BinaryFeatures:
+    binary: BinaryInfo
+    path: str
+    summary: dict | None
+    fingerprinter: Fingerprinter | None = None
+    entries: dict[str, dict] = field(default_factory=dict)
+    dirty: set[str] = field(default_factory=set)
+
+
+class FeatureContext:
+    """Feature vectors for one job's pairs.
+
+    Per-function measurements live in one `features` cache entry per (binary sha256, format, arch, extractor, version),
+    holding a map from "<address hex>:<size>" to measurements; only functions missing from it are measured.
+    """
+
+    def __init__(self, job: Job, job_dir: str, extractors: list, cfg: dict) -> None:
+        self.job = job
+        self.extractors = extractors
+        self.features: list[Feature] = [f for extractor in extractors for f in extractor.features]
+        self.computed = 0
+        self.cached = 0
+        self.cache: JsonCache | None = None
+        self._binaries: dict[str, _BinaryFeatures] = {}
+        if any(hasattr(extractor, "measure") for extractor in extractors):
+            self.cache = get_cache(cfg, "features")
+            normalized = load_normalized(job_dir)
+            # Both sides of a self-diff share one state, so its entries are loaded and written once.
+            # Two slices of one fat Mach-O share the sha but not the arch, so they stay separate.
+            by_binary: dict[tuple[str, str, str], _BinaryFeatures] = {}
+            for side, binary in (("a", job.binary_a), ("b", job.binary_b)):
+                self._binaries[side] = by_binary.setdefault(
+                    (binary.sha256, binary.file_type, binary.arch),
+                    _BinaryFeatures(
+                        binary=binary,
+                        path=resolve_binary_path(job, binary),
+                        summary=normalized.get(f"binary_{side}") if normalized is not None else None,
+                    ),
+                )
+        self._stack = ExitStack()
+
+    def __enter__(self) -> "FeatureContext":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def vector(self, row: PairRow) -> tuple[float, ...]:
+        values: tuple[float, ...] = ()
+        for extractor in self.extractors:
+            if hasattr(extractor, "measure"):
+                values += extractor.combine(
+                    self._measured(extractor, "a", row.address_a, row.size_a),
+                    self._measured(extractor, "b", row.address_b, row.size_b),
+                )
+            else:
+                values += extractor.extract(row, self)
+        return values
+
+    def vectors(self, rows: Iterable[PairRow]) -> Iterator[tuple[str, tuple[float, ...]]]:
+        """`(func_pair_id, vector)` per row; with only one plain extractor its `extract` is called directly."""
+        if len(self.extractors) == 1 and not hasattr(self.extractors[0], "measure"):
+            extract = self.extractors[0].extract
+            for row in rows:
+                yield row.func_pair_id, extract(row, self)
+            return
+        vector = self.vector
+        for row in rows:
+            yield row.func_pair_id, vector(row)
+
+    def _measured(
+        self, extractor: FunctionFeatureExtractor, side: str, address: int | None, size: int
+    ) -> dict[str, float] | None:
+        if address is None:
+            return None
+        state = self._binaries[side]
+        entries = state.entries.get(extractor.name)
+        if entries is None:
+            cached = self.cache.get(self._key(state, extractor)) if self.cache is not None else None
+            entries = state.entries[extractor.name] = cached if isinstance(cached, dict) else {}
+        # Function ids carry the side they were diffed on; the bytes only depend on where they are.
+        entry = f"{address:x}:{size}"
+        if entry in entries:
+            self.cached += 1
+            return entries[entry]
+        fingerprinter = self._fingerprinter(state)
+        code = fingerprinter.function_bytes(address, size) if fingerprinter is not None else None
+        if code is None:
+            return None
+        measured = entries[entry] = extractor.measure(code, fingerprinter.arch)
+        state.dirty.add(extractor.name)
+        self.computed += 1
+        return measured
+
+    def _fingerprinter(self, state: _BinaryFeatures) -> Fingerprinter | None:
+        if state.fingerprinter is None and state.summary is not None:
+            data = self._stack.enter_context(map_file(Path(state.path)))
+            state.fingerprinter = Fingerprinter(data, state.summary)
+        return state.fingerprinter
+
+    def _key(self, state: _BinaryFeatures, extractor) -> str:
+        binary = state.binary
+        return cache_key(
+            binary.sha256, VERSION, binary.file_type, binary.arch, extractor.name, extractor.version, "address"
+        )
+
+    def close(self) -> None:
+        states = list({id(state): state for state in self._binaries.values()}.values())
+        if self.cache is not None:
+            for state in states:
+                for extractor in self.extractors:
+                    if extractor.name in state.dirty:
+                        self.cache.put(self._key(state, extractor), state.entries[extractor.name])
+                state.dirty.clear()
+            self.cache.evict()
+        for state in states:
+            state.fingerprinter = None
+        self._stack.close()
+
+    def stats(self) -> dict:
+        return {
+            "extractors": [extractor.name for extractor in self.extractors],
+            "computed": self.computed,
+            "cached": self.cached,
+            "cache": self.cache.stats() if self.cache is not None else None,
+        }
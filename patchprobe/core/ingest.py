@@ -4,9 +4,11 @@ import json
 from pathlib import Path
 
 from ..errors import FileNotFoundErrorPatch, IngestError
-from ..utils.hashing import sha256_file
-from ..utils.filetype import detect_filetype_and_arch
-from ..utils.buildid import extract_build_id
+from ..formats import macho
+from ..storage.object_store import binary_key, binary_metadata_key, get_object_store
+from ..utils.concurrency import map_timed
+from ..utils.inspection import BinaryInspection, inspect_binary
+from ..utils.mapping import map_file
 from ..utils.time import now_iso
 from .artifacts import write_artifact
 from .job import BinaryInfo, create_job
@@ -17,54 +19,99 @@ def _write_metadata(path: Path, data: dict) -> None:
     path.write_text(json.dumps(data, indent=2), encoding="utf-8")
 
 
-def run(cfg: dict, args) -> None:
+def _metadata(side: str, info: BinaryInspection) -> dict:
+    return {
+        "binary": side,
+        "path": info.path,
+        "sha256": info.sha256,
+        "file_type": info.file_type,
+        "arch": info.arch,
+        "build_id": info.build_id,
+        "size_bytes": info.size_bytes,
+        "created_at": now_iso(),
+    }
+
+
+def _store_binary(cfg: dict, path: Path, info: BinaryInspection) -> tuple[str | None, str | None]:
+    storage = cfg.get("storage", {}) if isinstance(cfg, dict) else {}
+    if not storage.get("store_binaries", True):
+        return None, None
+    store = get_object_store(cfg)
+    key = binary_key(info.sha256)
+    _, method = store.put_file(key, path)
+    meta_key = binary_metadata_key(info.sha256)
+    if not store.exists(meta_key):
+        meta = {
+            "sha256": info.sha256,
+            "file_type": info.file_type,
+            "arch": info.arch,
+            "build_id": info.build_id,
+            "size_bytes": info.size_bytes,
+            "original_path": info.path,
+        }
+        store.put(meta_key, json.dumps(meta, indent=2).encode("utf-8"))
+    return key, method
+
+
+def _check_arch(path: Path, info: BinaryInspection, arch: str | None) -> None:
+    if arch is None or info.arch == arch:
+        return
+    available = [info.arch]
+    if info.file_type == "Mach-O":
+        with map_file(path) as data:
+            available = macho.list_arches(data)
+    raise IngestError(f"no {arch} slice in {path}", details={"available_arches": available})
+
+
+def _workers(cfg: dict) -> int:
+    ingest_cfg = cfg.get("ingest", {}) if isinstance(cfg, dict) else {}
+    return int(ingest_cfg.get("workers", 2))
+
+
+def run(cfg: dict, args) -> dict:
     a_path = Path(args.a)
     b_path = Path(args.b)
     if not a_path.exists():
         raise FileNotFoundErrorPatch(f"binary A not found: {a_path}")
     if not b_path.exists():
         raise FileNotFoundErrorPatch(f"binary B not found: {b_path}")
+    arch = getattr(args, "arch", None)
+
+    def ingest_one(path: Path) -> tuple[BinaryInspection, str | None, str | None]:
+        try:
+            info = inspect_binary(path, arch)
+        except Exception as e:
+            raise IngestError(f"ingest failed: {e}")
+        _check_arch(path, info, arch)
+        try:
+            key, method = _store_binary(cfg, path, info)
+        except OSError as e:
+            raise IngestError(f"storing binaries failed: {e}")
+        return info, key, method
 
-    try:
-        a_sha = sha256_file(a_path)
-        b_sha = sha256_file(b_path)
-        a_type, a_arch = detect_filetype_and_arch(a_path)
-        b_type, b_arch = detect_filetype_and_arch(b_path)
-    except Exception as e:
-        raise IngestError(f"ingest failed: {e}")
+    results, timing = map_timed(ingest_one, [a_path, b_path], max_workers=_workers(cfg))
+    (info_a, key_a, store_method_a), (info_b, key_b, store_method_b) = results
 
-    binary_a = BinaryInfo(path=str(a_path), sha256=a_sha, file_type=a_type, arch=a_arch)
-    binary_b = BinaryInfo(path=str(b_path), sha256=b_sha, file_type=b_type, arch=b_arch)
+    binary_a = BinaryInfo(
+        path=str(a_path), sha256=info_a.sha256, file_type=info_a.file_type, arch=info_a.arch, object_key=key_a
+    )
+    binary_b = BinaryInfo(
+        path=str(b_path), sha256=info_b.sha256, file_type=info_b.file_type, arch=info_b.arch, object_key=key_b
+    )
 
     create_job(args.out, args.tag, binary_a, binary_b, cfg)
 
     ingest_dir = Path(args.out) / "artifacts" / "ingest"
-    metadata_a = {
-        "binary": "A",
-        "path": str(a_path),
-        "sha256": a_sha,
-        "file_type": a_type,
-        "arch": a_arch,
-        "build_id": extract_build_id(a_path, a_type),
-        "size_bytes": a_path.stat().st_size,
-        "created_at": now_iso(),
-    }
-    metadata_b = {
-        "binary": "B",
-        "path": str(b_path),
-        "sha256": b_sha,
-        "file_type": b_type,
-        "arch": b_arch,
-        "build_id": extract_build_id(b_path, b_type),
-        "size_bytes": b_path.stat().st_size,
-        "created_at": now_iso(),
-    }
+    metadata_a = _metadata("A", info_a)
+    metadata_a.update({"object_key": key_a, "store_method": store_method_a})
+    metadata_b = _metadata("B", info_b)
+    metadata_b.update({"object_key": key_b, "store_method": store_method_b})
     _write_metadata(ingest_dir / "metadata_a.json", metadata_a)
     _write_metadata(ingest_dir / "metadata_b.json", metadata_b)
 
     inputs = {
-        "binary_a_sha256": a_sha,
-        "binary_b_sha256": b_sha,
+        "binary_a_sha256": info_a.sha256,
+        "binary_b_sha256": info_b.sha256,
         "upstream_artifact_hashes": [],
     }
     write_artifact(
@@ -81,3 +128,4 @@ def run(cfg: dict, args) -> None:
         metadata_b,
         job_dir=Path(args.out),
     )
+    return {"parallel": timing}
@@ -5,6 +5,7 @@ import uuid
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+from ..storage.object_store import get_object_store
 from ..utils.time import now_iso
 from ..utils.jsonschema import validate_data
 
@@ -17,6 +18,7 @@ class BinaryInfo:
     sha256: str
     file_type: str
     arch: str
+    object_key: str | None = None
 
 
 @dataclass
@@ -59,3 +61,11 @@ def load_job(job_dir: str) -> Job:
         binary_b=binary_b,
         config=data.get("config", {}),
     )
+
+
+def resolve_binary_path(job: Job, binary: BinaryInfo) -> str:
+    if binary.object_key:
+        store = get_object_store(job.config)
+        if store.exists(binary.object_key):
+            return store.local_path(binary.object_key)
+    return binary.path
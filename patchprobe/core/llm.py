@@ -6,6 +6,8 @@ from pathlib import Path
 from .artifacts import write_artifact
 from .packet import build_packet
 from .job import load_job
+from .pairs import load_pair_table
+from .records import DIFF_RESULTS, load_records_by_id
 from ..backends.llm import get_provider
 from ..utils.time import now_iso
 
@@ -76,18 +78,14 @@ def run(cfg: dict, args) -> None:
     candidates = ranked.get("candidates", []) if isinstance(ranked, dict) else []
     if not isinstance(candidates, list):
         candidates = []
-    function_pairs = _load_json(Path(args.job) / "artifacts" / "diff" / "function_pairs.json", default=[])
-    if not isinstance(function_pairs, list):
-        function_pairs = []
-    diff_results = _load_json(Path(args.job) / "artifacts" / "diff" / "diff_results.json", default=[])
-    if not isinstance(diff_results, list):
-        diff_results = []
     decompile_items = _load_json(Path(args.job) / "artifacts" / "decompile" / "decompile_artifacts.json", default=[])
     if not isinstance(decompile_items, list):
         decompile_items = []
 
-    pairs_by_id = {p.get("func_pair_id"): p for p in function_pairs if isinstance(p, dict)}
-    diffs_by_id = {d.get("func_pair_id"): d for d in diff_results if isinstance(d, dict)}
+    diff_dir = Path(args.job) / "artifacts" / "diff"
+    wanted = [c.get("func_pair_id") for c in candidates if isinstance(c, dict)]
+    pairs = load_pair_table(diff_dir, wanted)
+    diffs_by_id = load_records_by_id(diff_dir, DIFF_RESULTS, "func_pair_id", wanted)
     decompile_by_func_id = {d.get("func_id"): d for d in decompile_items if isinstance(d, dict)}
     analyses: list[dict] = []
     packets: list[dict] = []
@@ -98,13 +96,11 @@ def run(cfg: dict, args) -> None:
         func_pair_id = candidate.get("func_pair_id")
         if not isinstance(func_pair_id, str):
             continue
-        pair = pairs_by_id.get(func_pair_id, {})
-        func_id_a = pair.get("func_id_a")
-        func_id_b = pair.get("func_id_b")
-        if not isinstance(func_id_a, str) or not isinstance(func_id_b, str):
+        row = pairs.get(func_pair_id)
+        if row is None or not row.func_id_a or not row.func_id_b:
             continue
-        decomp_a = decompile_by_func_id.get(func_id_a, {})
-        decomp_b = decompile_by_func_id.get(func_id_b, {})
+        decomp_a = decompile_by_func_id.get(row.func_id_a, {})
+        decomp_b = decompile_by_func_id.get(row.func_id_b, {})
         if not isinstance(decomp_a, dict) or not isinstance(decomp_b, dict):
             continue
         diff = diffs_by_id.get(func_pair_id, {"func_pair_id": func_pair_id, "change_summary": {}, "severity_hint": 0.0})
@@ -1,146 +1,248 @@
 from __future__ import annotations
 
+import hashlib
 import json
+from bisect import bisect_right
 from pathlib import Path
 
 from .artifacts import write_artifact
-from .job import load_job
+from .job import BinaryInfo, load_job, resolve_binary_path
+from ..constants import VERSION
+from ..formats import elf, macho, pe
+from ..storage.cache import cache_key, get_cache
+from ..utils.concurrency import map_timed
+from ..utils.mapping import Buffer, map_file
 from ..utils.time import now_iso
 
+SECTION_STATES = ("identical", "resized", "content_changed", "added", "removed")
+# Bump whenever the summary layout or any parser feeding it changes; it is part of the cache key.
+NORMALIZE_PARSER_VERSION = "3"
 
-def _safe_decode_name(raw: bytes) -> str:
-    return raw.split(b"\x00", 1)[0].decode("ascii", errors="replace").strip()
 
-
-def _parse_pe_sections(data: bytes) -> list[dict]:
-    if len(data) < 0x40:
-        return []
-    pe_offset = int.from_bytes(data[0x3C:0x40], "little")
-    if pe_offset + 24 > len(data):
+def _parse_pe_sections(data: Buffer) -> list[dict]:
+    hdr = pe.parse_header(data)
+    if hdr is None:
         return []
-    section_count = int.from_bytes(data[pe_offset + 6:pe_offset + 8], "little")
-    opt_header_size = int.from_bytes(data[pe_offset + 20:pe_offset + 22], "little")
-    section_table = pe_offset + 24 + opt_header_size
-    sections: list[dict] = []
-    for idx in range(section_count):
-        off = section_table + (40 * idx)
-        if off + 40 > len(data):
-            break
-        sections.append(
-            {
-                "name": _safe_decode_name(data[off:off + 8]),
-                "virtual_size": int.from_bytes(data[off + 8:off + 12], "little"),
-                "virtual_address": int.from_bytes(data[off + 12:off + 16], "little"),
-                "raw_size": int.from_bytes(data[off + 16:off + 20], "little"),
-                "raw_offset": int.from_bytes(data[off + 20:off + 24], "little"),
-            }
-        )
-    return sections
-
+    return [
+        {
+            "name": sec.name,
+            "virtual_size": sec.virtual_size,
+            "virtual_address": sec.virtual_address,
+            "raw_size": sec.raw_size,
+            "raw_offset": sec.raw_offset,
+            "address": hdr.image_base + sec.virtual_address,
+        }
+        for sec in pe.iter_sections(data, hdr)
+    ]
 
-def _parse_elf_sections(data: bytes) -> list[dict]:
-    if len(data) < 0x40:
-        return []
-    ei_class = data[4]
-    ei_data = data[5]
-    endian = "little" if ei_data == 1 else "big"
-    if ei_class == 1:
-        e_shoff = int.from_bytes(data[32:36], endian)
-        e_shentsize = int.from_bytes(data[46:48], endian)
-        e_shnum = int.from_bytes(data[48:50], endian)
-        e_shstrndx = int.from_bytes(data[50:52], endian)
-        name_off = 0
-        type_off = 4
-        section_data_off = 16
-        section_data_size = 20
-    elif ei_class == 2:
-        e_shoff = int.from_bytes(data[40:48], endian)
-        e_shentsize = int.from_bytes(data[58:60], endian)
-        e_shnum = int.from_bytes(data[60:62], endian)
-        e_shstrndx = int.from_bytes(data[62:64], endian)
-        name_off = 0
-        type_off = 4
-        section_data_off = 24
-        section_data_size = 32
-    else:
-        return []
 
-    if e_shoff <= 0 or e_shentsize <= 0 or e_shnum <= 0:
-        return []
-    if e_shoff + (e_shentsize * e_shnum) > len(data):
+def _parse_elf_sections(data: Buffer) -> list[dict]:
+    hdr = elf.parse_header(data)
+    if hdr is None or hdr.e_shnum <= 0 or hdr.e_shstrndx >= hdr.e_shnum:
         return []
-    if e_shstrndx >= e_shnum:
+    shstr_hdr = elf.section_header(data, hdr, hdr.e_shstrndx)
+    if shstr_hdr is None or shstr_hdr.sh_offset + shstr_hdr.sh_size > len(data):
         return []
-
-    def section_header(index: int) -> bytes:
-        start = e_shoff + (index * e_shentsize)
-        return data[start:start + e_shentsize]
-
-    shstr_hdr = section_header(e_shstrndx)
-    shstr_off = int.from_bytes(shstr_hdr[section_data_off:section_data_off + (8 if ei_class == 2 else 4)], endian)
-    shstr_size = int.from_bytes(shstr_hdr[section_data_size:section_data_size + (8 if ei_class == 2 else 4)], endian)
-    if shstr_off + shstr_size > len(data):
-        return []
-    shstr = data[shstr_off:shstr_off + shstr_size]
-
-    def lookup_name(offset: int) -> str:
-        if offset >= len(shstr):
-            return ""
-        end = shstr.find(b"\x00", offset)
-        if end < 0:
-            end = len(shstr)
-        return shstr[offset:end].decode("ascii", errors="replace")
+    shstr_off = shstr_hdr.sh_offset
+    shstr_end = shstr_off + shstr_hdr.sh_size
+    read_name = elf.read_cstring
 
     sections: list[dict] = []
-    for idx in range(e_shnum):
-        hdr = section_header(idx)
-        sh_name = int.from_bytes(hdr[name_off:name_off + 4], endian)
-        sh_type = int.from_bytes(hdr[type_off:type_off + 4], endian)
-        sh_off = int.from_bytes(hdr[section_data_off:section_data_off + (8 if ei_class == 2 else 4)], endian)
-        sh_size = int.from_bytes(hdr[section_data_size:section_data_size + (8 if ei_class == 2 else 4)], endian)
+    for sh_name, sh_type, _flags, sh_addr, sh_off, sh_size, *_rest in elf.iter_section_fields(data, hdr):
         sections.append(
             {
-                "name": lookup_name(sh_name),
+                "name": read_name(data, shstr_off + sh_name, shstr_end),
                 "type": sh_type,
                 "offset": sh_off,
                 "size": sh_size,
+                "address": sh_addr,
             }
         )
+    if len(sections) != hdr.e_shnum:
+        return []
     return sections
 
 
-def _pe_security_directory_present(data: bytes) -> bool:
-    if len(data) < 0x40:
-        return False
-    pe_offset = int.from_bytes(data[0x3C:0x40], "little")
-    opt_offset = pe_offset + 24
-    if opt_offset + 2 > len(data):
-        return False
-    magic = int.from_bytes(data[opt_offset:opt_offset + 2], "little")
-    if magic == 0x10B:
-        data_dir_offset = opt_offset + 96
-    elif magic == 0x20B:
-        data_dir_offset = opt_offset + 112
-    else:
-        return False
-    security_dir = data_dir_offset + (8 * 4)
-    if security_dir + 8 > len(data):
+def _parse_macho_sections(data: Buffer, hdr: macho.MachHeader) -> list[dict]:
+    # Section offsets are slice-relative; record file offsets so hashing works on the whole mapping.
+    return [
+        {
+            "name": f"{sec.segment},{sec.name}",
+            "sectname": sec.name,
+            "segment": sec.segment,
+            "offset": hdr.base + sec.offset,
+            "size": sec.size,
+            "address": sec.addr,
+            "flags": sec.flags,
+            "zerofill": sec.zerofill,
+        }
+        for sec in macho.iter_sections(data, hdr)
+    ]
+
+
+def _pe_security_directory_present(data: Buffer) -> bool:
+    hdr = pe.parse_header(data)
+    if hdr is None:
         return False
-    security_size = int.from_bytes(data[security_dir + 4:security_dir + 8], "little")
+    _, security_size = pe.data_directory(hdr, pe.IMAGE_DIRECTORY_ENTRY_SECURITY)
     return security_size > 0
 
 
+def section_file_range(section: dict) -> tuple[int, int] | None:
+    if "raw_offset" in section:
+        return section["raw_offset"], section["raw_size"]
+    if section.get("zerofill") or section.get("type") == elf.SHT_NOBITS:
+        return None
+    return section.get("offset", 0), section.get("size", 0)
+
+
+def _hash_sections(data: Buffer, sections: list[dict]) -> None:
+    # Hash each section's bytes straight from the mapping; no section content is copied.
+    with memoryview(data) as view:
+        for section in sections:
+            span = section_file_range(section)
+            if span is None or span[1] <= 0 or span[0] + span[1] > len(view):
+                section["sha256"] = None
+                continue
+            with view[span[0]:span[0] + span[1]] as chunk:
+                section["sha256"] = hashlib.sha256(chunk).hexdigest()
+
+
+def _section_keys(sections: list[dict]) -> dict[str, dict]:
+    keyed: dict[str, dict] = {}
+    for section in sections:
+        name = section.get("name")
+        if not name:
+            continue
+        key = name
+        suffix = 1
+        while key in keyed:
+            suffix += 1
+            key = f"{name}#{suffix}"
+        keyed[key] = section
+    return keyed
+
+
+def _section_delta(sections_a: list[dict], sections_b: list[dict]) -> dict[str, str]:
+    by_name_a = _section_keys(sections_a)
+    by_name_b = _section_keys(sections_b)
+    delta: dict[str, str] = {}
+    for name in sorted(set(by_name_a) | set(by_name_b)):
+        sec_a = by_name_a.get(name)
+        sec_b = by_name_b.get(name)
+        if sec_a is None:
+            delta[name] = "added"
+        elif sec_b is None:
+            delta[name] = "removed"
+        elif _section_size(sec_a) != _section_size(sec_b):
+            delta[name] = "resized"
+        elif sec_a.get("sha256") != sec_b.get("sha256"):
+            delta[name] = "content_changed"
+        else:
+            delta[name] = "identical"
+    return delta
+
+
+def _section_size(section: dict) -> int:
+    if "raw_offset" in section:
+        return int(section.get("virtual_size") or section.get("raw_size") or 0)
+    return int(section.get("size", 0))
+
+
+class SectionStates:
+    """Maps function addresses on both sides to sections and their A/B delta state."""
+
+    def __init__(self, normalized: dict) -> None:
+        delta = normalized.get("delta", {}) if isinstance(normalized, dict) else {}
+        self.states: dict[str, str] = delta.get("sections", {}) if isinstance(delta, dict) else {}
+        self._a = self._intervals(normalized.get("binary_a", {}).get("sections", []))
+        self._b = self._intervals(normalized.get("binary_b", {}).get("sections", []))
+
+    @staticmethod
+    def _intervals(sections: list[dict]) -> tuple[list[int], list[tuple[int, int, str]]]:
+        spans = []
+        for key, section in _section_keys(sections).items():
+            start = int(section.get("address") or 0)
+            size = _section_size(section)
+            if start > 0 and size > 0:
+                spans.append((start, start + size, key))
+        spans.sort()
+        return [span[0] for span in spans], spans
+
+    @staticmethod
+    def _locate(index: tuple[list[int], list[tuple[int, int, str]]], address: int) -> tuple[int, str] | None:
+        starts, spans = index
+        pos = bisect_right(starts, address) - 1
+        if pos < 0:
+            return None
+        start, end, key = spans[pos]
+        if address >= end:
+            return None
+        return address - start, key
+
+    def identical_section(self, address_a: int, address_b: int) -> str | None:
+        """Return the section name when both addresses sit at the same offset of a byte-identical section."""
+        loc_a = self._locate(self._a, address_a)
+        loc_b = self._locate(self._b, address_b)
+        if loc_a is None or loc_b is None or loc_a != loc_b:
+            return None
+        if self.states.get(loc_a[1]) != "identical":
+            return None
+        return loc_a[1]
+
+    def section_state(self, address_b: int) -> tuple[str, str] | None:
+        loc_b = self._locate(self._b, address_b)
+        if loc_b is None:
+            return None
+        return loc_b[1], self.states.get(loc_b[1], "unknown")
+
+
+def load_normalized(job_dir: str) -> dict | None:
+    path = Path(job_dir) / "artifacts" / "normalize" / "normalized_metadata.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def load_section_states(job_dir: str) -> SectionStates | None:
+    normalized = load_normalized(job_dir)
+    if normalized is None:
+        return None
+    return SectionStates(normalized)
+
+
 def _summarize_binary(path: Path, file_type: str, arch: str, sha256: str) -> dict:
-    data = path.read_bytes()
+    with map_file(path) as data:
+        return _summarize_buffer(path, data, file_type, arch, sha256)
+
+
+def _summarize_buffer(path: Path, data: Buffer, file_type: str, arch: str, sha256: str) -> dict:
     sections: list[dict] = []
     has_signature = False
+    has_codeview = False
+    macho_info: dict = {}
     if file_type == "PE":
         sections = _parse_pe_sections(data)
         has_signature = _pe_security_directory_present(data)
+        has_codeview = pe.find_codeview_guid_age(data) is not None
     elif file_type == "ELF":
         sections = _parse_elf_sections(data)
+    elif file_type == "Mach-O":
+        hdr = macho.parse_slice(data, arch)
+        if hdr is not None:
+            sections = _parse_macho_sections(data, hdr)
+            symtab = macho.find_symtab(data, hdr)
+            commands = {cmd for cmd, _off, _size in macho.iter_load_commands(data, hdr)}
+            has_signature = macho.LC_CODE_SIGNATURE in commands
+            macho_info = {
+                "slice": {"arch": hdr.arch, "offset": hdr.base, "size": hdr.size, "fat": macho.is_fat(data)},
+                "function_start_count": len(macho.function_starts(data, hdr)),
+                "symbol_count": symtab.nsyms if symtab is not None else 0,
+            }
+    _hash_sections(data, sections)
 
     section_names = {s.get("name", "") for s in sections if s.get("name")}
+    section_names |= {s["sectname"] for s in sections if s.get("sectname")}
     import_section_names = {".idata", ".plt", ".plt.sec", ".got", ".got.plt", "__stubs", "__la_symbol_ptr"}
     export_section_names = {".edata", ".dynsym", "__nl_symbol_ptr"}
     symbol_section_names = {".symtab", ".dynsym", "__symbol_table"}
@@ -155,19 +257,37 @@ def _summarize_binary(path: Path, file_type: str, arch: str, sha256: str) -> dic
         "sections": sections,
         "has_imports_hint": bool(section_names & import_section_names),
         "has_exports_hint": bool(section_names & export_section_names),
-        "has_symbols_hint": bool(section_names & symbol_section_names),
-        "has_debug_info_hint": any(n.startswith(".debug") for n in section_names) or (b"RSDS" in data),
+        "has_symbols_hint": bool(section_names & symbol_section_names) or macho_info.get("symbol_count", 0) > 0,
+        "has_debug_info_hint": any(n.startswith((".debug", "__DWARF,")) for n in section_names) or has_codeview,
         "has_signature_hint": has_signature,
+        **macho_info,
     }
 
 
-def run(cfg: dict, args) -> None:
+def run(cfg: dict, args) -> dict:
     job = load_job(args.job)
     out_dir = Path(args.job) / "artifacts" / "normalize"
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    binary_a = _summarize_binary(Path(job.binary_a.path), job.binary_a.file_type, job.binary_a.arch, job.binary_a.sha256)
-    binary_b = _summarize_binary(Path(job.binary_b.path), job.binary_b.file_type, job.binary_b.arch, job.binary_b.sha256)
+    cache = get_cache(cfg, "normalize")
+
+    def summarize(binary: BinaryInfo) -> dict:
+        path = Path(resolve_binary_path(job, binary))
+        key = cache_key(binary.sha256, VERSION, NORMALIZE_PARSER_VERSION, binary.file_type, binary.arch)
+        cached = cache.get(key) if cache is not None else None
+        if isinstance(cached, dict):
+            return {**cached, "path": str(path)}
+        summary = _summarize_binary(path, binary.file_type, binary.arch, binary.sha256)
+        if cache is not None:
+            cache.put(key, summary)
+        return summary
+
+    workers = int((cfg.get("normalize", {}) if isinstance(cfg, dict) else {}).get("workers", 2))
+    (binary_a, binary_b), timing = map_timed(summarize, [job.binary_a, job.binary_b], max_workers=workers)
+    section_delta = _section_delta(binary_a["sections"], binary_b["sections"])
+    section_summary = {state: 0 for state in SECTION_STATES}
+    for state in section_delta.values():
+        section_summary[state] += 1
     normalized = {
         "job_id": job.job_id,
         "created_at": now_iso(),
@@ -176,6 +296,8 @@ def run(cfg: dict, args) -> None:
         "delta": {
             "size_bytes": binary_b["size_bytes"] - binary_a["size_bytes"],
             "section_count": binary_b["section_count"] - binary_a["section_count"],
+            "sections": section_delta,
+            "section_summary": section_summary,
         },
     }
     (out_dir / "normalized_metadata.json").write_text(json.dumps(normalized, indent=2), encoding="utf-8")
@@ -190,3 +312,8 @@ def run(cfg: dict, args) -> None:
         normalized,
         job_dir=Path(args.job),
     )
+    details = {"parallel": timing, "section_summary": section_summary}
+    if cache is not None:
+        cache.evict()
+        details["cache"] = cache.stats()
+    return details
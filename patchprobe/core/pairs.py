@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .records import FUNCTION_PAIRS, iter_pair_results, iter_records
+
+
+@dataclass(slots=True)
+class PairRow:
+    func_pair_id: str
+    func_id_a: str
+    func_id_b: str
+    symbol_name: str
+    symbol_name_a: str
+    address_a: int | None
+    address_b: int | None
+    match_score: float
+    status: str
+    evidence_count: int
+    severity_hint: float = 0.0
+    unchanged: bool = False
+    size_a: int = 0
+    size_b: int = 0
+
+    @classmethod
+    def from_record(cls, pair: dict, diff_result: dict | None = None) -> "PairRow | None":
+        func_pair_id = pair.get("func_pair_id")
+        if not isinstance(func_pair_id, str) or not func_pair_id:
+            return None
+        evidence = pair.get("evidence", [])
+        if not isinstance(evidence, list):
+            evidence = []
+        metadata = pair.get("metadata")
+        if not isinstance(metadata, dict):
+            metadata = {}
+        # Diff writes names and addresses into metadata; artifacts from older runs only carry them as evidence.
+        parsed = metadata if "symbol_name" in metadata else _parse_evidence(evidence)
+        symbol_name = str(parsed.get("symbol_name") or "")
+        change_summary = (diff_result or {}).get("change_summary", {})
+        return cls(
+            func_pair_id=func_pair_id,
+            func_id_a=str(pair.get("func_id_a") or ""),
+            func_id_b=str(pair.get("func_id_b") or ""),
+            symbol_name=sys.intern(symbol_name),
+            symbol_name_a=sys.intern(str(parsed.get("symbol_name_a") or symbol_name)),
+            address_a=_address(parsed.get("address_a")),
+            address_b=_address(parsed.get("address_b")),
+            match_score=float(pair.get("match_score", 0.0)),
+            status=sys.intern(str(pair.get("status", ""))),
+            evidence_count=len(evidence),
+            severity_hint=float((diff_result or {}).get("severity_hint", 0.0)),
+            unchanged=isinstance(change_summary, dict) and change_summary.get("unchanged") is True,
+            size_a=_size(metadata.get("size_a")),
+            size_b=_size(metadata.get("size_b")),
+        )
+
+
+class PairTable:
+    """Function pairs of one job, loaded once per stage and looked up by func_pair_id."""
+
+    __slots__ = ("rows", "_index")
+
+    def __init__(self, rows: list[PairRow]) -> None:
+        self.rows = rows
+        self._index = {row.func_pair_id: idx for idx, row in enumerate(rows)}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[PairRow]:
+        return iter(self.rows)
+
+    def get(self, func_pair_id: str) -> PairRow | None:
+        idx = self._index.get(func_pair_id)
+        return self.rows[idx] if idx is not None else None
+
+
+def iter_pair_rows(diff_dir: Path) -> Iterator[PairRow]:
+    """Stream pairs joined with their diff results."""
+    for pair, diff_result in iter_pair_results(diff_dir):
+        row = PairRow.from_record(pair, diff_result)
+        if row is not None:
+            yield row
+
+
+def load_pair_table(diff_dir: Path, wanted: Iterable[str] | None = None) -> PairTable:
+    keep = set(wanted) if wanted is not None else None
+    rows: list[PairRow] = []
+    for pair in iter_records(diff_dir, FUNCTION_PAIRS):
+        if keep is not None and pair.get("func_pair_id") not in keep:
+            continue
+        row = PairRow.from_record(pair)
+        if row is not None:
+            rows.append(row)
+    return PairTable(rows)
+
+
+def _parse_evidence(evidence: list) -> dict:
+    parsed: dict = {}
+    for item in evidence:
+        if not isinstance(item, str) or "=" not in item:
+            continue
+        key, value = item.split("=", 1)
+        if key in {"symbol_name", "symbol_name_a"}:
+            parsed.setdefault(key, value)
+        elif key in {"addr_a", "addr_b"}:
+            parsed.setdefault(f"address_{key[-1]}", value)
+    return parsed
+
+
+def _address(value: object) -> int | None:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value, 0)
+        except ValueError:
+            return None
+    return None
+
+
+def _size(value: object) -> int:
+    return value if isinstance(value, int) and value > 0 else 0
@@ -19,9 +19,9 @@ def _run_stage(stage: str, fn, cfg: dict, args) -> None:
     if job_dir:
         append_audit_entry(job_dir, stage, "start")
     try:
-        fn(cfg, args)
+        details = fn(cfg, args)
         if job_dir:
-            append_audit_entry(job_dir, stage, "success")
+            append_audit_entry(job_dir, stage, "success", details if isinstance(details, dict) else None)
     except Exception as e:  # noqa: BLE001
         if job_dir:
             append_audit_entry(job_dir, stage, "error", {"error": str(e)})
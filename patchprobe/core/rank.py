@@ -1,37 +1,111 @@
 from __future__ import annotations
 
+import heapq
 import json
+from array import array
 from pathlib import Path
+from typing import Iterable
 
 from .artifacts import write_artifact
+from .features import Feature, FeatureContext, select_extractors
 from .job import load_job
+from .pairs import iter_pair_rows
 from ..utils.time import now_iso
 
+try:
+    import numpy as np
+except ImportError:  # optional: pip install patchprobe[fast]
+    np = None
 
-def _load_json(path: Path, default: object) -> object:
-    if not path.exists():
-        return default
-    return json.loads(path.read_text(encoding="utf-8"))
+# Scores up to 1e-6 apart can round to the same key, and dot-product scores may differ from the scalar sum
+# in the last bits, so the shortlist reaches this far below the top_n-th score.
+_SHORTLIST_MARGIN = 2e-6
 
+Vector = tuple[float, ...]
 
-def _score_candidate(function_pair: dict, diff_result: dict, weights: dict) -> tuple[float, list[dict]]:
-    severity = float(diff_result.get("severity_hint", 0.0))
-    match = float(function_pair.get("match_score", 0.0))
-    evidence_count = len(function_pair.get("evidence", []))
-    evidence_score = min(evidence_count, 5) / 5.0
-    w_severity = float(weights.get("severity_hint", 0.6))
-    w_match = float(weights.get("match_score", 0.3))
-    w_evidence = float(weights.get("evidence", 0.1))
-    score = (w_severity * severity) + (w_match * match) + (w_evidence * evidence_score)
-    top_signals = [
-        {"signal": "severity_hint", "evidence": str(severity)},
-        {"signal": "match_score", "evidence": str(match)},
-        {"signal": "evidence_count", "evidence": str(evidence_count)},
-    ]
-    return score, top_signals
 
+def _weight_vector(features: list[Feature], weights: dict) -> Vector:
+    return tuple(float(weights.get(f.name, f.weight)) for f in features)
 
-def run(cfg: dict, args) -> None:
+
+def _score(scaled: Vector, weights: Vector) -> float:
+    score = 0.0
+    for weight, value in zip(weights, scaled):
+        score += weight * value
+    return score
+
+
+def _signals(features: list[Feature], values: Vector) -> list[dict]:
+    return [{"signal": f.signal or f.name, "evidence": f.evidence(value)} for f, value in zip(features, values)]
+
+
+def _score_candidate(values: Vector, features: list[Feature], weights: Vector) -> tuple[float, list[dict]]:
+    score = _score(tuple(f.scale(value) for f, value in zip(features, values)), weights)
+    return score, _signals(features, values)
+
+
+def _top_candidates(
+    vectors: Iterable[tuple[str, Vector]], features: list[Feature], weights: dict, top_n: int
+) -> list[dict]:
+    """Score every feature vector and keep the top_n; score ties keep input order."""
+    weight_vector = _weight_vector(features, weights)
+
+    def candidates():
+        for func_pair_id, values in vectors:
+            score, top_signals = _score_candidate(values, features, weight_vector)
+            yield {"func_pair_id": func_pair_id, "rank": 0, "score": round(score, 6), "top_signals": top_signals}
+
+    # nlargest keeps only top_n candidates in memory and breaks score ties by input order, like a stable sort.
+    return heapq.nlargest(top_n, candidates(), key=lambda item: item["score"])
+
+
+def _top_candidates_numpy(
+    vectors: Iterable[tuple[str, Vector]], features: list[Feature], weights: dict, top_n: int
+) -> list[dict]:
+    """Same selection as `_top_candidates`, with one dot product over a feature matrix and argpartition.
+
+    Rows within the margin of the top_n-th score are re-keyed with the scalar score, rounded like the
+    pure-Python path, once per distinct score; ties at the boundary key are taken in input order.
+    """
+    ids: list[str] = []
+    raw = array("d")
+    add_id, add_values = ids.append, raw.extend
+    for func_pair_id, values in vectors:
+        add_id(func_pair_id)
+        add_values(values)
+    count = min(top_n, len(ids))
+    if count <= 0:
+        return []
+    columns = np.frombuffer(raw, dtype=np.float64).reshape(len(ids), len(features))
+    scaled = np.column_stack(
+        [np.minimum(columns[:, idx], f.saturate) / f.saturate if f.saturate else columns[:, idx] for idx, f in enumerate(features)]
+    )
+    weight_vector = _weight_vector(features, weights)
+    scores = scaled @ np.asarray(weight_vector, dtype=np.float64)
+    kth = scores[np.argpartition(-scores, count - 1)[count - 1]]
+    shortlist = np.flatnonzero(scores >= kth - _SHORTLIST_MARGIN)
+    _, first, inverse = np.unique(scores[shortlist], return_index=True, return_inverse=True)
+    rekeyed = [round(_score(tuple(scaled[shortlist[pos]].tolist()), weight_vector), 6) for pos in first.tolist()]
+    keys = np.asarray(rekeyed, dtype=np.float64)[inverse.reshape(-1)]
+    boundary = np.partition(keys, len(keys) - count)[len(keys) - count]
+    above = np.flatnonzero(keys > boundary)
+    tied = np.flatnonzero(keys == boundary)[: count - len(above)]
+    chosen = np.concatenate((above, tied))
+    chosen = chosen[np.lexsort((shortlist[chosen], -keys[chosen]))]
+    ranked = []
+    for idx, key in zip(shortlist[chosen].tolist(), keys[chosen].tolist()):
+        ranked.append(
+            {
+                "func_pair_id": ids[idx],
+                "rank": 0,
+                "score": key,
+                "top_signals": _signals(features, tuple(columns[idx].tolist())),
+            }
+        )
+    return ranked
+
+
+def run(cfg: dict, args) -> dict:
     job = load_job(args.job)
     top_n = args.top or cfg.get("ranking", {}).get("top_n", 30)
     weights = cfg.get("ranking", {}).get("weights", {}) or {}
@@ -39,34 +113,20 @@ def run(cfg: dict, args) -> None:
     out_dir = Path(args.job) / "artifacts" / "rank"
     out_dir.mkdir(parents=True, exist_ok=True)
     diff_dir = Path(args.job) / "artifacts" / "diff"
-    function_pairs = _load_json(diff_dir / "function_pairs.json", default=[])
-    diff_results = _load_json(diff_dir / "diff_results.json", default=[])
-    if not isinstance(function_pairs, list):
-        function_pairs = []
-    if not isinstance(diff_results, list):
-        diff_results = []
-
-    diff_by_pair = {d.get("func_pair_id"): d for d in diff_results if isinstance(d, dict)}
-    ranked_candidates: list[dict] = []
-    for pair in function_pairs:
-        if not isinstance(pair, dict):
-            continue
-        func_pair_id = pair.get("func_pair_id")
-        if not func_pair_id:
-            continue
-        diff_result = diff_by_pair.get(func_pair_id, {})
-        score, top_signals = _score_candidate(pair, diff_result, weights)
-        ranked_candidates.append(
-            {
-                "func_pair_id": func_pair_id,
-                "rank": 0,
-                "score": round(score, 6),
-                "top_signals": top_signals,
-            }
-        )
+    skipped_unchanged = 0
+
+    def changed_rows():
+        nonlocal skipped_unchanged
+        for row in iter_pair_rows(diff_dir):
+            if row.unchanged:
+                skipped_unchanged += 1
+                continue
+            yield row
 
-    ranked_candidates.sort(key=lambda item: item["score"], reverse=True)
-    ranked_candidates = ranked_candidates[:top_n]
+    select = _top_candidates_numpy if np is not None else _top_candidates
+    with FeatureContext(job, args.job, select_extractors(weights), cfg) as context:
+        ranked_candidates = select(context.vectors(changed_rows()), context.features, weights, top_n)
+    features = context.stats()
     for idx, candidate in enumerate(ranked_candidates, start=1):
         candidate["rank"] = idx
 
@@ -90,3 +150,4 @@ def run(cfg: dict, args) -> None:
         payload_is_list=True,
         job_dir=Path(args.job),
     )
+    return {"skipped_unchanged": skipped_unchanged, "vectorized": np is not None, "features": features}
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .artifacts import ARTIFACT_SCHEMA_PATH, SCHEMAS_DIR, record_artifact, write_artifact
+from ..constants import VERSION
+from ..errors import ConfigError
+from ..utils.jsonschema import validate_data, validate_instance
+from ..utils.time import now_iso
+
+RECORD_FORMATS = ("json", "jsonl")
+FUNCTION_PAIRS = "function_pairs"
+DIFF_RESULTS = "diff_results"
+
+
+def record_format(cfg: dict) -> str:
+    fmt = (cfg.get("diff", {}) or {}).get("output_format", "json") if isinstance(cfg, dict) else "json"
+    if fmt not in RECORD_FORMATS:
+        raise ConfigError("unsupported diff.output_format", details={"format": fmt, "supported": list(RECORD_FORMATS)})
+    return fmt
+
+
+def records_path(directory: Path, name: str) -> Path | None:
+    """The file holding `name` records in `directory`; line-delimited wins over a JSON array."""
+    for suffix in (".jsonl", ".json"):
+        path = directory / f"{name}{suffix}"
+        if path.exists():
+            return path
+    return None
+
+
+def iter_records(directory: Path, name: str) -> Iterator[dict]:
+    """Yield records one at a time; `.jsonl` files are streamed line by line, `.json` arrays are loaded whole."""
+    path = records_path(directory, name)
+    if path is None:
+        return
+    if path.suffix == ".jsonl":
+        with path.open("r", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    record = json.loads(line)
+                    if isinstance(record, dict):
+                        yield record
+        return
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if isinstance(data, list):
+        yield from (record for record in data if isinstance(record, dict))
+
+
+def load_records_by_id(directory: Path, name: str, key: str, wanted: Iterable[str] | None = None) -> dict[str, dict]:
+    """Index records by `key`, keeping only the `wanted` ids when given so memory follows the selection."""
+    keep = set(wanted) if wanted is not None else None
+    out: dict[str, dict] = {}
+    for record in iter_records(directory, name):
+        value = record.get(key)
+        if isinstance(value, str) and (keep is None or value in keep):
+            out[value] = record
+    return out
+
+
+def iter_pair_results(directory: Path) -> Iterator[tuple[dict, dict]]:
+    """Yield each function pair with its diff result.
+
+    Backends write both files in the same order, so the two streams are zipped. The first pair whose
+    result is out of step switches to an index of all results.
+    """
+    results = iter_records(directory, DIFF_RESULTS)
+    index: dict[str, dict] | None = None
+    for pair in iter_records(directory, FUNCTION_PAIRS):
+        func_pair_id = pair.get("func_pair_id")
+        if index is None:
+            result = next(results, None)
+            if result is not None and result.get("func_pair_id") == func_pair_id:
+                yield pair, result
+                continue
+            index = load_records_by_id(directory, DIFF_RESULTS, "func_pair_id")
+        yield pair, index.get(func_pair_id, {}) if isinstance(func_pair_id, str) else {}
+
+
+def write_records(
+    directory: Path,
+    name: str,
+    records: Iterable[dict],
+    fmt: str = "json",
+    *,
+    artifact_type: str,
+    inputs: dict,
+    payload_schema: str,
+    job_dir: Path | None = None,
+) -> int:
+    """Write `name.json` or `name.jsonl` plus its artifact envelope; returns the record count.
+
+    A `.jsonl` envelope references the records file instead of embedding it. Its payload_sha256 is
+    computed over the same compact serialization as an embedded list, so both formats hash alike.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for stale in RECORD_FORMATS:
+        if stale != fmt:
+            (directory / f"{name}.{stale}").unlink(missing_ok=True)
+    envelope_path = directory / f"{name}.artifact.json"
+    if fmt == "json":
+        payload = list(records)
+        (directory / f"{name}.json").write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        write_artifact(
+            envelope_path,
+            artifact_type,
+            inputs,
+            payload,
+            payload_schema=payload_schema,
+            payload_is_list=True,
+            job_dir=job_dir,
+        )
+        return len(payload)
+
+    schema_path = str(SCHEMAS_DIR / payload_schema)
+    digest = hashlib.sha256(b"[")
+    count = 0
+    path = directory / f"{name}.jsonl"
+    with path.open("w", encoding="utf-8") as fh:
+        for record in records:
+            validate_instance(schema_path, record)
+            if count:
+                digest.update(b",")
+            digest.update(json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+            fh.write(json.dumps(record, separators=(",", ":")))
+            fh.write("\n")
+            count += 1
+    digest.update(b"]")
+    envelope = {
+        "artifact_id": str(uuid.uuid4()),
+        "artifact_type": artifact_type,
+        "created_at": now_iso(),
+        "tool_version": VERSION,
+        "inputs": inputs,
+        "payload_sha256": digest.hexdigest(),
+        "payload": {"format": "jsonl", "path": path.name, "count": count},
+    }
+    validate_data(str(ARTIFACT_SCHEMA_PATH), envelope)
+    envelope_path.write_text(json.dumps(envelope, indent=2), encoding="utf-8")
+    record_artifact(envelope_path, envelope, job_dir)
+    return count
@@ -5,6 +5,8 @@ from pathlib import Path
 
 from .artifacts import write_artifact
 from .job import load_job
+from .pairs import load_pair_table
+from .records import DIFF_RESULTS, load_records_by_id
 from ..utils.time import now_iso
 
 
@@ -56,18 +58,14 @@ def run(cfg: dict, args) -> None:
     if not isinstance(analyses, list):
         analyses = []
     decompile_items = _load_json(Path(args.job) / "artifacts" / "decompile" / "decompile_artifacts.json", default=[])
-    diff_results = _load_json(Path(args.job) / "artifacts" / "diff" / "diff_results.json", default=[])
-    function_pairs = _load_json(Path(args.job) / "artifacts" / "diff" / "function_pairs.json", default=[])
     if not isinstance(decompile_items, list):
         decompile_items = []
-    if not isinstance(diff_results, list):
-        diff_results = []
-    if not isinstance(function_pairs, list):
-        function_pairs = []
 
     decompile_by_func_id = {d.get("func_id"): d for d in decompile_items if isinstance(d, dict)}
-    diff_by_pair = {d.get("func_pair_id"): d for d in diff_results if isinstance(d, dict)}
-    pair_by_id = {p.get("func_pair_id"): p for p in function_pairs if isinstance(p, dict)}
+    diff_dir = Path(args.job) / "artifacts" / "diff"
+    wanted = [a.get("func_pair_id") for a in analyses if isinstance(a, dict)]
+    diff_by_pair = load_records_by_id(diff_dir, DIFF_RESULTS, "func_pair_id", wanted)
+    pairs = load_pair_table(diff_dir, wanted)
     checks: list[dict] = []
     per_candidate: list[dict] = []
     for analysis in analyses:
@@ -76,12 +74,10 @@ def run(cfg: dict, args) -> None:
         func_pair_id = analysis.get("func_pair_id")
         if not isinstance(func_pair_id, str):
             continue
-        pair = pair_by_id.get(func_pair_id, {})
+        row = pairs.get(func_pair_id)
         diff_result = diff_by_pair.get(func_pair_id, {})
-        func_id_a = pair.get("func_id_a")
-        func_id_b = pair.get("func_id_b")
-        decomp_a = decompile_by_func_id.get(func_id_a, {}) if isinstance(func_id_a, str) else {}
-        decomp_b = decompile_by_func_id.get(func_id_b, {}) if isinstance(func_id_b, str) else {}
+        decomp_a = decompile_by_func_id.get(row.func_id_a, {}) if row is not None else {}
+        decomp_b = decompile_by_func_id.get(row.func_id_b, {}) if row is not None else {}
         evidence_items = analysis.get("evidence", [])
         evidence_passed = True
         if isinstance(evidence_items, list):
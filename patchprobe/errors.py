@@ -43,3 +43,7 @@ class ValidationError(PatchdiffError):
 
 class ReportError(PatchdiffError):
     code = 80
+
+
+class BatchError(PatchdiffError):
+    code = 90
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+from ..utils.mapping import Buffer
+
+ELF_MAGIC = b"\x7fELF"
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+PT_NOTE = 4
+SHT_SYMTAB = 2
+SHT_NOTE = 7
+SHT_NOBITS = 8
+SHT_DYNSYM = 11
+SHF_EXECINSTR = 0x4
+SHN_UNDEF = 0
+SHN_LORESERVE = 0xFF00
+SHN_XINDEX = 0xFFFF
+NT_GNU_BUILD_ID = 3
+
+STT_NOTYPE = 0
+STT_FUNC = 2
+STB_LOCAL = 0
+STB_GLOBAL = 1
+STB_WEAK = 2
+
+_EHDR = {
+    (ELFCLASS32, "<"): struct.Struct("<HHIIIIIHHHHHH"),
+    (ELFCLASS32, ">"): struct.Struct(">HHIIIIIHHHHHH"),
+    (ELFCLASS64, "<"): struct.Struct("<HHIQQQIHHHHHH"),
+    (ELFCLASS64, ">"): struct.Struct(">HHIQQQIHHHHHH"),
+}
+# p_type, p_offset, p_vaddr, p_filesz, p_align are picked out per class below.
+_PHDR = {
+    (ELFCLASS32, "<"): struct.Struct("<IIIIIIII"),
+    (ELFCLASS32, ">"): struct.Struct(">IIIIIIII"),
+    (ELFCLASS64, "<"): struct.Struct("<IIQQQQQQ"),
+    (ELFCLASS64, ">"): struct.Struct(">IIQQQQQQ"),
+}
+_SHDR = {
+    (ELFCLASS32, "<"): struct.Struct("<IIIIIIIIII"),
+    (ELFCLASS32, ">"): struct.Struct(">IIIIIIIIII"),
+    (ELFCLASS64, "<"): struct.Struct("<IIQQQQIIQQ"),
+    (ELFCLASS64, ">"): struct.Struct(">IIQQQQIIQQ"),
+}
+_NHDR = {"<": struct.Struct("<III"), ">": struct.Struct(">III")}
+# ELF32 and ELF64 order the symbol fields differently; iter_symbols unpacks each layout.
+_SYM = {
+    (ELFCLASS32, "<"): struct.Struct("<IIIBBH"),
+    (ELFCLASS32, ">"): struct.Struct(">IIIBBH"),
+    (ELFCLASS64, "<"): struct.Struct("<IBBHQQ"),
+    (ELFCLASS64, ">"): struct.Struct(">IBBHQQ"),
+}
+
+
+@dataclass
+class ElfHeader:
+    elf_class: int
+    endian: str
+    e_machine: int
+    e_phoff: int
+    e_phentsize: int
+    e_phnum: int
+    e_shoff: int
+    e_shentsize: int
+    e_shnum: int
+    e_shstrndx: int
+
+
+@dataclass
+class ProgramHeader:
+    p_type: int
+    p_offset: int
+    p_vaddr: int
+    p_filesz: int
+    p_align: int
+
+
+@dataclass
+class SectionHeader:
+    sh_name: int
+    sh_type: int
+    sh_flags: int
+    sh_addr: int
+    sh_offset: int
+    sh_size: int
+    sh_link: int
+    sh_info: int
+    sh_entsize: int
+
+
+def parse_header(data: Buffer) -> ElfHeader | None:
+    if len(data) < 52 or data[:4] != ELF_MAGIC:
+        return None
+    elf_class = data[4]
+    endian = "<" if data[5] == ELFDATA2LSB else ">"
+    fmt = _EHDR.get((elf_class, endian))
+    if fmt is None or len(data) < 16 + fmt.size:
+        return None
+    (
+        _e_type,
+        e_machine,
+        _e_version,
+        _e_entry,
+        e_phoff,
+        e_shoff,
+        _e_flags,
+        _e_ehsize,
+        e_phentsize,
+        e_phnum,
+        e_shentsize,
+        e_shnum,
+        e_shstrndx,
+    ) = fmt.unpack_from(data, 16)
+    shdr = _SHDR[(elf_class, endian)]
+    if e_shoff and (e_shnum == 0 or e_shstrndx == SHN_XINDEX) and e_shoff + shdr.size <= len(data):
+        # Extended numbering: section 0 carries the real count and string table index.
+        fields = shdr.unpack_from(data, e_shoff)
+        if e_shnum == 0:
+            e_shnum = fields[5]
+        if e_shstrndx == SHN_XINDEX:
+            e_shstrndx = fields[6]
+    return ElfHeader(
+        elf_class=elf_class,
+        endian=endian,
+        e_machine=e_machine,
+        e_phoff=e_phoff,
+        e_phentsize=e_phentsize,
+        e_phnum=e_phnum,
+        e_shoff=e_shoff,
+        e_shentsize=e_shentsize,
+        e_shnum=e_shnum,
+        e_shstrndx=e_shstrndx,
+    )
+
+
+def iter_program_headers(data: Buffer, hdr: ElfHeader) -> Iterator[ProgramHeader]:
+    fmt = _PHDR[(hdr.elf_class, hdr.endian)]
+    if hdr.e_phoff <= 0 or hdr.e_phentsize < fmt.size:
+        return
+    for idx in range(hdr.e_phnum):
+        off = hdr.e_phoff + (idx * hdr.e_phentsize)
+        if off + fmt.size > len(data):
+            return
+        fields = fmt.unpack_from(data, off)
+        if hdr.elf_class == ELFCLASS32:
+            p_type, p_offset, p_vaddr, _p_paddr, p_filesz, _p_memsz, _p_flags, p_align = fields
+        else:
+            p_type, _p_flags, p_offset, p_vaddr, _p_paddr, p_filesz, _p_memsz, p_align = fields
+        yield ProgramHeader(p_type=p_type, p_offset=p_offset, p_vaddr=p_vaddr, p_filesz=p_filesz, p_align=p_align)
+
+
+def iter_section_headers(data: Buffer, hdr: ElfHeader) -> Iterator[SectionHeader]:
+    for fields in iter_section_fields(data, hdr):
+        yield _section_header(fields)
+
+
+def iter_section_fields(data: Buffer, hdr: ElfHeader) -> Iterator[tuple[int, ...]]:
+    # Raw header tuples straight from unpack_from; used on hot paths to skip object construction.
+    fmt = _SHDR[(hdr.elf_class, hdr.endian)]
+    if hdr.e_shoff <= 0 or hdr.e_shentsize < fmt.size:
+        return
+    unpack_from = fmt.unpack_from
+    limit = len(data) - fmt.size
+    for off in range(hdr.e_shoff, hdr.e_shoff + (hdr.e_shnum * hdr.e_shentsize), hdr.e_shentsize):
+        if off > limit:
+            return
+        yield unpack_from(data, off)
+
+
+def section_header(data: Buffer, hdr: ElfHeader, index: int) -> SectionHeader | None:
+    fmt = _SHDR[(hdr.elf_class, hdr.endian)]
+    off = hdr.e_shoff + (index * hdr.e_shentsize)
+    if hdr.e_shoff <= 0 or index >= hdr.e_shnum or off + fmt.size > len(data):
+        return None
+    return _section_header(fmt.unpack_from(data, off))
+
+
+def read_cstring(data: Buffer, offset: int, end: int) -> str:
+    if offset >= end:
+        return ""
+    stop = data.find(b"\x00", offset, end)
+    if stop < 0:
+        stop = end
+    return data[offset:stop].decode("ascii", errors="replace")
+
+
+def iter_notes(data: Buffer, offset: int, size: int, endian: str, align: int = 4) -> Iterator[tuple[bytes, int, int, int]]:
+    """Yield `(name, n_type, desc_offset, desc_size)` for each note in a note area."""
+    fmt = _NHDR[endian]
+    align = 8 if align == 8 else 4
+    end = min(offset + size, len(data))
+    pos = offset
+    while pos + fmt.size <= end:
+        namesz, descsz, n_type = fmt.unpack_from(data, pos)
+        name_off = pos + fmt.size
+        desc_off = name_off + _align_up(namesz, align)
+        next_pos = desc_off + _align_up(descsz, align)
+        if desc_off + descsz > end:
+            return
+        name = bytes(data[name_off:name_off + namesz]).rstrip(b"\x00")
+        yield name, n_type, desc_off, descsz
+        if next_pos <= pos:
+            return
+        pos = next_pos
+
+
+def find_gnu_build_id(data: Buffer) -> bytes | None:
+    hdr = parse_header(data)
+    if hdr is None:
+        return None
+    note_areas = [
+        (ph.p_offset, ph.p_filesz, ph.p_align) for ph in iter_program_headers(data, hdr) if ph.p_type == PT_NOTE
+    ]
+    if not note_areas:
+        note_areas = [
+            (sh.sh_offset, sh.sh_size, 4) for sh in iter_section_headers(data, hdr) if sh.sh_type == SHT_NOTE
+        ]
+    for offset, size, align in note_areas:
+        for name, n_type, desc_off, descsz in iter_notes(data, offset, size, hdr.endian, align):
+            if name == b"GNU" and n_type == NT_GNU_BUILD_ID and descsz > 0:
+                return bytes(data[desc_off:desc_off + descsz])
+    return None
+
+
+def iter_symbols(data: Buffer, hdr: ElfHeader, symtab: SectionHeader) -> Iterator[tuple[str, int, int, int, int]]:
+    """Yield `(name, st_value, st_size, st_info, st_shndx)` for each entry of a SHT_SYMTAB/SHT_DYNSYM section."""
+    fmt = _SYM[(hdr.elf_class, hdr.endian)]
+    strtab = section_header(data, hdr, symtab.sh_link)
+    if strtab is None or symtab.sh_entsize < fmt.size:
+        return
+    str_start = strtab.sh_offset
+    str_end = min(str_start + strtab.sh_size, len(data))
+    unpack_from = fmt.unpack_from
+    is32 = hdr.elf_class == ELFCLASS32
+    end = min(symtab.sh_offset + symtab.sh_size, len(data))
+    for off in range(symtab.sh_offset, end - fmt.size + 1, symtab.sh_entsize):
+        if is32:
+            st_name, st_value, st_size, st_info, _st_other, st_shndx = unpack_from(data, off)
+        else:
+            st_name, st_info, _st_other, st_shndx, st_value, st_size = unpack_from(data, off)
+        yield read_cstring(data, str_start + st_name, str_end), st_value, st_size, st_info, st_shndx
+
+
+def _section_header(fields: tuple[int, ...]) -> SectionHeader:
+    sh_name, sh_type, sh_flags, sh_addr, sh_offset, sh_size, sh_link, sh_info, _align, sh_entsize = fields
+    return SectionHeader(
+        sh_name=sh_name,
+        sh_type=sh_type,
+        sh_flags=sh_flags,
+        sh_addr=sh_addr,
+        sh_offset=sh_offset,
+        sh_size=sh_size,
+        sh_link=sh_link,
+        sh_info=sh_info,
+        sh_entsize=sh_entsize,
+    )
+
+
+def _align_up(value: int, align: int) -> int:
+    return (value + align - 1) & ~(align - 1)
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+from ..utils.mapping import Buffer
+from .elf import read_cstring
+
+MH_MAGIC = 0xFEEDFACE
+MH_MAGIC_64 = 0xFEEDFACF
+FAT_MAGIC = 0xCAFEBABE
+FAT_MAGIC_64 = 0xCAFEBABF
+# Java class files share FAT_MAGIC; real universal binaries carry only a handful of slices.
+_MAX_FAT_ARCHES = 32
+
+LC_SEGMENT = 0x1
+LC_SYMTAB = 0x2
+LC_SEGMENT_64 = 0x19
+LC_UUID = 0x1B
+LC_CODE_SIGNATURE = 0x1D
+LC_FUNCTION_STARTS = 0x26
+
+SECTION_TYPE_MASK = 0xFF
+S_ZEROFILL = 0x1
+S_GB_ZEROFILL = 0xC
+S_THREAD_LOCAL_ZEROFILL = 0x12
+_ZEROFILL_TYPES = {S_ZEROFILL, S_GB_ZEROFILL, S_THREAD_LOCAL_ZEROFILL}
+
+CPU_TYPES = {
+    0x00000007: "x86",
+    0x01000007: "x64",
+    0x0000000C: "arm",
+    0x0100000C: "arm64",
+}
+
+_FAT_HDR = struct.Struct(">II")
+_FAT_ARCH = {FAT_MAGIC: struct.Struct(">iiIII"), FAT_MAGIC_64: struct.Struct(">iiQQII")}
+_MAGIC = struct.Struct("<I")
+_MACH_HDR = {"<": struct.Struct("<IiiIIII"), ">": struct.Struct(">IiiIIII")}
+_LOAD_CMD = {"<": struct.Struct("<II"), ">": struct.Struct(">II")}
+_SEGMENT = {
+    (False, "<"): struct.Struct("<II16sIIIIiiII"),
+    (False, ">"): struct.Struct(">II16sIIIIiiII"),
+    (True, "<"): struct.Struct("<II16sQQQQiiII"),
+    (True, ">"): struct.Struct(">II16sQQQQiiII"),
+}
+_SECTION = {
+    (False, "<"): struct.Struct("<16s16sIIIIIIIII"),
+    (False, ">"): struct.Struct(">16s16sIIIIIIIII"),
+    (True, "<"): struct.Struct("<16s16sQQIIIIIIII"),
+    (True, ">"): struct.Struct(">16s16sQQIIIIIIII"),
+}
+_SYMTAB_CMD = {"<": struct.Struct("<IIIIII"), ">": struct.Struct(">IIIIII")}
+_LINKEDIT_CMD = {"<": struct.Struct("<IIII"), ">": struct.Struct(">IIII")}
+_NLIST = {
+    (False, "<"): struct.Struct("<IBBHI"),
+    (False, ">"): struct.Struct(">IBBHI"),
+    (True, "<"): struct.Struct("<IBBHQ"),
+    (True, ">"): struct.Struct(">IBBHQ"),
+}
+
+
+@dataclass
+class FatArch:
+    cputype: int
+    cpusubtype: int
+    offset: int
+    size: int
+    align: int
+
+    @property
+    def arch(self) -> str:
+        return arch_name(self.cputype)
+
+
+@dataclass
+class MachHeader:
+    # All offsets inside a slice are relative to `base`, the slice's start in the file.
+    base: int
+    size: int
+    endian: str
+    is_64: bool
+    cputype: int
+    cpusubtype: int
+    filetype: int
+    ncmds: int
+    sizeofcmds: int
+    commands_offset: int
+
+    @property
+    def arch(self) -> str:
+        return arch_name(self.cputype)
+
+
+@dataclass
+class Segment:
+    name: str
+    vmaddr: int
+    vmsize: int
+    fileoff: int
+    filesize: int
+    nsects: int
+    flags: int
+
+
+@dataclass
+class Section:
+    name: str
+    segment: str
+    addr: int
+    size: int
+    offset: int
+    align: int
+    flags: int
+
+    @property
+    def zerofill(self) -> bool:
+        return (self.flags & SECTION_TYPE_MASK) in _ZEROFILL_TYPES
+
+
+@dataclass
+class SymtabCommand:
+    symoff: int
+    nsyms: int
+    stroff: int
+    strsize: int
+
+
+def arch_name(cputype: int) -> str:
+    return CPU_TYPES.get(cputype & 0xFFFFFFFF, "unknown")
+
+
+def is_fat(data: Buffer) -> bool:
+    if len(data) < _FAT_HDR.size:
+        return False
+    magic, nfat = _FAT_HDR.unpack_from(data, 0)
+    return magic in _FAT_ARCH and 0 < nfat <= _MAX_FAT_ARCHES
+
+
+def iter_fat_arches(data: Buffer) -> Iterator[FatArch]:
+    if not is_fat(data):
+        return
+    magic, nfat = _FAT_HDR.unpack_from(data, 0)
+    fmt = _FAT_ARCH[magic]
+    for idx in range(nfat):
+        off = _FAT_HDR.size + (idx * fmt.size)
+        if off + fmt.size > len(data):
+            return
+        cputype, cpusubtype, offset, size, align = fmt.unpack_from(data, off)[:5]
+        if offset + size > len(data):
+            continue
+        yield FatArch(cputype=cputype, cpusubtype=cpusubtype, offset=offset, size=size, align=align)
+
+
+def list_arches(data: Buffer) -> list[str]:
+    if is_fat(data):
+        return [fat.arch for fat in iter_fat_arches(data)]
+    hdr = parse_header(data)
+    return [hdr.arch] if hdr is not None else []
+
+
+def parse_slice(data: Buffer, arch: str | None = None) -> MachHeader | None:
+    """Parse the header of the slice for `arch` in place; the first slice wins when `arch` is None."""
+    if not is_fat(data):
+        hdr = parse_header(data)
+        if hdr is None or (arch is not None and hdr.arch != arch):
+            return None
+        return hdr
+    for fat in iter_fat_arches(data):
+        if arch is None or fat.arch == arch:
+            return parse_header(data, fat.offset, fat.size)
+    return None
+
+
+def parse_header(data: Buffer, base: int = 0, size: int | None = None) -> MachHeader | None:
+    if size is None:
+        size = len(data) - base
+    if base < 0 or size < 28 or base + size > len(data):
+        return None
+    (magic,) = _MAGIC.unpack_from(data, base)
+    if magic in (MH_MAGIC, MH_MAGIC_64):
+        endian = "<"
+    elif magic in (_swap32(MH_MAGIC), _swap32(MH_MAGIC_64)):
+        endian = ">"
+    else:
+        return None
+    fields = _MACH_HDR[endian].unpack_from(data, base)
+    magic, cputype, cpusubtype, filetype, ncmds, sizeofcmds, _flags = fields
+    is_64 = magic == MH_MAGIC_64
+    commands_offset = base + (32 if is_64 else 28)
+    if commands_offset > base + size:
+        return None
+    return MachHeader(
+        base=base,
+        size=size,
+        endian=endian,
+        is_64=is_64,
+        cputype=cputype,
+        cpusubtype=cpusubtype,
+        filetype=filetype,
+        ncmds=ncmds,
+        sizeofcmds=sizeofcmds,
+        commands_offset=commands_offset,
+    )
+
+
+def _commands_end(data: Buffer, hdr: MachHeader) -> int:
+    # sizeofcmds is untrusted; never read past the slice or the buffer.
+    return min(hdr.commands_offset + hdr.sizeofcmds, hdr.base + hdr.size, len(data))
+
+
+def iter_load_commands(data: Buffer, hdr: MachHeader) -> Iterator[tuple[int, int, int]]:
+    """Yield `(cmd, offset, cmdsize)` for each load command, stopping at the first malformed one."""
+    fmt = _LOAD_CMD[hdr.endian]
+    end = _commands_end(data, hdr)
+    off = hdr.commands_offset
+    for _ in range(hdr.ncmds):
+        if off + fmt.size > end:
+            return
+        cmd, cmdsize = fmt.unpack_from(data, off)
+        if cmdsize < fmt.size or off + cmdsize > end:
+            return
+        yield cmd, off, cmdsize
+        off += cmdsize
+
+
+def iter_segments(data: Buffer, hdr: MachHeader) -> Iterator[tuple[Segment, int]]:
+    """Yield each segment with the offset of its first section header."""
+    want = LC_SEGMENT_64 if hdr.is_64 else LC_SEGMENT
+    fmt = _SEGMENT[(hdr.is_64, hdr.endian)]
+    for cmd, off, cmdsize in iter_load_commands(data, hdr):
+        if cmd != want or cmdsize < fmt.size:
+            continue
+        fields = fmt.unpack_from(data, off)
+        _cmd, _size, segname, vmaddr, vmsize, fileoff, filesize, _maxprot, _initprot, nsects, flags = fields
+        segment = Segment(
+            name=_fixed_name(segname),
+            vmaddr=vmaddr,
+            vmsize=vmsize,
+            fileoff=fileoff,
+            filesize=filesize,
+            nsects=nsects,
+            flags=flags,
+        )
+        yield segment, off + fmt.size
+
+
+def iter_sections(data: Buffer, hdr: MachHeader) -> Iterator[Section]:
+    fmt = _SECTION[(hdr.is_64, hdr.endian)]
+    unpack_from = fmt.unpack_from
+    limit = _commands_end(data, hdr) - fmt.size
+    for segment, first in iter_segments(data, hdr):
+        for idx in range(segment.nsects):
+            off = first + (idx * fmt.size)
+            if off > limit:
+                return
+            sectname, segname, addr, size, offset, align, _reloff, _nreloc, flags = unpack_from(data, off)[:9]
+            yield Section(
+                name=_fixed_name(sectname),
+                segment=_fixed_name(segname),
+                addr=addr,
+                size=size,
+                offset=offset,
+                align=align,
+                flags=flags,
+            )
+
+
+def find_symtab(data: Buffer, hdr: MachHeader) -> SymtabCommand | None:
+    fmt = _SYMTAB_CMD[hdr.endian]
+    for cmd, off, cmdsize in iter_load_commands(data, hdr):
+        if cmd == LC_SYMTAB and cmdsize >= fmt.size:
+            _cmd, _size, symoff, nsyms, stroff, strsize = fmt.unpack_from(data, off)
+            return SymtabCommand(symoff=symoff, nsyms=nsyms, stroff=stroff, strsize=strsize)
+    return None
+
+
+def iter_nlist(data: Buffer, hdr: MachHeader, symtab: SymtabCommand) -> Iterator[tuple[str, int, int, int, int]]:
+    """Yield `(name, n_type, n_sect, n_desc, n_value)` for each symbol table entry."""
+    fmt = _NLIST[(hdr.is_64, hdr.endian)]
+    unpack_from = fmt.unpack_from
+    str_start = hdr.base + symtab.stroff
+    str_end = min(str_start + symtab.strsize, hdr.base + hdr.size)
+    limit = hdr.base + hdr.size - fmt.size
+    for idx in range(symtab.nsyms):
+        off = hdr.base + symtab.symoff + (idx * fmt.size)
+        if off > limit:
+            return
+        n_strx, n_type, n_sect, n_desc, n_value = unpack_from(data, off)
+        yield read_cstring(data, str_start + n_strx, str_end), n_type, n_sect, n_desc, n_value
+
+
+def find_uuid(data: Buffer, hdr: MachHeader) -> bytes | None:
+    for cmd, off, cmdsize in iter_load_commands(data, hdr):
+        if cmd == LC_UUID and cmdsize >= 24:
+            return bytes(data[off + 8:off + 24])
+    return None
+
+
+def function_starts(data: Buffer, hdr: MachHeader) -> list[int]:
+    """Decode LC_FUNCTION_STARTS into absolute addresses, relative to the __TEXT segment."""
+    fmt = _LINKEDIT_CMD[hdr.endian]
+    blob: tuple[int, int] | None = None
+    text_vmaddr = 0
+    for cmd, off, cmdsize in iter_load_commands(data, hdr):
+        if cmd == LC_FUNCTION_STARTS and cmdsize >= fmt.size:
+            _cmd, _size, dataoff, datasize = fmt.unpack_from(data, off)
+            blob = (hdr.base + dataoff, datasize)
+    for segment, _first in iter_segments(data, hdr):
+        if segment.name == "__TEXT":
+            text_vmaddr = segment.vmaddr
+            break
+    if blob is None:
+        return []
+    start, size = blob
+    end = min(start + size, hdr.base + hdr.size)
+    addresses: list[int] = []
+    address = text_vmaddr
+    pos = start
+    while pos < end:
+        delta = 0
+        shift = 0
+        while pos < end:
+            byte = data[pos]
+            pos += 1
+            delta |= (byte & 0x7F) << shift
+            shift += 7
+            if byte < 0x80:
+                break
+        if delta == 0:
+            break
+        address += delta
+        addresses.append(address)
+    return addresses
+
+
+def _fixed_name(raw: bytes) -> str:
+    return raw.split(b"\x00", 1)[0].decode("ascii", errors="replace")
+
+
+def _swap32(value: int) -> int:
+    return int.from_bytes(value.to_bytes(4, "little"), "big")
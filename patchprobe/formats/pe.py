@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+from ..utils.mapping import Buffer
+from .elf import read_cstring
+
+PE_SIGNATURE = b"PE\x00\x00"
+OPTIONAL_HDR32_MAGIC = 0x10B
+OPTIONAL_HDR64_MAGIC = 0x20B
+
+IMAGE_DIRECTORY_ENTRY_EXPORT = 0
+IMAGE_DIRECTORY_ENTRY_EXCEPTION = 3
+IMAGE_DIRECTORY_ENTRY_SECURITY = 4
+IMAGE_DIRECTORY_ENTRY_DEBUG = 6
+IMAGE_DEBUG_TYPE_CODEVIEW = 2
+CODEVIEW_RSDS = b"RSDS"
+IMAGE_FILE_MACHINE_AMD64 = 0x8664
+IMAGE_SCN_MEM_EXECUTE = 0x20000000
+IMAGE_SYM_CLASS_EXTERNAL = 2
+IMAGE_SYM_CLASS_STATIC = 3
+IMAGE_SYM_DTYPE_FUNCTION = 2
+
+_LFANEW = struct.Struct("<I")
+_COFF_HDR = struct.Struct("<HHIIIHH")
+_MAGIC = struct.Struct("<H")
+_IMAGE_BASE32 = struct.Struct("<I")
+_IMAGE_BASE64 = struct.Struct("<Q")
+_DATA_DIR = struct.Struct("<II")
+_SECTION_HDR = struct.Struct("<8sIIIIIIHHI")
+_DEBUG_DIR = struct.Struct("<IIHHIIII")
+_CV_RSDS = struct.Struct("<4s16sI")
+_EXPORT_DIR = struct.Struct("<IIHHIIIIIII")
+_U32 = struct.Struct("<I")
+_U16 = struct.Struct("<H")
+_COFF_SYM = struct.Struct("<8sIhHBB")
+_RUNTIME_FUNCTION = struct.Struct("<III")
+
+
+@dataclass
+class PeHeader:
+    machine: int
+    number_of_sections: int
+    pointer_to_symbol_table: int
+    number_of_symbols: int
+    optional_header_offset: int
+    magic: int
+    image_base: int
+    data_directories: list[tuple[int, int]]
+    section_table_offset: int
+
+
+@dataclass
+class PeSection:
+    name: str
+    virtual_size: int
+    virtual_address: int
+    raw_size: int
+    raw_offset: int
+    characteristics: int
+
+
+def parse_header(data: Buffer) -> PeHeader | None:
+    if len(data) < 0x40 or data[:2] != b"MZ":
+        return None
+    (pe_offset,) = _LFANEW.unpack_from(data, 0x3C)
+    if pe_offset + 4 + _COFF_HDR.size > len(data) or data[pe_offset:pe_offset + 4] != PE_SIGNATURE:
+        return None
+    machine, nsections, _stamp, symtab_ptr, nsymbols, opt_size, _chars = _COFF_HDR.unpack_from(data, pe_offset + 4)
+    opt_offset = pe_offset + 4 + _COFF_HDR.size
+    magic = 0
+    image_base = 0
+    data_dirs: list[tuple[int, int]] = []
+    if opt_size >= _MAGIC.size and opt_offset + opt_size <= len(data):
+        (magic,) = _MAGIC.unpack_from(data, opt_offset)
+        opt_end = opt_offset + opt_size
+        if magic == OPTIONAL_HDR32_MAGIC:
+            base_field, base_offset, count_offset = _IMAGE_BASE32, opt_offset + 28, opt_offset + 92
+        elif magic == OPTIONAL_HDR64_MAGIC:
+            base_field, base_offset, count_offset = _IMAGE_BASE64, opt_offset + 24, opt_offset + 108
+        else:
+            base_field = None
+        # A truncated optional header keeps only what fits inside it.
+        if base_field is not None and base_offset + base_field.size <= opt_end:
+            (image_base,) = base_field.unpack_from(data, base_offset)
+        if base_field is not None and count_offset + _U32.size <= opt_end:
+            (count,) = _U32.unpack_from(data, count_offset)
+            dirs_offset = count_offset + _U32.size
+            # Never trust NumberOfRvaAndSizes beyond what the optional header can hold.
+            count = min(count, 16, max(0, (opt_end - dirs_offset) // _DATA_DIR.size))
+            data_dirs = [_DATA_DIR.unpack_from(data, dirs_offset + (i * _DATA_DIR.size)) for i in range(count)]
+    return PeHeader(
+        machine=machine,
+        number_of_sections=nsections,
+        pointer_to_symbol_table=symtab_ptr,
+        number_of_symbols=nsymbols,
+        optional_header_offset=opt_offset,
+        magic=magic,
+        image_base=image_base,
+        data_directories=data_dirs,
+        section_table_offset=opt_offset + opt_size,
+    )
+
+
+def iter_sections(data: Buffer, hdr: PeHeader) -> Iterator[PeSection]:
+    for idx in range(hdr.number_of_sections):
+        off = hdr.section_table_offset + (idx * _SECTION_HDR.size)
+        if off + _SECTION_HDR.size > len(data):
+            return
+        raw_name, vsize, vaddr, raw_size, raw_offset, _relocs, _lines, _nrelocs, _nlines, chars = _SECTION_HDR.unpack_from(data, off)
+        yield PeSection(
+            name=raw_name.split(b"\x00", 1)[0].decode("ascii", errors="replace").strip(),
+            virtual_size=vsize,
+            virtual_address=vaddr,
+            raw_size=raw_size,
+            raw_offset=raw_offset,
+            characteristics=chars,
+        )
+
+
+def data_directory(hdr: PeHeader, index: int) -> tuple[int, int]:
+    if index >= len(hdr.data_directories):
+        return 0, 0
+    return hdr.data_directories[index]
+
+
+def rva_to_offset(sections: list[PeSection], rva: int) -> int | None:
+    for sec in sections:
+        span = max(sec.virtual_size, sec.raw_size)
+        if sec.virtual_address <= rva < sec.virtual_address + span:
+            delta = rva - sec.virtual_address
+            if delta >= sec.raw_size:
+                return None
+            return sec.raw_offset + delta
+    return None
+
+
+def find_codeview_guid_age(data: Buffer, hdr: PeHeader | None = None) -> bytes | None:
+    """Return the 20 GUID+age bytes of the RSDS record named by the debug directory."""
+    hdr = hdr or parse_header(data)
+    if hdr is None:
+        return None
+    rva, size = data_directory(hdr, IMAGE_DIRECTORY_ENTRY_DEBUG)
+    if rva == 0 or size == 0:
+        return None
+    sections = list(iter_sections(data, hdr))
+    offset = rva_to_offset(sections, rva)
+    if offset is None:
+        return None
+    for idx in range(size // _DEBUG_DIR.size):
+        entry_off = offset + (idx * _DEBUG_DIR.size)
+        if entry_off + _DEBUG_DIR.size > len(data):
+            break
+        _chars, _stamp, _major, _minor, dbg_type, dbg_size, _addr, raw_ptr = _DEBUG_DIR.unpack_from(data, entry_off)
+        if dbg_type != IMAGE_DEBUG_TYPE_CODEVIEW or dbg_size < _CV_RSDS.size:
+            continue
+        if raw_ptr + _CV_RSDS.size > len(data):
+            continue
+        signature, guid, age = _CV_RSDS.unpack_from(data, raw_ptr)
+        if signature != CODEVIEW_RSDS:
+            continue
+        return guid + struct.pack("<I", age)
+    return None
+
+
+def iter_exports(data: Buffer, hdr: PeHeader, sections: list[PeSection]) -> Iterator[tuple[str, int]]:
+    """Yield `(name, rva)` for each named export; forwarders are skipped."""
+    dir_rva, dir_size = data_directory(hdr, IMAGE_DIRECTORY_ENTRY_EXPORT)
+    offset = rva_to_offset(sections, dir_rva) if dir_rva else None
+    if offset is None or offset + _EXPORT_DIR.size > len(data):
+        return
+    fields = _EXPORT_DIR.unpack_from(data, offset)
+    nfuncs, nnames, funcs_rva, names_rva, ordinals_rva = fields[6:11]
+    funcs_off = rva_to_offset(sections, funcs_rva)
+    names_off = rva_to_offset(sections, names_rva)
+    ordinals_off = rva_to_offset(sections, ordinals_rva)
+    if funcs_off is None or names_off is None or ordinals_off is None:
+        return
+    for idx in range(nnames):
+        name_ptr_off = names_off + (idx * 4)
+        ordinal_off = ordinals_off + (idx * 2)
+        if name_ptr_off + 4 > len(data) or ordinal_off + 2 > len(data):
+            return
+        (ordinal,) = _U16.unpack_from(data, ordinal_off)
+        func_off = funcs_off + (ordinal * 4)
+        if ordinal >= nfuncs or func_off + 4 > len(data):
+            continue
+        (rva,) = _U32.unpack_from(data, func_off)
+        if rva == 0 or dir_rva <= rva < dir_rva + dir_size:
+            continue
+        (name_rva,) = _U32.unpack_from(data, name_ptr_off)
+        name_off = rva_to_offset(sections, name_rva)
+        if name_off is None:
+            continue
+        yield read_cstring(data, name_off, min(name_off + 4096, len(data))), rva
+
+
+def iter_coff_symbols(data: Buffer, hdr: PeHeader) -> Iterator[tuple[str, int, int, int, int]]:
+    """Yield `(name, value, section_number, type, storage_class)` for each COFF symbol record."""
+    start = hdr.pointer_to_symbol_table
+    if start == 0 or hdr.number_of_symbols == 0:
+        return
+    str_start = start + (hdr.number_of_symbols * _COFF_SYM.size)
+    if str_start + 4 > len(data):
+        return
+    (str_size,) = _U32.unpack_from(data, str_start)
+    str_end = min(str_start + str_size, len(data))
+    idx = 0
+    while idx < hdr.number_of_symbols:
+        off = start + (idx * _COFF_SYM.size)
+        if off + _COFF_SYM.size > len(data):
+            return
+        raw_name, value, section_number, sym_type, storage_class, naux = _COFF_SYM.unpack_from(data, off)
+        if raw_name[:4] == b"\x00\x00\x00\x00":
+            (str_off,) = _U32.unpack_from(raw_name, 4)
+            name = read_cstring(data, str_start + str_off, str_end)
+        else:
+            name = raw_name.split(b"\x00", 1)[0].decode("ascii", errors="replace")
+        yield name, value, section_number, sym_type, storage_class
+        idx += 1 + naux
+
+
+def iter_runtime_functions(data: Buffer, hdr: PeHeader, sections: list[PeSection]) -> Iterator[tuple[int, int]]:
+    """Yield `(begin_rva, end_rva)` from the x64 exception directory (.pdata)."""
+    if hdr.machine != IMAGE_FILE_MACHINE_AMD64:
+        return
+    rva, size = data_directory(hdr, IMAGE_DIRECTORY_ENTRY_EXCEPTION)
+    offset = rva_to_offset(sections, rva) if rva else None
+    if offset is None:
+        return
+    end = min(offset + size, len(data))
+    for off in range(offset, end - _RUNTIME_FUNCTION.size + 1, _RUNTIME_FUNCTION.size):
+        begin, finish, _unwind = _RUNTIME_FUNCTION.unpack_from(data, off)
+        if begin == 0 and finish == 0:
+            return
+        yield begin, finish
+
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from dataclasses import dataclass
+
+from ..utils.mapping import Buffer
+from . import elf, macho, pe
+
+_ELF_BIND_TYPES = {elf.STB_LOCAL: "t", elf.STB_GLOBAL: "T", elf.STB_WEAK: "W"}
+_MACHO_N_STAB = 0xE0
+_MACHO_N_TYPE = 0x0E
+_MACHO_N_SECT = 0x0E
+_MACHO_N_EXT = 0x01
+_MACHO_N_WEAK_DEF = 0x0080
+_MACHO_S_ATTR_SOME_INSTRUCTIONS = 0x00000400
+_MACHO_S_ATTR_PURE_INSTRUCTIONS = 0x80000000
+
+
+@dataclass
+class Symbol:
+    address: int
+    symbol_type: str
+    name: str
+    size: int = 0
+
+
+def read_function_symbols(data: Buffer, file_type: str, arch: str | None = None) -> list[Symbol] | None:
+    """Function symbols sorted by address, with nm-style type letters; None when the format is not parseable."""
+    if file_type == "ELF":
+        symbols = _elf_symbols(data)
+    elif file_type == "PE":
+        symbols = _pe_symbols(data)
+    elif file_type == "Mach-O":
+        symbols = _macho_symbols(data, arch)
+    else:
+        return None
+    if symbols is not None:
+        symbols.sort(key=lambda s: (s.address, s.name))
+    return symbols
+
+
+def discover_functions(data: Buffer, file_type: str, arch: str | None = None) -> list[Symbol]:
+    """Unnamed functions from format metadata (PE .pdata, Mach-O LC_FUNCTION_STARTS) for stripped binaries."""
+    functions: list[Symbol] = []
+    code: list[tuple[int, int]] = []
+    if file_type == "PE":
+        hdr = pe.parse_header(data)
+        if hdr is None:
+            return []
+        sections = list(pe.iter_sections(data, hdr))
+        for begin, end in pe.iter_runtime_functions(data, hdr, sections):
+            address = hdr.image_base + begin
+            functions.append(Symbol(address=address, symbol_type="t", name=f"sub_{address:x}", size=end - begin))
+    elif file_type == "Mach-O":
+        hdr = macho.parse_slice(data, arch)
+        if hdr is None:
+            return []
+        for address in macho.function_starts(data, hdr):
+            functions.append(Symbol(address=address, symbol_type="t", name=f"sub_{address:x}"))
+        code = [
+            (sec.addr, sec.addr + sec.size)
+            for sec in macho.iter_sections(data, hdr)
+            if sec.flags & (_MACHO_S_ATTR_PURE_INSTRUCTIONS | _MACHO_S_ATTR_SOME_INSTRUCTIONS)
+        ]
+    functions.sort(key=lambda s: s.address)
+    _fill_sizes(functions, code, [])
+    return functions
+
+
+def _elf_symbols(data: Buffer) -> list[Symbol] | None:
+    hdr = elf.parse_header(data)
+    if hdr is None:
+        return None
+    headers = list(elf.iter_section_headers(data, hdr))
+    # Like nm, prefer the full .symtab and only use .dynsym for stripped binaries.
+    tables = [sh for sh in headers if sh.sh_type == elf.SHT_SYMTAB] or [
+        sh for sh in headers if sh.sh_type == elf.SHT_DYNSYM
+    ]
+    symbols: list[Symbol] = []
+    for table in tables:
+        for name, value, size, info, shndx in elf.iter_symbols(data, hdr, table):
+            if not name or shndx == elf.SHN_UNDEF or shndx >= elf.SHN_LORESERVE:
+                continue
+            sym_type = info & 0xF
+            if sym_type == elf.STT_NOTYPE:
+                # Assembly entry points carry no type; keep them when they sit in code, minus ARM mapping symbols.
+                if shndx >= len(headers) or not headers[shndx].sh_flags & elf.SHF_EXECINSTR or name.startswith("$"):
+                    continue
+            elif sym_type != elf.STT_FUNC:
+                continue
+            letter = _ELF_BIND_TYPES.get(info >> 4)
+            if letter is None:
+                continue
+            symbols.append(Symbol(address=value, symbol_type=letter, name=name, size=size))
+    return symbols
+
+
+def _pe_symbols(data: Buffer) -> list[Symbol] | None:
+    hdr = pe.parse_header(data)
+    if hdr is None:
+        return None
+    sections = list(pe.iter_sections(data, hdr))
+    symbols: list[Symbol] = []
+    seen: set[tuple[str, int]] = set()
+    for name, value, section_number, sym_type, storage_class in pe.iter_coff_symbols(data, hdr):
+        if section_number <= 0 or section_number > len(sections) or not name:
+            continue
+        if (sym_type >> 4) != pe.IMAGE_SYM_DTYPE_FUNCTION:
+            continue
+        if storage_class == pe.IMAGE_SYM_CLASS_EXTERNAL:
+            letter = "T"
+        elif storage_class == pe.IMAGE_SYM_CLASS_STATIC:
+            letter = "t"
+        else:
+            continue
+        address = hdr.image_base + sections[section_number - 1].virtual_address + value
+        if (name, address) not in seen:
+            seen.add((name, address))
+            symbols.append(Symbol(address=address, symbol_type=letter, name=name))
+    for name, rva in pe.iter_exports(data, hdr, sections):
+        address = hdr.image_base + rva
+        if name and (name, address) not in seen:
+            seen.add((name, address))
+            symbols.append(Symbol(address=address, symbol_type="T", name=name))
+
+    exact = {hdr.image_base + begin: end - begin for begin, end in pe.iter_runtime_functions(data, hdr, sections)}
+    for sym in symbols:
+        sym.size = exact.get(sym.address, 0)
+    code = [
+        (hdr.image_base + sec.virtual_address, hdr.image_base + sec.virtual_address + sec.virtual_size)
+        for sec in sections
+        if sec.characteristics & pe.IMAGE_SCN_MEM_EXECUTE
+    ]
+    _fill_sizes(symbols, code, [hdr.image_base + begin for begin in exact])
+    return symbols
+
+
+def _macho_symbols(data: Buffer, arch: str | None) -> list[Symbol] | None:
+    hdr = macho.parse_slice(data, arch)
+    if hdr is None:
+        return None
+    sections = list(macho.iter_sections(data, hdr))
+    code_sections = {
+        idx + 1
+        for idx, sec in enumerate(sections)
+        if sec.flags & (_MACHO_S_ATTR_PURE_INSTRUCTIONS | _MACHO_S_ATTR_SOME_INSTRUCTIONS)
+    }
+    symtab = macho.find_symtab(data, hdr)
+    symbols: list[Symbol] = []
+    if symtab is not None:
+        seen: set[tuple[str, int]] = set()
+        for name, n_type, n_sect, n_desc, n_value in macho.iter_nlist(data, hdr, symtab):
+            if n_type & _MACHO_N_STAB or (n_type & _MACHO_N_TYPE) != _MACHO_N_SECT or n_sect not in code_sections:
+                continue
+            if not name or (name, n_value) in seen:
+                continue
+            seen.add((name, n_value))
+            if n_desc & _MACHO_N_WEAK_DEF:
+                letter = "W"
+            else:
+                letter = "T" if n_type & _MACHO_N_EXT else "t"
+            symbols.append(Symbol(address=n_value, symbol_type=letter, name=name))
+    code = [(sections[idx - 1].addr, sections[idx - 1].addr + sections[idx - 1].size) for idx in sorted(code_sections)]
+    _fill_sizes(symbols, code, macho.function_starts(data, hdr))
+    return symbols
+
+
+def _fill_sizes(symbols: list[Symbol], code: list[tuple[int, int]], starts: list[int]) -> None:
+    # Formats without symbol sizes: a function runs to the next known start or the end of its section.
+    boundaries = sorted({s.address for s in symbols} | set(starts) | {end for _start, end in code})
+    for sym in symbols:
+        if sym.size:
+            continue
+        section_end = next((end for start, end in code if start <= sym.address < end), None)
+        if section_end is None:
+            continue
+        pos = bisect_right(boundaries, sym.address)
+        if pos < len(boundaries):
+            sym.size = min(boundaries[pos], section_end) - sym.address
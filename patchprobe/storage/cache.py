@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .object_store import get_object_store
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def cache_key(*parts: object) -> str:
+    joined = "::".join(str(p) for p in parts).encode("utf-8")
+    return hashlib.sha256(joined).hexdigest()
+
+
+@dataclass
+class JsonCache:
+    """Persistent JSON cache under the object store root, evicted least-recently-used by size."""
+
+    root: Path
+    namespace: str
+    max_bytes: int = DEFAULT_MAX_BYTES
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    @property
+    def directory(self) -> Path:
+        return self.root / self.namespace
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> object | None:
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            # mtime doubles as the last-access time for eviction.
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: object) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(value, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def evict(self) -> int:
+        if not self.directory.exists():
+            return 0
+        entries = []
+        total = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        removed = 0
+        if total > self.max_bytes:
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+        with self._lock:
+            self.evicted += removed
+        return removed
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 6) if lookups else 0.0,
+            "evicted": self.evicted,
+        }
+
+
+def get_cache(cfg: dict, namespace: str, default_max_bytes: int = DEFAULT_MAX_BYTES) -> JsonCache | None:
+    cache_cfg = cfg.get("cache", {}) if isinstance(cfg, dict) else {}
+    if not isinstance(cache_cfg, dict) or cache_cfg.get("enabled", True) is False:
+        return None
+    ns_cfg = cache_cfg.get(namespace, {})
+    if not isinstance(ns_cfg, dict):
+        ns_cfg = {}
+    if ns_cfg.get("enabled", True) is False:
+        return None
+    store = get_object_store(cfg)
+    return JsonCache(
+        root=Path(store.local_path("cache")),
+        namespace=namespace,
+        max_bytes=int(ns_cfg.get("max_bytes", default_max_bytes)),
+    )
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
+import os
+import shutil
+import uuid
 from pathlib import Path
 
+# Linux FICLONE ioctl: share extents copy-on-write (btrfs, XFS, bcachefs, ...).
+_FICLONE = 0x40049409
+
 
 def write_bytes(root: str, rel_path: str, data: bytes) -> str:
     path = Path(root) / rel_path
@@ -13,3 +19,45 @@ def write_bytes(root: str, rel_path: str, data: bytes) -> str:
 def read_bytes(root: str, rel_path: str) -> bytes:
     path = Path(root) / rel_path
     return path.read_bytes()
+
+
+def link_file(root: str, rel_path: str, src: Path) -> tuple[str, str]:
+    """Place `src` at `rel_path`, preferring a reflink, then a hardlink, then a copy.
+
+    Returns the stored path and the method used. An existing object is kept as is.
+    """
+    path = Path(root) / rel_path
+    if path.exists():
+        return str(path), "existing"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        if _reflink(src, tmp):
+            method = "reflink"
+        else:
+            try:
+                os.link(src, tmp)
+                method = "hardlink"
+            except OSError:
+                shutil.copyfile(src, tmp)
+                method = "copy"
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    return str(path), method
+
+
+def _reflink(src: Path, dst: Path) -> bool:
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    with src.open("rb") as s, dst.open("wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+            return True
+        except OSError:
+            pass
+    dst.unlink()
+    return False
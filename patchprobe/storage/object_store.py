@@ -1,22 +1,29 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Protocol
 
-from .filesystem_store import read_bytes, write_bytes
+from .filesystem_store import link_file, read_bytes, write_bytes
 
 
 class ObjectStore(Protocol):
     def put(self, rel_path: str, data: bytes) -> str:
         ...
 
+    def put_file(self, rel_path: str, src: Path) -> tuple[str, str]:
+        ...
+
     def get(self, rel_path: str) -> bytes:
         ...
 
     def exists(self, rel_path: str) -> bool:
         ...
 
+    def local_path(self, rel_path: str) -> str:
+        ...
+
 
 @dataclass
 class FilesystemObjectStore:
@@ -25,17 +32,31 @@ class FilesystemObjectStore:
     def put(self, rel_path: str, data: bytes) -> str:
         return write_bytes(self.root, rel_path, data)
 
+    def put_file(self, rel_path: str, src: Path) -> tuple[str, str]:
+        return link_file(self.root, rel_path, src)
+
     def get(self, rel_path: str) -> bytes:
         return read_bytes(self.root, rel_path)
 
     def exists(self, rel_path: str) -> bool:
         return (Path(self.root) / rel_path).exists()
 
+    def local_path(self, rel_path: str) -> str:
+        return str(Path(self.root) / rel_path)
+
+
+def binary_key(sha256: str) -> str:
+    return f"binaries/{sha256[:2]}/{sha256[2:4]}/{sha256}/raw"
+
+
+def binary_metadata_key(sha256: str) -> str:
+    return f"binaries/{sha256[:2]}/{sha256[2:4]}/{sha256}/metadata.json"
+
 
 def get_object_store(cfg: dict) -> ObjectStore:
     storage = cfg.get("storage", {}) if isinstance(cfg, dict) else {}
     storage_type = str(storage.get("type", "filesystem")).lower()
     if storage_type != "filesystem":
         raise ValueError(f"unsupported storage type: {storage_type}")
-    root = str(storage.get("root", "~/.patchdiff"))
+    root = os.path.expanduser(str(storage.get("root", "~/.patchdiff")))
     return FilesystemObjectStore(root=root)
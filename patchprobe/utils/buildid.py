@@ -2,34 +2,46 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from ..formats import macho
+from ..formats.elf import find_gnu_build_id
+from ..formats.pe import find_codeview_guid_age
+from .mapping import Buffer, map_file
 
-def extract_build_id(path: Path, file_type: str) -> str | None:
-    data = path.read_bytes()
+
+def extract_build_id(path: Path, file_type: str, arch: str | None = None) -> str | None:
+    with map_file(path) as data:
+        return extract_build_id_from_buffer(data, file_type, arch)
+
+
+def extract_build_id_from_buffer(data: Buffer, file_type: str, arch: str | None = None) -> str | None:
     if file_type == "ELF":
         return _extract_elf_build_id(data)
     if file_type == "PE":
         return _extract_pe_debug_id(data)
+    if file_type == "Mach-O":
+        return _extract_macho_uuid(data, arch)
     return None
 
 
-def _extract_elf_build_id(data: bytes) -> str | None:
-    marker = b"GNU\x00"
-    idx = data.find(marker)
-    if idx < 0:
+def _extract_elf_build_id(data: Buffer) -> str | None:
+    build_id = find_gnu_build_id(data)
+    if build_id is None:
         return None
-    # Heuristic: build-id bytes follow ELF GNU note payload. Read up to 20 bytes.
-    start = idx + len(marker)
-    candidate = data[start:start + 20]
-    if len(candidate) < 8:
+    return build_id.hex()
+
+
+def _extract_pe_debug_id(data: Buffer) -> str | None:
+    guid_age = find_codeview_guid_age(data)
+    if guid_age is None:
         return None
-    return candidate.hex()
+    return guid_age.hex()
 
 
-def _extract_pe_debug_id(data: bytes) -> str | None:
-    idx = data.find(b"RSDS")
-    if idx < 0 or idx + 24 > len(data):
+def _extract_macho_uuid(data: Buffer, arch: str | None) -> str | None:
+    hdr = macho.parse_slice(data, arch)
+    if hdr is None:
         return None
-    guid_age = data[idx + 4:idx + 24]
-    if len(guid_age) != 20:
+    uuid = macho.find_uuid(data, hdr)
+    if uuid is None:
         return None
-    return guid_age.hex()
+    return uuid.hex()
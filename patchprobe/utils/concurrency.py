@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Sequence, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _timed(fn: Callable[[T], R], item: T) -> tuple[R, float]:
+    start = time.perf_counter()
+    result = fn(item)
+    return result, time.perf_counter() - start
+
+
+def map_timed(
+    fn: Callable[[T], R], items: Sequence[T], max_workers: int = 2, *, processes: bool = False
+) -> tuple[list[R], dict]:
+    """Run `fn` over `items` in a thread pool, returning results in input order plus timings.
+
+    With `processes=True` a process pool is used instead; `fn` and the items must then be picklable.
+    `speedup` is the summed per-item time over the measured wall time. Per-item
+    times grow when workers contend for CPU or disk, so compare `wall_seconds`
+    across runs with `workers: 1` for an absolute baseline.
+    """
+    workers = max(1, min(max_workers, len(items)))
+    wall_start = time.perf_counter()
+    if workers == 1:
+        outcomes = [_timed(fn, item) for item in items]
+    else:
+        executor = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with executor(max_workers=workers) as pool:
+            outcomes = list(pool.map(partial(_timed, fn), items))
+    wall = time.perf_counter() - wall_start
+    serial = sum(elapsed for _, elapsed in outcomes)
+    timing = {
+        "workers": workers,
+        "item_seconds": [round(elapsed, 6) for _, elapsed in outcomes],
+        "serial_seconds": round(serial, 6),
+        "wall_seconds": round(wall, 6),
+        "speedup": round(serial / wall, 3) if wall > 0 else 1.0,
+    }
+    return [result for result, _ in outcomes], timing
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from pathlib import Path
 
+from ..formats import macho
+from .mapping import Buffer, map_file
+
 _ELF_MAGIC = b"\x7fELF"
 _MACHO_MAGICS = {
     b"\xfe\xed\xfa\xce",  # MH_MAGIC
@@ -18,27 +21,26 @@ _ELF_EM = {
     0xB7: "arm64",
     0x08: "mips",
 }
-_MACHO_CPU = {
-    0x00000007: "x86",
-    0x01000007: "x64",
-    0x0000000C: "arm",
-    0x0100000C: "arm64",
-}
 
 
-def detect_filetype_and_arch(path: Path) -> tuple[str, str]:
-    data = path.read_bytes()[:64]
-    if data.startswith(b"MZ"):
-        return "PE", _detect_pe_arch(path)
-    if data.startswith(_ELF_MAGIC):
-        return "ELF", _detect_elf_arch(data)
-    if data[:4] in _MACHO_MAGICS:
-        return "Mach-O", _detect_macho_arch(data)
+def detect_filetype_and_arch(path: Path, arch: str | None = None) -> tuple[str, str]:
+    with map_file(path) as data:
+        return detect_filetype_and_arch_from_buffer(data, arch)
+
+
+def detect_filetype_and_arch_from_buffer(data: Buffer, arch: str | None = None) -> tuple[str, str]:
+    # `arch` only picks a slice of a universal Mach-O; other formats have a single arch.
+    head = data[:64]
+    if head.startswith(b"MZ"):
+        return "PE", _detect_pe_arch(data)
+    if head.startswith(_ELF_MAGIC):
+        return "ELF", _detect_elf_arch(head)
+    if head[:4] in _MACHO_MAGICS:
+        return "Mach-O", _detect_macho_arch(data, arch)
     return "unknown", "unknown"
 
 
-def _detect_pe_arch(path: Path) -> str:
-    data = path.read_bytes()
+def _detect_pe_arch(data: Buffer) -> str:
     if len(data) < 0x3C + 4:
         return "unknown"
     pe_offset = int.from_bytes(data[0x3C:0x40], "little")
@@ -57,14 +59,13 @@ def _detect_pe_arch(path: Path) -> str:
 def _detect_elf_arch(data: bytes) -> str:
     if len(data) < 0x14:
         return "unknown"
-    e_machine = int.from_bytes(data[18:20], "little")
+    endian = "big" if data[5] == 2 else "little"
+    e_machine = int.from_bytes(data[18:20], endian)
     return _ELF_EM.get(e_machine, "unknown")
 
 
-def _detect_macho_arch(data: bytes) -> str:
-    if len(data) < 8:
+def _detect_macho_arch(data: Buffer, arch: str | None) -> str:
+    hdr = macho.parse_slice(data, arch)
+    if hdr is None:
         return "unknown"
-    magic = data[:4]
-    endian = "little" if magic in {b"\xce\xfa\xed\xfe", b"\xcf\xfa\xed\xfe", b"\xbe\xba\xfe\xca"} else "big"
-    cputype = int.from_bytes(data[4:8], endian, signed=False)
-    return _MACHO_CPU.get(cputype, "unknown")
+    return hdr.arch
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import hashlib
+import mmap
+from dataclasses import dataclass
+from pathlib import Path
+
+from .buildid import extract_build_id_from_buffer
+from .filetype import detect_filetype_and_arch_from_buffer
+from .mapping import Buffer, map_file
+
+
+@dataclass
+class BinaryInspection:
+    path: str
+    sha256: str
+    file_type: str
+    arch: str
+    build_id: str | None
+    size_bytes: int
+
+
+def inspect_binary(path: Path, arch: str | None = None) -> BinaryInspection:
+    with map_file(path) as data:
+        return inspect_buffer(path, data, arch)
+
+
+def inspect_buffer(path: Path, data: Buffer, arch: str | None = None) -> BinaryInspection:
+    # Header parsing only touches the first pages; hashing is the single full pass.
+    file_type, arch = detect_filetype_and_arch_from_buffer(data, arch)
+    build_id = extract_build_id_from_buffer(data, file_type, arch)
+    if isinstance(data, mmap.mmap) and hasattr(mmap, "MADV_SEQUENTIAL"):
+        data.madvise(mmap.MADV_SEQUENTIAL)
+    sha256 = hashlib.sha256(data).hexdigest()
+    return BinaryInspection(
+        path=str(path),
+        sha256=sha256,
+        file_type=file_type,
+        arch=arch,
+        build_id=build_id,
+        size_bytes=len(data),
+    )
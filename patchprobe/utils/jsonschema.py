@@ -1,22 +1,37 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from pathlib import Path
 
-from jsonschema import validate
+from jsonschema.exceptions import best_match
+from jsonschema.validators import validator_for
 
 
-def validate_file(schema_path: str, data_path: str) -> None:
+@lru_cache(maxsize=None)
+def _validator(schema_path: str):
+    # Schemas are read and checked once per process; batch runs and list payloads
+    # validate many instances against the same schema.
     schema = json.loads(Path(schema_path).read_text(encoding="utf-8"))
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def _validate(schema_path: str, instance: object) -> None:
+    error = best_match(_validator(str(schema_path)).iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+def validate_file(schema_path: str, data_path: str) -> None:
     data = json.loads(Path(data_path).read_text(encoding="utf-8"))
-    validate(instance=data, schema=schema)
+    _validate(schema_path, data)
 
 
 def validate_data(schema_path: str, data: dict) -> None:
-    schema = json.loads(Path(schema_path).read_text(encoding="utf-8"))
-    validate(instance=data, schema=schema)
+    _validate(schema_path, data)
 
 
 def validate_instance(schema_path: str, instance: object) -> None:
-    schema = json.loads(Path(schema_path).read_text(encoding="utf-8"))
-    validate(instance=instance, schema=schema)
+    _validate(schema_path, instance)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import mmap
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+# Read-only binary buffer accepted by the header parsers: a whole-file `bytes`
+# object or a lazily paged `mmap`.
+Buffer = Union[bytes, mmap.mmap]
+
+
+@contextmanager
+def map_file(path: Path) -> Iterator[Buffer]:
+    # Zero-length files cannot be mapped; they are yielded as empty bytes.
+    with path.open("rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield b""
+            return
+        try:
+            yield mm
+        finally:
+            mm.close()
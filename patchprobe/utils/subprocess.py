@@ -1,8 +1,10 @@
 from __future__ import annotations
 
 import subprocess
-from typing import Sequence
+from typing import Mapping, Sequence
 
 
-def run_command(cmd: Sequence[str], timeout: int | None = None, cwd: str | None = None) -> subprocess.CompletedProcess:
-    return subprocess.run(cmd, timeout=timeout, cwd=cwd, check=False, capture_output=True, text=True)
+def run_command(
+    cmd: Sequence[str], timeout: int | None = None, cwd: str | None = None, env: Mapping[str, str] | None = None
+) -> subprocess.CompletedProcess:
+    return subprocess.run(cmd, timeout=timeout, cwd=cwd, env=env, check=False, capture_output=True, text=True)
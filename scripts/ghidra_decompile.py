@@ -1,70 +1,85 @@
-# Headless Ghidra post-script for extracting pseudocode for a function name.
+# Headless Ghidra post-script for extracting pseudocode for a batch of functions.
 # Script args:
-#   1) function_name
-#   2) output_json_path
-#   3) output_txt_path
-#   4) timeout_sec (optional, currently informational)
+#   1) targets_json_path: JSON list of {"function_name", "address", "output_json", "output_txt"}
+#   2) timeout_sec (optional, per function)
 
 import json
+import os
 
 from ghidra.app.decompiler import DecompInterface
 
 
-def _find_function(function_name):
+def _function_index(names):
+    # One pass over the function manager for all targets; the first function with a name wins.
+    index = {}
     fm = currentProgram.getFunctionManager()
-    funcs = fm.getFunctions(True)
-    for f in funcs:
+    for f in fm.getFunctions(True):
         name = f.getName()
-        if name == function_name or name == "_" + function_name:
-            return f
-    return None
+        for candidate in (name, name[1:] if name.startswith("_") else None):
+            if candidate in names and candidate not in index:
+                index[candidate] = f
+    return index
+
+
+def _find_function(index, target):
+    f = index.get(target["function_name"])
+    if f is None and target.get("address") is not None:
+        f = currentProgram.getFunctionManager().getFunctionAt(toAddr(target["address"]))
+    return f
 
 
 def _write(path, text):
+    parent = os.path.dirname(path)
+    if parent and not os.path.isdir(parent):
+        os.makedirs(parent)
     with open(path, "w") as fh:
         fh.write(text)
 
 
 args = getScriptArgs()
-if len(args) < 3:
-    raise RuntimeError("expected args: <function_name> <output_json_path> <output_txt_path> [timeout_sec]")
+if len(args) < 1:
+    raise RuntimeError("expected args: <targets_json_path> [timeout_sec]")
+
+with open(args[0]) as fh:
+    targets = json.load(fh)
+timeout_sec = int(args[1]) if len(args) > 1 else 60
 
-function_name = args[0]
-output_json_path = args[1]
-output_txt_path = args[2]
-timeout_sec = int(args[3]) if len(args) > 3 else 60
+index = _function_index(set(t["function_name"] for t in targets))
+iface = DecompInterface()
+iface.openProgram(currentProgram)
+
+for target in targets:
+    function_name = target["function_name"]
+    f = _find_function(index, target)
+    if f is None:
+        payload = {
+            "status": "function_not_found",
+            "function_name": function_name,
+            "prototype": None,
+            "decompile_time_sec": 0,
+        }
+        _write(target["output_json"], json.dumps(payload))
+        _write(target["output_txt"], "/* function not found */\n")
+        print("function not found: " + function_name)
+        continue
+
+    res = iface.decompileFunction(f, timeout_sec, monitor)
+    prototype = str(f.getSignature())
+    status = "ok"
+    if res is not None and res.decompileCompleted():
+        pseudo = res.getDecompiledFunction().getC()
+    else:
+        status = "decompile_failed"
+        pseudo = "/* decompile failed */\n"
 
-target = _find_function(function_name)
-if target is None:
     payload = {
-        "status": "function_not_found",
+        "status": status,
         "function_name": function_name,
-        "prototype": None,
-        "decompile_time_sec": 0,
+        "prototype": prototype,
+        "decompile_time_sec": timeout_sec,
     }
-    _write(output_json_path, json.dumps(payload))
-    _write(output_txt_path, "/* function not found */\n")
-    print("function not found: " + function_name)
-    exit()
+    _write(target["output_json"], json.dumps(payload))
+    _write(target["output_txt"], pseudo)
+    print("decompiled: " + function_name)
 
-iface = DecompInterface()
-iface.openProgram(currentProgram)
-res = iface.decompileFunction(target, timeout_sec, monitor)
-pseudo = ""
-prototype = str(target.getSignature())
-status = "ok"
-if res is not None and res.decompileCompleted():
-    pseudo = res.getDecompiledFunction().getC()
-else:
-    status = "decompile_failed"
-    pseudo = "/* decompile failed */\n"
-
-payload = {
-    "status": status,
-    "function_name": function_name,
-    "prototype": prototype,
-    "decompile_time_sec": timeout_sec,
-}
-_write(output_json_path, json.dumps(payload))
-_write(output_txt_path, pseudo)
-print("decompiled: " + function_name)
+iface.dispose()
@@ -0,0 +1,101 @@
+# Headless Ghidra post-script that keeps the program open and serves decompile requests.
+# Script args:
+#   1) host:port of the patchprobe worker pool to connect back to
+#   2) per-function decompile timeout in seconds
+#
+# Protocol: JSON lines. The worker sends {"event": "ready", "program": name}, then answers each
+# {"id", "op"} request with {"id", "ok", ...}:
+#   ping                         -> {"ok": true}
+#   decompile (target)           -> {"ok": true, "status", "prototype"}; outputs go to the target's paths
+#   shutdown                     -> {"ok": true}, then the script returns and Ghidra exits
+
+import json
+import os
+import socket
+
+from ghidra.app.decompiler import DecompInterface
+
+
+def _function_index():
+    # Built once at startup so each request is a dict lookup; the first function with a name wins.
+    index = {}
+    for f in currentProgram.getFunctionManager().getFunctions(True):
+        name = f.getName()
+        for candidate in (name, name[1:] if name.startswith("_") else None):
+            if candidate is not None and candidate not in index:
+                index[candidate] = f
+    return index
+
+
+def _find_function(index, target):
+    f = index.get(target["function_name"])
+    if f is None and target.get("address") is not None:
+        f = currentProgram.getFunctionManager().getFunctionAt(toAddr(target["address"]))
+    return f
+
+
+def _write(path, text):
+    parent = os.path.dirname(path)
+    if parent and not os.path.isdir(parent):
+        os.makedirs(parent)
+    with open(path, "w") as fh:
+        fh.write(text)
+
+
+def _decompile(iface, index, target, timeout_sec):
+    f = _find_function(index, target)
+    if f is None:
+        _write(target["output_txt"], "/* function not found */\n")
+        status, prototype = "function_not_found", None
+    else:
+        res = iface.decompileFunction(f, timeout_sec, monitor)
+        prototype = str(f.getSignature())
+        if res is not None and res.decompileCompleted():
+            status = "ok"
+            _write(target["output_txt"], res.getDecompiledFunction().getC())
+        else:
+            status = "decompile_failed"
+            _write(target["output_txt"], "/* decompile failed */\n")
+    payload = {"status": status, "function_name": target["function_name"], "prototype": prototype}
+    _write(target["output_json"], json.dumps(payload))
+    return payload
+
+
+args = getScriptArgs()
+if len(args) < 1:
+    raise RuntimeError("expected args: <host:port>")
+host, port = args[0].rsplit(":", 1)
+timeout_sec = int(args[1]) if len(args) > 1 else 60
+
+conn = socket.create_connection((host, int(port)))
+reader = conn.makefile("r")
+
+
+def _send(message):
+    conn.sendall(json.dumps(message) + "\n")
+
+
+index = _function_index()
+iface = DecompInterface()
+iface.openProgram(currentProgram)
+_send({"event": "ready", "program": currentProgram.getName()})
+
+while True:
+    line = reader.readline()
+    if not line:
+        break
+    request = json.loads(line)
+    op = request.get("op")
+    if op == "ping":
+        _send({"id": request["id"], "ok": True})
+    elif op == "decompile":
+        payload = _decompile(iface, index, request["target"], timeout_sec)
+        _send({"id": request["id"], "ok": True, "status": payload["status"], "prototype": payload["prototype"]})
+    elif op == "shutdown":
+        _send({"id": request["id"], "ok": True})
+        break
+    else:
+        _send({"id": request.get("id"), "ok": False, "error": "unknown op: %s" % op})
+
+iface.dispose()
+conn.close()
@@ -2,24 +2,29 @@
 set -euo pipefail
 
 # Usage:
-#   run_ghidra_headless.sh <ghidra_project_dir> <binary_path> <script_path> <function_name> <output_json> <output_txt> <timeout_sec>
-
-if [[ $# -lt 7 ]]; then
-  echo "usage: $0 <ghidra_project_dir> <binary_path> <script_path> <function_name> <output_json> <output_txt> <timeout_sec>" >&2
+#   run_ghidra_headless.sh <ghidra_project_dir> <binary_path> <script_path> <targets_json> <timeout_sec> [mode]
+#
+# <targets_json> is a JSON list of {"function_name", "address", "output_json", "output_txt"} objects.
+# The binary is imported and analyzed once and every target is decompiled in the same session.
+#
+# mode:
+#   temp     import and analyze into a throwaway project (default)
+#   import   import and analyze, keeping the project for later `process` runs
+#   process  open the already analyzed program named <binary_path> with -noanalysis
+
+if [[ $# -lt 5 ]]; then
+  echo "usage: $0 <ghidra_project_dir> <binary_path> <script_path> <targets_json> <timeout_sec> [temp|import|process]" >&2
   exit 2
 fi
 
 ghidra_project_dir="$1"
 binary_path="$2"
 script_path="$3"
-function_name="$4"
-output_json="$5"
-output_txt="$6"
-timeout_sec="$7"
+targets_json="$4"
+timeout_sec="$5"
+mode="${6:-temp}"
 
 mkdir -p "$ghidra_project_dir"
-mkdir -p "$(dirname "$output_json")"
-mkdir -p "$(dirname "$output_txt")"
 
 analyze_headless_bin=""
 if [[ -n "${PATCHDIFF_GHIDRA_ANALYZE_HEADLESS:-}" ]]; then
@@ -39,11 +44,20 @@ project_name="PatchProbeHeadless"
 script_dir="$(dirname "$script_path")"
 script_name="$(basename "$script_path")"
 
+case "$mode" in
+  temp) program_args=(-import "$binary_path" -deleteProject) ;;
+  import) program_args=(-import "$binary_path") ;;
+  process) program_args=(-process "$binary_path" -noanalysis -readOnly) ;;
+  *)
+    echo "unknown mode: $mode" >&2
+    exit 2
+    ;;
+esac
+
 # Timeout is controlled by the caller (Python subprocess timeout) for portability.
 "$analyze_headless_bin" \
   "$ghidra_project_dir" \
   "$project_name" \
-  -import "$binary_path" \
+  "${program_args[@]}" \
   -scriptPath "$script_dir" \
-  -postScript "$script_name" "$function_name" "$output_json" "$output_txt" "$timeout_sec" \
-  -deleteProject
+  -postScript "$script_name" "$targets_json" "$timeout_sec"
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _isolated_home(monkeypatch, tmp_path_factory) -> None:
+    # The default storage root is ~/.patchdiff; keep test runs out of the real home directory.
+    monkeypatch.setenv("HOME", str(tmp_path_factory.mktemp("home")))
@@ -0,0 +1,335 @@
+"""Builders for small synthetic ELF, PE and Mach-O images used by the format parser tests."""
+
+from __future__ import annotations
+
+import struct
+from dataclasses import dataclass, field
+
+SHT_PROGBITS = 1
+SHT_SYMTAB = 2
+SHT_STRTAB = 3
+SHT_NOTE = 7
+SHT_NOBITS = 8
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+PT_LOAD = 1
+PT_NOTE = 4
+
+
+@dataclass
+class Section:
+    name: str
+    data: bytes = b""
+    sh_type: int = SHT_PROGBITS
+    addr: int = 0
+    flags: int = SHF_ALLOC
+    link: int = 0
+    info: int = 0
+    entsize: int = 0
+
+
+@dataclass
+class Sym:
+    name: str
+    value: int
+    size: int
+    section: str
+    bind: int = 1  # STB_GLOBAL
+    sym_type: int = 2  # STT_FUNC
+
+
+@dataclass
+class ElfSpec:
+    sections: list[Section] = field(default_factory=list)
+    symbols: list[Sym] = field(default_factory=list)
+    elf_class: int = 64
+    endian: str = "<"
+    machine: int = 0x3E
+    note_segments: bool = True
+
+
+def gnu_note(n_type: int, desc: bytes, endian: str = "<") -> bytes:
+    name = b"GNU\x00"
+    pad = (-len(desc)) % 4
+    return struct.pack(endian + "III", len(name), len(desc), n_type) + name + desc + (b"\x00" * pad)
+
+
+def build_elf(spec: ElfSpec) -> bytes:
+    e = spec.endian
+    is64 = spec.elf_class == 64
+    sections = list(spec.sections)
+    if spec.symbols:
+        strtab = bytearray(b"\x00")
+        sym_fmt = struct.Struct(e + ("IBBHQQ" if is64 else "IIIBBH"))
+        symtab = bytearray(sym_fmt.size)
+        names = ["", *[s.name for s in sections], ".symtab", ".strtab", ".shstrtab"]
+        for sym in spec.symbols:
+            name_off = len(strtab)
+            strtab += sym.name.encode() + b"\x00"
+            shndx = names.index(sym.section)
+            info = (sym.bind << 4) | sym.sym_type
+            if is64:
+                symtab += sym_fmt.pack(name_off, info, 0, shndx, sym.value, sym.size)
+            else:
+                symtab += sym_fmt.pack(name_off, sym.value, sym.size, info, 0, shndx)
+        strtab_index = len(sections) + 2
+        sections.append(
+            Section(".symtab", bytes(symtab), SHT_SYMTAB, flags=0, link=strtab_index, info=1, entsize=sym_fmt.size)
+        )
+        sections.append(Section(".strtab", bytes(strtab), SHT_STRTAB, flags=0))
+
+    shstrtab = bytearray(b"\x00")
+    name_offsets = []
+    for sec in sections + [Section(".shstrtab")]:
+        name_offsets.append(len(shstrtab))
+        shstrtab += sec.name.encode() + b"\x00"
+    sections.append(Section(".shstrtab", bytes(shstrtab), SHT_STRTAB, flags=0))
+
+    ehsize = 64 if is64 else 52
+    phentsize = 56 if is64 else 32
+    shentsize = 64 if is64 else 40
+    notes = [s for s in sections if s.sh_type == SHT_NOTE] if spec.note_segments else []
+    phnum = len(notes)
+    body = bytearray()
+    offset = ehsize + (phentsize * phnum)
+    offsets = []
+    for sec in sections:
+        pad = (-(offset + len(body))) % 8
+        body += b"\x00" * pad
+        offsets.append(offset + len(body))
+        if sec.sh_type != SHT_NOBITS:
+            body += sec.data
+    pad = (-(offset + len(body))) % 8
+    body += b"\x00" * pad
+    shoff = offset + len(body)
+
+    phdrs = bytearray()
+    for sec in notes:
+        off = offsets[sections.index(sec)]
+        if is64:
+            phdrs += struct.pack(e + "IIQQQQQQ", PT_NOTE, 4, off, sec.addr, sec.addr, len(sec.data), len(sec.data), 4)
+        else:
+            phdrs += struct.pack(e + "IIIIIIII", PT_NOTE, off, sec.addr, sec.addr, len(sec.data), len(sec.data), 4, 4)
+
+    shdrs = bytearray(shentsize)
+    for idx, sec in enumerate(sections):
+        if is64:
+            shdrs += struct.pack(
+                e + "IIQQQQIIQQ",
+                name_offsets[idx], sec.sh_type, sec.flags, sec.addr, offsets[idx], len(sec.data),
+                sec.link, sec.info, 8, sec.entsize,
+            )
+        else:
+            shdrs += struct.pack(
+                e + "IIIIIIIIII",
+                name_offsets[idx], sec.sh_type, sec.flags, sec.addr, offsets[idx], len(sec.data),
+                sec.link, sec.info, 4, sec.entsize,
+            )
+
+    ident = b"\x7fELF" + bytes([2 if is64 else 1, 1 if e == "<" else 2, 1]) + b"\x00" * 9
+    phoff = ehsize if phnum else 0
+    if is64:
+        ehdr = struct.pack(
+            e + "HHIQQQIHHHHHH", 2, spec.machine, 1, 0, phoff, shoff, 0, ehsize, phentsize, phnum, shentsize,
+            len(sections) + 1, len(sections),
+        )
+    else:
+        ehdr = struct.pack(
+            e + "HHIIIIIHHHHHH", 2, spec.machine, 1, 0, phoff, shoff, 0, ehsize, phentsize, phnum, shentsize,
+            len(sections) + 1, len(sections),
+        )
+    return ident + ehdr + bytes(phdrs) + bytes(body) + bytes(shdrs)
+
+
+@dataclass
+class PeSection:
+    name: str
+    data: bytes
+    virtual_address: int
+    characteristics: int = 0x60000020
+
+
+def build_pe(
+    sections: list[PeSection],
+    *,
+    machine: int = 0x8664,
+    image_base: int = 0x140000000,
+    data_dirs: dict[int, tuple[int, int]] | None = None,
+) -> bytes:
+    is64 = machine in {0x8664, 0xAA64}
+    pe_offset = 0x80
+    opt_size = 240 if is64 else 224
+    header_end = pe_offset + 24 + opt_size + (40 * len(sections))
+    raw = (header_end + 0x1FF) & ~0x1FF
+    layout = []
+    for sec in sections:
+        layout.append(raw)
+        raw += (len(sec.data) + 0x1FF) & ~0x1FF
+
+    out = bytearray(raw)
+    out[:2] = b"MZ"
+    struct.pack_into("<I", out, 0x3C, pe_offset)
+    out[pe_offset:pe_offset + 4] = b"PE\x00\x00"
+    struct.pack_into("<HHIIIHH", out, pe_offset + 4, machine, len(sections), 0, 0, 0, opt_size, 0x22)
+    opt = pe_offset + 24
+    if is64:
+        struct.pack_into("<H", out, opt, 0x20B)
+        struct.pack_into("<Q", out, opt + 24, image_base)
+        dirs = opt + 112
+        struct.pack_into("<I", out, opt + 108, 16)
+    else:
+        struct.pack_into("<H", out, opt, 0x10B)
+        struct.pack_into("<I", out, opt + 28, image_base)
+        dirs = opt + 96
+        struct.pack_into("<I", out, opt + 92, 16)
+    for index, (rva, size) in (data_dirs or {}).items():
+        struct.pack_into("<II", out, dirs + (8 * index), rva, size)
+    table = opt + opt_size
+    for idx, sec in enumerate(sections):
+        struct.pack_into(
+            "<8sIIIIIIHHI", out, table + (40 * idx),
+            sec.name.encode()[:8], len(sec.data), sec.virtual_address,
+            (len(sec.data) + 0x1FF) & ~0x1FF, layout[idx], 0, 0, 0, 0, sec.characteristics,
+        )
+        out[layout[idx]:layout[idx] + len(sec.data)] = sec.data
+    return bytes(out)
+
+
+def pe_with_codeview(guid_age: bytes, *, decoy: bool = True) -> bytes:
+    """PE image whose debug directory points at an RSDS record in .rdata."""
+    rdata_rva = 0x2000
+    text = b"\xc3" * 16
+    if decoy:
+        text += b"RSDS" + b"\xee" * 20
+    cv = b"RSDS" + guid_age + b"x.pdb\x00"
+    cv_off = 64
+    debug_dir = struct.pack("<IIHHIIII", 0, 0, 0, 0, 2, len(cv), rdata_rva + cv_off, 0)
+    rdata = bytearray(cv_off + len(cv))
+    rdata[:len(debug_dir)] = debug_dir
+    rdata[cv_off:] = cv
+    sections = [PeSection(".text", text, 0x1000), PeSection(".rdata", bytes(rdata), rdata_rva, 0x40000040)]
+    image = bytearray(build_pe(sections, data_dirs={6: (rdata_rva, 28)}))
+    # PointerToRawData is only known after layout, so patch it in afterwards.
+    rdata_raw = struct.unpack_from("<I", image, 0x80 + 24 + 240 + 40 + 20)[0]
+    struct.pack_into("<I", image, rdata_raw + 24, rdata_raw + cv_off)
+    return bytes(image)
+
+
+@dataclass
+class MachoSection:
+    segment: str
+    name: str
+    data: bytes
+    addr: int
+    flags: int = 0
+
+
+def _uleb128(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def build_macho(
+    sections: list[MachoSection],
+    *,
+    cputype: int = 0x0100000C,
+    is64: bool = True,
+    endian: str = "<",
+    uuid: bytes | None = None,
+    function_starts: list[int] | None = None,
+    symbols: list[tuple[str, int, int]] | None = None,
+) -> bytes:
+    """Thin image; `symbols` are `(name, n_sect, n_value)` external N_SECT entries."""
+    e = endian
+    segments: dict[str, list[MachoSection]] = {}
+    for sec in sections:
+        segments.setdefault(sec.segment, []).append(sec)
+    seg_size = 72 if is64 else 56
+    sect_size = 80 if is64 else 68
+    cmds_size = sum(seg_size + (sect_size * len(secs)) for secs in segments.values())
+    cmds_size += 24 if uuid is not None else 0
+    cmds_size += 16 if function_starts is not None else 0
+    cmds_size += 24 if symbols is not None else 0
+    header_size = 32 if is64 else 28
+    body = bytearray()
+    data_start = (header_size + cmds_size + 0xF) & ~0xF
+    offsets = []
+    for sec in sections:
+        offsets.append(data_start + len(body))
+        body += sec.data
+
+    cmds = bytearray()
+    idx = 0
+    for segname, secs in segments.items():
+        # Like ld64 output, segments start on a 64 KiB boundary below their first section.
+        vmaddr = secs[0].addr & ~0xFFFF
+        vmsize = max(s.addr + len(s.data) for s in secs) - vmaddr
+        fileoff = offsets[idx]
+        cmdsize = seg_size + (sect_size * len(secs))
+        fmt = "II16sQQQQiiII" if is64 else "II16sIIIIiiII"
+        cmd = 0x19 if is64 else 0x1
+        cmds += struct.pack(e + fmt, cmd, cmdsize, segname.encode(), vmaddr, vmsize, fileoff, vmsize, 7, 5, len(secs), 0)
+        for sec in secs:
+            fields = (sec.name.encode(), segname.encode(), sec.addr, len(sec.data), offsets[idx], 4, 0, 0, sec.flags, 0, 0)
+            if is64:
+                cmds += struct.pack(e + "16s16sQQIIIIIIII", *fields, 0)
+            else:
+                cmds += struct.pack(e + "16s16sIIIIIIIII", *fields)
+            idx += 1
+    ncmds = len(segments)
+    if uuid is not None:
+        cmds += struct.pack(e + "II16s", 0x1B, 24, uuid)
+        ncmds += 1
+    if function_starts is not None:
+        text_vmaddr = segments["__TEXT"][0].addr & ~0xFFFF
+        blob = bytearray()
+        prev = text_vmaddr
+        for addr in function_starts:
+            blob += _uleb128(addr - prev)
+            prev = addr
+        blob += b"\x00"
+        cmds += struct.pack(e + "IIII", 0x26, 16, data_start + len(body), len(blob))
+        body += blob
+        ncmds += 1
+    if symbols is not None:
+        strtab = bytearray(b"\x00")
+        nlist = bytearray()
+        for name, n_sect, n_value in symbols:
+            nlist += struct.pack(e + ("IBBHQ" if is64 else "IBBHI"), len(strtab), 0x0F, n_sect, 0, n_value)
+            strtab += name.encode() + b"\x00"
+        symoff = data_start + len(body)
+        body += nlist
+        cmds += struct.pack(e + "IIIIII", 0x2, 24, symoff, len(symbols), data_start + len(body), len(strtab))
+        body += strtab
+        ncmds += 1
+
+    magic = 0xFEEDFACF if is64 else 0xFEEDFACE
+    header = struct.pack(e + "IiiIIII", magic, cputype, 0, 2, ncmds, len(cmds), 0)
+    if is64:
+        header += b"\x00" * 4
+    image = header + bytes(cmds)
+    return image + b"\x00" * (data_start - len(image)) + bytes(body)
+
+
+def build_fat(slices: list[tuple[int, bytes]], align: int = 12) -> bytes:
+    """Universal binary from `(cputype, thin image)` pairs, each slice aligned to 2**align."""
+    out = bytearray(struct.pack(">II", 0xCAFEBABE, len(slices)))
+    table = bytearray()
+    offset = 1 << align
+    layout = []
+    for cputype, image in slices:
+        table += struct.pack(">iiIII", cputype, 0, offset, len(image), align)
+        layout.append(offset)
+        offset += (len(image) + (1 << align) - 1) & ~((1 << align) - 1)
+    out += table
+    for (_cputype, image), start in zip(slices, layout):
+        out += b"\x00" * (start - len(out))
+        out += image
+    return bytes(out)
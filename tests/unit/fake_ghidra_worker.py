@@ -0,0 +1,52 @@
+"""Stand-in for `ghidra_worker.py` speaking the same JSON-lines protocol, without Ghidra.
+
+Usage: fake_ghidra_worker.py <host:port> [program [project_dir mode]]. A target named `hang` never answers;
+`crash` exits. With a project, it behaves like analyzeHeadless: `process` fails unless the program was saved,
+and `import` saves it only on a clean shutdown. A program named `mute` connects but never reports ready.
+"""
+
+import json
+import os
+import socket
+import sys
+import time
+
+host, port = sys.argv[1].rsplit(":", 1)
+program = sys.argv[2] if len(sys.argv) > 2 else "fake"
+saved = os.path.join(sys.argv[3], program) if len(sys.argv) > 4 else None
+mode = sys.argv[4] if len(sys.argv) > 4 else "temp"
+if mode == "process" and not os.path.exists(saved):
+    sys.exit(1)
+conn = socket.create_connection((host, int(port)))
+reader = conn.makefile("r")
+if program == "mute":
+    time.sleep(3600)
+
+
+def send(message: dict) -> None:
+    conn.sendall((json.dumps(message) + "\n").encode("utf-8"))
+
+
+send({"event": "ready", "program": program})
+for line in reader:
+    request = json.loads(line)
+    if request["op"] == "ping":
+        send({"id": request["id"], "ok": True})
+    elif request["op"] == "decompile":
+        target = request["target"]
+        name = target["function_name"]
+        if name == "hang":
+            time.sleep(3600)
+        if name == "crash":
+            sys.exit(3)
+        prototype = f"int {name}(void)"
+        with open(target["output_txt"], "w", encoding="utf-8") as fh:
+            fh.write(f"{prototype} {{ /* worker {os.getpid()} */ return 0; }}\n")
+        with open(target["output_json"], "w", encoding="utf-8") as fh:
+            json.dump({"status": "ok", "prototype": prototype}, fh)
+        send({"id": request["id"], "ok": True, "status": "ok", "prototype": prototype, "pid": os.getpid()})
+    elif request["op"] == "shutdown":
+        send({"id": request["id"], "ok": True})
+        if saved is not None and mode == "import":
+            open(saved, "w").close()
+        break
@@ -0,0 +1,33 @@
+import json
+
+from patchprobe.backends.diff.analysis import BinaryAnalysis, FingerprintTable
+from patchprobe.backends.diff.fingerprint import Fingerprint
+from patchprobe.backends.diff.minhash import MinHashConfig
+from patchprobe.formats.symbols import Symbol
+
+
+def test_binary_analysis_round_trips_through_json() -> None:
+    main = Symbol(address=0x1000, symbol_type="T", name="main", size=32)
+    helper = Symbol(address=0x1020, symbol_type="t", name="helper", size=8)
+    analysis = BinaryAnalysis(
+        arch="x64",
+        symbols=[main, helper],
+        source="symtab",
+        discovered=[Symbol(address=0x1040, symbol_type="t", name="sub_1040", size=16)],
+        fingerprints=FingerprintTable({(0x1000, 32): Fingerprint(raw="r", masked="m", size=30)}),
+        calls={(0x1000, 32): [0x1020]},
+    )
+    config = MinHashConfig(num_perm=4, bands=2)
+    missing = analysis.missing_signatures([main, helper], config)
+    assert missing == [main]
+    analysis.add_signatures(missing, [(1, 2, 3, (1 << 64) - 1)])
+    assert analysis.dirty
+
+    loaded = BinaryAnalysis.from_json(json.loads(json.dumps(analysis.to_json())))
+    assert loaded.symbols == analysis.symbols
+    assert loaded.discovered == analysis.discovered
+    assert loaded.fingerprints.fingerprint(0x1000, 32) == Fingerprint(raw="r", masked="m", size=30)
+    assert loaded.calls == {(0x1000, 32): [0x1020]}
+    assert loaded.signature(main) == (1, 2, 3, (1 << 64) - 1)
+    assert loaded.missing_signatures([main, helper], config) == []
+    assert loaded.missing_signatures([main], MinHashConfig(num_perm=8, bands=2)) == [main]
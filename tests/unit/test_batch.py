@@ -0,0 +1,58 @@
+import json
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+from patchprobe.core.batch import load_manifest, run
+from patchprobe.errors import BatchError
+
+
+def _args(manifest: Path, summary: Path, workers: int) -> Namespace:
+    return Namespace(
+        manifest=str(manifest),
+        summary=str(summary),
+        workers=workers,
+        backend=None,
+        top=None,
+        timeout=5,
+        provider=None,
+        model=None,
+        max_rounds=None,
+        format="json",
+    )
+
+
+def test_batch_runs_every_row_and_records_failures(tmp_path: Path) -> None:
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    rows = [
+        {"a": str(a), "b": str(b), "out": str(tmp_path / "job1"), "tag": "kb1"},
+        {"a": str(tmp_path / "missing.bin"), "b": str(b), "out": str(tmp_path / "job2")},
+        {"a": str(b), "b": str(a), "out": str(tmp_path / "job3")},
+    ]
+    manifest = tmp_path / "pairs.jsonl"
+    manifest.write_text("\n".join(json.dumps(r) for r in rows) + "\n", encoding="utf-8")
+    summary_path = tmp_path / "summary.json"
+    cfg = {"storage": {"root": str(tmp_path / "store")}, "report": {"format": "json"}}
+
+    with pytest.raises(BatchError) as excinfo:
+        run(cfg, _args(manifest, summary_path, workers=2))
+
+    assert excinfo.value.details["failed_indexes"] == [1]
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    assert [j["status"] for j in summary["jobs"]] == ["success", "error", "success"]
+    assert summary["jobs"][1]["exit_code"] == 20
+    assert summary["succeeded"] == 2
+    assert all(j["duration_seconds"] is not None for j in summary["jobs"])
+    assert (tmp_path / "job1" / "report.json").exists()
+    assert (tmp_path / "job3" / "report.json").exists()
+
+
+def test_load_manifest_reads_csv(tmp_path: Path) -> None:
+    manifest = tmp_path / "pairs.csv"
+    manifest.write_text("a,b,out,tag\n/x/a,/x/b,/x/job,\n", encoding="utf-8")
+    items = load_manifest(manifest)
+    assert items == [{"a": "/x/a", "b": "/x/b", "out": "/x/job", "tag": None}]
@@ -1,21 +1,69 @@
 from pathlib import Path
 
+from binfixtures import (
+    SHT_NOTE,
+    ElfSpec,
+    MachoSection,
+    Section,
+    build_elf,
+    build_fat,
+    build_macho,
+    gnu_note,
+    pe_with_codeview,
+)
 from patchprobe.utils.buildid import extract_build_id
 
 
-def test_extract_pe_debug_id_rsds(tmp_path: Path) -> None:
+def test_extract_pe_debug_id_from_debug_directory(tmp_path: Path) -> None:
+    p = tmp_path / "x.exe"
+    p.write_bytes(pe_with_codeview(bytes(range(20))))
+    assert extract_build_id(p, "PE") == bytes(range(20)).hex()
+
+
+def test_extract_pe_debug_id_ignores_stray_rsds_bytes(tmp_path: Path) -> None:
     p = tmp_path / "x.exe"
     payload = b"MZ" + b"\x00" * 64 + b"RSDS" + bytes(range(20)) + b"pdb\x00"
     p.write_bytes(payload)
-    build_id = extract_build_id(p, "PE")
-    assert build_id is not None
-    assert len(build_id) == 40
+    assert extract_build_id(p, "PE") is None
+
 
+def _elf_with_notes(**kwargs) -> bytes:
+    endian = kwargs.get("endian", "<")
+    build_id = bytes(range(0xA0, 0xB4))
+    spec = ElfSpec(
+        sections=[
+            Section(".rodata", b"decoy GNU\x00" + b"\xff" * 24),
+            Section(".note.ABI-tag", gnu_note(1, b"\x00" * 16, endian), SHT_NOTE),
+            Section(".note.gnu.build-id", gnu_note(3, build_id, endian), SHT_NOTE),
+        ],
+        **kwargs,
+    )
+    return build_elf(spec)
 
-def test_extract_elf_build_id_gnu_note_like(tmp_path: Path) -> None:
+
+def test_extract_elf_build_id_from_pt_note(tmp_path: Path) -> None:
     p = tmp_path / "x.elf"
-    payload = b"\x7fELF" + b"\x00" * 32 + b"GNU\x00" + bytes(range(20))
-    p.write_bytes(payload)
-    build_id = extract_build_id(p, "ELF")
-    assert build_id is not None
-    assert len(build_id) == 40
+    p.write_bytes(_elf_with_notes())
+    assert extract_build_id(p, "ELF") == bytes(range(0xA0, 0xB4)).hex()
+
+
+def test_extract_elf_build_id_falls_back_to_section_headers(tmp_path: Path) -> None:
+    p = tmp_path / "x.elf"
+    p.write_bytes(_elf_with_notes(note_segments=False, elf_class=32, endian=">"))
+    assert extract_build_id(p, "ELF") == bytes(range(0xA0, 0xB4)).hex()
+
+
+def test_extract_elf_build_id_ignores_stray_gnu_strings(tmp_path: Path) -> None:
+    p = tmp_path / "x.elf"
+    p.write_bytes(b"\x7fELF" + b"\x00" * 32 + b"GNU\x00" + bytes(range(20)))
+    assert extract_build_id(p, "ELF") is None
+
+
+def test_extract_macho_uuid_from_selected_slice(tmp_path: Path) -> None:
+    text = [MachoSection("__TEXT", "__text", b"\xc3" * 16, 0x100000000)]
+    x64 = build_macho(text, cputype=0x01000007, uuid=b"\x11" * 16)
+    arm64 = build_macho(text, uuid=b"\x22" * 16)
+    p = tmp_path / "fat"
+    p.write_bytes(build_fat([(0x01000007, x64), (0x0100000C, arm64)]))
+    assert extract_build_id(p, "Mach-O") == "11" * 16
+    assert extract_build_id(p, "Mach-O", "arm64") == "22" * 16
@@ -0,0 +1,35 @@
+import os
+from pathlib import Path
+
+from patchprobe.storage.cache import JsonCache, cache_key, get_cache
+
+
+def test_json_cache_counts_hits_and_misses(tmp_path: Path) -> None:
+    cache = JsonCache(root=tmp_path, namespace="normalize")
+    key = cache_key("a" * 64, "0.1.0", "1")
+    assert cache.get(key) is None
+    cache.put(key, {"x": 1})
+    assert cache.get(key) == {"x": 1}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_json_cache_evicts_least_recently_used_entries(tmp_path: Path) -> None:
+    cache = JsonCache(root=tmp_path, namespace="normalize", max_bytes=250)
+    keys = [cache_key(i) for i in range(4)]
+    for age, key in enumerate(keys):
+        cache.put(key, {"payload": "x" * 80})
+        path = tmp_path / "normalize" / key[:2] / f"{key}.json"
+        os.utime(path, (1000 + age, 1000 + age))
+    cache.get(keys[0])  # refreshes the oldest entry
+
+    assert cache.evict() == 2
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[3]) is not None
+
+
+def test_get_cache_respects_disabled_namespace(tmp_path: Path) -> None:
+    cfg = {"storage": {"root": str(tmp_path)}, "cache": {"normalize": {"enabled": False}}}
+    assert get_cache(cfg, "normalize") is None
+    assert get_cache(cfg, "decompile") is not None
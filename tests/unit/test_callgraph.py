@@ -0,0 +1,28 @@
+from patchprobe.backends.diff.callgraph import build_call_graph, call_targets, node_index, propagate
+
+
+def test_build_call_graph_dedupes_edges_into_csr() -> None:
+    graph = build_call_graph(4, [(0, 2), (0, 1), (0, 2), (3, 0)])
+    assert graph.edge_count == 3
+    assert list(graph.callees_of(0)) == [1, 2]
+    assert list(graph.callers_of(0)) == [3]
+    assert list(graph.callers_of(2)) == [0]
+    assert list(graph.callees_of(1)) == []
+
+
+def test_call_targets_and_node_index() -> None:
+    code = b"\x90\xe8\x0b\x00\x00\x00\xc3"
+    assert call_targets(code, 0x1000, "x64") == [0x1011]
+    # cmp eax, 0x1000e8 carries an E8 byte in its immediate; it is not a call.
+    assert call_targets(b"\x3d\xe8\x00\x10\x00\x00\xc3", 0x1000, "x64") == []
+    assert call_targets(b"\x3d\xe8\x00\x10\x00\xe8\xf6\xff\xff\xff", 0x1000, "x86") == [0x1000]
+    assert node_index([0x1000, 0x1011], 0x1011) == 1
+    assert node_index([0x1000, 0x1011], 0x1010) == -1
+
+
+def test_propagate_follows_unique_neighbours_until_fixpoint() -> None:
+    graph_a = build_call_graph(6, [(0, 1), (0, 2), (1, 3), (3, 4), (3, 5)])
+    graph_b = build_call_graph(6, [(0, 4), (0, 2), (4, 1), (1, 3), (1, 5)])
+    found = propagate(graph_a, graph_b, [(0, 0), (2, 2)])
+    # 1 is the only free callee of 0 once 2 is anchored; 3 follows from 1; 3's two callees stay ambiguous.
+    assert found == [(1, 4, 0, 0, "callee"), (3, 1, 1, 4, "callee")]
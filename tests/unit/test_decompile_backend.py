@@ -1,10 +1,13 @@
 import json
 import os
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from binfixtures import MachoSection, build_fat, build_macho
+from patchprobe.backends.decompile.ghidra_headless import ghidra_version
 from patchprobe.core.decompile import run as run_decompile
-from patchprobe.core.job import BinaryInfo, create_job
+from patchprobe.core.job import BinaryInfo, Job, create_job
 
 
 def test_decompile_emits_per_function_artifacts_from_ranked_candidates(tmp_path: Path) -> None:
@@ -18,7 +21,7 @@ def test_decompile_emits_per_function_artifacts_from_ranked_candidates(tmp_path:
         None,
         BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
         BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
-        {},
+        {"storage": {"root": str(tmp_path / "store")}},
     )
 
     diff_dir = job_dir / "artifacts" / "diff"
@@ -64,7 +67,7 @@ def test_decompile_uses_config_top_n_when_flag_not_set(tmp_path: Path) -> None:
         None,
         BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
         BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
-        {},
+        {"storage": {"root": str(tmp_path / "store")}},
     )
 
     diff_dir = job_dir / "artifacts" / "diff"
@@ -110,7 +113,7 @@ def test_decompile_uses_runner_when_available(tmp_path: Path, monkeypatch) -> No
         None,
         BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
         BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
-        {},
+        {"storage": {"root": str(tmp_path / "store")}},
     )
     diff_dir = job_dir / "artifacts" / "diff"
     diff_dir.mkdir(parents=True, exist_ok=True)
@@ -129,10 +132,13 @@ def test_decompile_uses_runner_when_available(tmp_path: Path, monkeypatch) -> No
     fake_runner.write_text(
         "#!/usr/bin/env bash\n"
         "set -euo pipefail\n"
-        "out_json=\"$5\"\n"
-        "out_txt=\"$6\"\n"
-        "echo '{\"prototype\":\"int main(void)\"}' > \"$out_json\"\n"
-        "echo 'int main(void){return 0;}' > \"$out_txt\"\n",
+        f"echo \"$2\" >> {tmp_path / 'sessions.log'}\n"
+        "python3 - \"$4\" <<'PY'\n"
+        "import json, sys\n"
+        "for t in json.load(open(sys.argv[1])):\n"
+        "    open(t['output_json'], 'w').write(json.dumps({'prototype': 'int %s(void)' % t['function_name']}))\n"
+        "    open(t['output_txt'], 'w').write('int %s(void){return 0;}' % t['function_name'])\n"
+        "PY\n",
         encoding="utf-8",
     )
     os.chmod(fake_runner, 0o755)
@@ -145,3 +151,358 @@ def test_decompile_uses_runner_when_available(tmp_path: Path, monkeypatch) -> No
     artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
     assert len(artifacts) == 2
     assert all(a["status"] == "ghidra_headless_success" for a in artifacts)
+    assert artifacts[0]["prototype"] == "int main(void)"
+
+
+def test_decompile_runs_one_session_per_binary_and_reuses_projects(tmp_path: Path, monkeypatch) -> None:
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    job_dir = tmp_path / "job4"
+    create_job(
+        str(job_dir),
+        None,
+        BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
+        BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
+        {"storage": {"root": str(tmp_path / "store")}},
+    )
+    names = ["main", "helper", "parse"]
+    diff_dir = job_dir / "artifacts" / "diff"
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    (diff_dir / "function_pairs.json").write_text(
+        json.dumps(
+            [
+                {"func_pair_id": f"fp{i}", "func_id_a": f"fa{i}", "func_id_b": f"fb{i}", "match_score": 1.0, "status": "matched_by_name", "evidence": [f"symbol_name={name}"]}
+                for i, name in enumerate(names)
+            ]
+        ),
+        encoding="utf-8",
+    )
+    rank_dir = job_dir / "artifacts" / "rank"
+    rank_dir.mkdir(parents=True, exist_ok=True)
+    candidates = [{"func_pair_id": f"fp{i}", "rank": rank, "score": 0.9} for rank, i in enumerate((2, 0, 1), start=1)]
+    (rank_dir / "ranked_candidates.json").write_text(
+        json.dumps({"job_id": "job4", "created_at": "now", "top_n": 10, "candidates": candidates}), encoding="utf-8"
+    )
+    sessions = tmp_path / "sessions.log"
+    fake_runner = tmp_path / "fake_runner.sh"
+    fake_runner.write_text(
+        "#!/usr/bin/env bash\n"
+        "set -euo pipefail\n"
+        f"echo \"$6 $2\" >> {sessions}\n"
+        "python3 - \"$4\" <<'PY'\n"
+        "import json, sys\n"
+        "for t in json.load(open(sys.argv[1])):\n"
+        "    open(t['output_txt'], 'w').write('int %s(void){return 0;}' % t['function_name'])\n"
+        "PY\n",
+        encoding="utf-8",
+    )
+    os.chmod(fake_runner, 0o755)
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_RUNNER", str(fake_runner))
+
+    cfg = {"backends": {"decompile": "ghidra"}}
+    first = run_decompile(cfg, Namespace(job=str(job_dir), top=1, timeout=7))
+    second = run_decompile(cfg, Namespace(job=str(job_dir), top=None, timeout=7))
+
+    assert first["projects"] == {"a": "analyzed", "b": "analyzed"}
+    assert second["projects"] == {"a": "reused", "b": "reused"}
+    assert sessions.read_text(encoding="utf-8").splitlines() == [
+        f"import {a}",
+        f"import {b}",
+        "process a.bin",
+        "process b.bin",
+    ]
+    artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
+    assert [m["func_id"] for m in artifacts] == ["fa2", "fb2", "fa0", "fb0", "fa1", "fb1"]
+    assert all(m["status"] == "ghidra_headless_success" for m in artifacts)
+    assert "int parse(void)" in artifacts[0]["pseudocode"]
+
+
+def test_ghidra_version_is_read_from_install_dir(tmp_path: Path, monkeypatch) -> None:
+    install = tmp_path / "ghidra"
+    (install / "Ghidra").mkdir(parents=True)
+    (install / "Ghidra" / "application.properties").write_text(
+        "application.name=Ghidra\napplication.version=11.1.2\n", encoding="utf-8"
+    )
+    monkeypatch.delenv("PATCHDIFF_GHIDRA_VERSION", raising=False)
+    monkeypatch.delenv("PATCHDIFF_GHIDRA_ANALYZE_HEADLESS", raising=False)
+    monkeypatch.setenv("GHIDRA_INSTALL_DIR", str(install))
+    job = Job(
+        job_id="job",
+        created_at="now",
+        tag=None,
+        binary_a=BinaryInfo(path="a", sha256="a" * 64, file_type="ELF", arch="x64"),
+        binary_b=BinaryInfo(path="b", sha256="b" * 64, file_type="ELF", arch="x64"),
+        config={},
+    )
+    assert ghidra_version(job) == "11.1.2"
+    job.config = {"decompile": {"ghidra_version": "10.4"}}
+    assert ghidra_version(job) == "10.4"
+
+
+def test_decompile_runs_sessions_in_parallel_in_isolated_projects(tmp_path: Path, monkeypatch) -> None:
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    job_dir = tmp_path / "job6"
+    create_job(
+        str(job_dir),
+        None,
+        BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
+        BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
+        {"storage": {"root": str(tmp_path / "store")}, "decompile": {"workers": 8, "memory_budget_mb": 4096}},
+    )
+    names = ["main", "helper", "parse", "init"]
+    diff_dir = job_dir / "artifacts" / "diff"
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    (diff_dir / "function_pairs.json").write_text(
+        json.dumps(
+            [
+                {"func_pair_id": f"fp{i}", "func_id_a": f"fa{i}", "func_id_b": f"fb{i}", "match_score": 1.0, "status": "matched_by_name", "evidence": [f"symbol_name={name}"]}
+                for i, name in enumerate(names)
+            ]
+        ),
+        encoding="utf-8",
+    )
+    rank_dir = job_dir / "artifacts" / "rank"
+    rank_dir.mkdir(parents=True, exist_ok=True)
+    candidates = [{"func_pair_id": f"fp{i}", "rank": rank, "score": 0.9} for rank, i in enumerate((3, 1, 0, 2), start=1)]
+    (rank_dir / "ranked_candidates.json").write_text(
+        json.dumps({"job_id": "job6", "created_at": "now", "top_n": 10, "candidates": candidates}), encoding="utf-8"
+    )
+    sessions = tmp_path / "sessions.log"
+    fake_runner = tmp_path / "fake_runner.sh"
+    fake_runner.write_text(
+        "#!/usr/bin/env bash\n"
+        "set -euo pipefail\n"
+        f"echo \"$6 $1 $MAXMEM\" >> {sessions}\n"
+        "python3 - \"$4\" <<'PY'\n"
+        "import json, sys\n"
+        "for t in json.load(open(sys.argv[1])):\n"
+        "    open(t['output_txt'], 'w').write('int %s(void){return 0;}' % t['function_name'])\n"
+        "PY\n",
+        encoding="utf-8",
+    )
+    os.chmod(fake_runner, 0o755)
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_RUNNER", str(fake_runner))
+
+    details = run_decompile({"backends": {"decompile": "ghidra"}}, Namespace(job=str(job_dir), top=None, timeout=7))
+
+    lines = [line.split() for line in sessions.read_text(encoding="utf-8").splitlines()]
+    assert sorted(mode for mode, _dir, _mem in lines) == ["import", "import", "process", "process", "process", "process"]
+    assert len({directory for mode, directory, _mem in lines if mode == "process"}) == 4
+    assert {mem for _mode, _dir, mem in lines} == {"1024M"}
+    assert details["sessions"]["workers"] == 2
+    assert details["sessions"]["max_memory_mb"] == 1024
+    artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
+    assert [m["func_id"] for m in artifacts] == ["fa3", "fb3", "fa1", "fb1", "fa0", "fb0", "fa2", "fb2"]
+    assert all(m["status"] == "ghidra_headless_success" for m in artifacts)
+    assert "int init(void)" in artifacts[0]["pseudocode"]
+
+
+def test_decompile_results_are_cached_by_binary_and_address(tmp_path: Path, monkeypatch) -> None:
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    sessions = tmp_path / "sessions.log"
+    fake_runner = tmp_path / "fake_runner.sh"
+    fake_runner.write_text(
+        "#!/usr/bin/env bash\n"
+        "set -euo pipefail\n"
+        f"echo \"$6 $2\" >> {sessions}\n"
+        "python3 - \"$4\" <<'PY'\n"
+        "import json, sys\n"
+        "for t in json.load(open(sys.argv[1])):\n"
+        "    status = 'function_not_found' if t['function_name'] == 'gone' else 'ok'\n"
+        "    open(t['output_txt'], 'w').write('int %s(void){return 0;}' % t['function_name'])\n"
+        "    json.dump({'status': status}, open(t['output_json'], 'w'))\n"
+        "PY\n",
+        encoding="utf-8",
+    )
+    os.chmod(fake_runner, 0o755)
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_RUNNER", str(fake_runner))
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_VERSION", "11.0")
+
+    def decompile(name: str) -> dict:
+        # Two jobs over the same binaries share one store, as separate runs on one machine would.
+        job_dir = tmp_path / name
+        create_job(
+            str(job_dir),
+            None,
+            BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
+            BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
+            {"storage": {"root": str(tmp_path / "store")}},
+        )
+        diff_dir = job_dir / "artifacts" / "diff"
+        diff_dir.mkdir(parents=True, exist_ok=True)
+        pairs = [
+            {
+                "func_pair_id": f"fp{i}",
+                "func_id_a": f"fa{i}",
+                "func_id_b": f"fb{i}",
+                "match_score": 1.0,
+                "status": "matched_by_name",
+                "evidence": [],
+                "metadata": {"symbol_name": symbol, "address_a": 4096 * i, "address_b": 8192 * i},
+            }
+            for i, symbol in ((1, "main"), (2, "gone"))
+        ]
+        (diff_dir / "function_pairs.json").write_text(json.dumps(pairs), encoding="utf-8")
+        rank_dir = job_dir / "artifacts" / "rank"
+        rank_dir.mkdir(parents=True, exist_ok=True)
+        ranked = {"job_id": name, "created_at": "now", "top_n": 10, "candidates": [{"func_pair_id": f"fp{i}", "rank": i, "score": 0.9} for i in (1, 2)]}
+        (rank_dir / "ranked_candidates.json").write_text(json.dumps(ranked), encoding="utf-8")
+        details = run_decompile({"backends": {"decompile": "ghidra"}}, Namespace(job=str(job_dir), top=None, timeout=7))
+        artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
+        assert [m["status"] for m in artifacts] == ["ghidra_headless_success"] * 2 + ["ghidra_headless_failed"] * 2
+        assert artifacts[2]["error"] == "function_not_found"
+        assert (job_dir / "artifacts" / "decompile" / "fa1" / "pseudocode.txt").read_text(encoding="utf-8") == "int main(void){return 0;}"
+        return details
+
+    first = decompile("job1")
+    second = decompile("job2")
+
+    assert (first["cache"]["hits"], first["cache"]["misses"]) == (0, 4)
+    # The function the script could not find was not cached, so only it goes back to Ghidra.
+    assert (second["cache"]["hits"], second["cache"]["misses"]) == (2, 2)
+    assert second["projects"] == {"a": "reused", "b": "reused"}
+    assert len(sessions.read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_concurrent_jobs_import_a_shared_project_once(tmp_path: Path, monkeypatch) -> None:
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    store = tmp_path / "store"
+    sessions = tmp_path / "sessions.log"
+    fake_runner = tmp_path / "fake_runner.sh"
+    # Import saves the program slowly; opening a project without it, or one being imported, fails like Ghidra would.
+    fake_runner.write_text(
+        "#!/usr/bin/env bash\n"
+        "set -euo pipefail\n"
+        f"echo \"$6 $1\" >> {sessions}\n"
+        "if [ \"$6\" = import ]; then\n"
+        "  touch \"$1/importing\"; sleep 0.5; touch \"$1/program.saved\"; rm \"$1/importing\"\n"
+        "elif [ ! -f \"$1/program.saved\" ] || [ -f \"$1/importing\" ]; then\n"
+        "  exit 1\n"
+        "fi\n"
+        "python3 - \"$4\" <<'PY'\n"
+        "import json, sys\n"
+        "for t in json.load(open(sys.argv[1])):\n"
+        "    open(t['output_txt'], 'w').write('int %s(void){return 0;}' % t['function_name'])\n"
+        "PY\n",
+        encoding="utf-8",
+    )
+    os.chmod(fake_runner, 0o755)
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_RUNNER", str(fake_runner))
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_VERSION", "11.0")
+
+    def prepare(name: str) -> Path:
+        job_dir = tmp_path / name
+        create_job(
+            str(job_dir),
+            None,
+            BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
+            BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
+            {"storage": {"root": str(store)}, "cache": {"decompile": {"enabled": False}}},
+        )
+        diff_dir = job_dir / "artifacts" / "diff"
+        diff_dir.mkdir(parents=True, exist_ok=True)
+        pairs = [{"func_pair_id": "fp0", "func_id_a": "fa0", "func_id_b": "fb0", "match_score": 1.0, "status": "matched_by_name", "evidence": ["symbol_name=main"]}]
+        (diff_dir / "function_pairs.json").write_text(json.dumps(pairs), encoding="utf-8")
+        rank_dir = job_dir / "artifacts" / "rank"
+        rank_dir.mkdir(parents=True, exist_ok=True)
+        ranked = {"job_id": name, "created_at": "now", "top_n": 10, "candidates": [{"func_pair_id": "fp0", "rank": 1, "score": 0.9}]}
+        (rank_dir / "ranked_candidates.json").write_text(json.dumps(ranked), encoding="utf-8")
+        return job_dir
+
+    job_dirs = [prepare("job1"), prepare("job2")]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        details = list(pool.map(lambda job_dir: run_decompile({"backends": {"decompile": "ghidra"}}, Namespace(job=str(job_dir), top=None, timeout=7)), job_dirs))
+
+    assert sorted(d["projects"]["a"] for d in details) == ["analyzed", "reused"]
+    assert sorted(d["projects"]["b"] for d in details) == ["analyzed", "reused"]
+    lines = [line.split() for line in sessions.read_text(encoding="utf-8").splitlines()]
+    assert sorted(mode for mode, _dir in lines) == ["import", "import", "process", "process"]
+    # Reusing sessions open a copy inside their own job, never the shared project.
+    assert all(Path(directory).is_relative_to(tmp_path / "job1") or Path(directory).is_relative_to(tmp_path / "job2") for mode, directory in lines if mode == "process")
+    for job_dir in job_dirs:
+        artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
+        assert all(m["status"] == "ghidra_headless_success" for m in artifacts)
+
+
+def test_fat_macho_slices_are_imported_and_cached_per_arch(tmp_path: Path, monkeypatch) -> None:
+    text = [MachoSection("__TEXT", "__text", b"\xc3" * 16, 0x100000000)]
+    x64, arm64 = build_macho(text, cputype=0x01000007), build_macho(text)
+    fat = tmp_path / "universal"
+    fat.write_bytes(build_fat([(0x01000007, x64), (0x0100000C, arm64)]))
+    sessions = tmp_path / "sessions.log"
+    fake_runner = tmp_path / "fake_runner.sh"
+    # Import records the cputype of the file it was given; the pseudocode returns it.
+    fake_runner.write_text(
+        "#!/usr/bin/env bash\n"
+        "set -euo pipefail\n"
+        f"echo \"$6 $2\" >> {sessions}\n"
+        "python3 - \"$1\" \"$2\" \"$4\" \"$6\" <<'PY'\n"
+        "import json, os, sys\n"
+        "project, program, targets, mode = sys.argv[1:]\n"
+        "if mode == 'import':\n"
+        "    os.makedirs(project, exist_ok=True)\n"
+        "    open(os.path.join(project, 'cputype'), 'w').write(open(program, 'rb').read()[:8].hex())\n"
+        "header = open(os.path.join(project, 'cputype')).read()\n"
+        "for t in json.load(open(targets)):\n"
+        "    open(t['output_txt'], 'w').write('int %s(void){return 0x%s;}' % (t['function_name'], header))\n"
+        "    json.dump({'status': 'ok'}, open(t['output_json'], 'w'))\n"
+        "PY\n",
+        encoding="utf-8",
+    )
+    os.chmod(fake_runner, 0o755)
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_RUNNER", str(fake_runner))
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_VERSION", "11.0")
+
+    def decompile(name: str) -> tuple[dict, list[str]]:
+        # Both sides are slices of one universal binary: same sha256, different arch.
+        job_dir = tmp_path / name
+        create_job(
+            str(job_dir),
+            None,
+            BinaryInfo(path=str(fat), sha256="f" * 64, file_type="Mach-O", arch="x64"),
+            BinaryInfo(path=str(fat), sha256="f" * 64, file_type="Mach-O", arch="arm64"),
+            {"storage": {"root": str(tmp_path / "store")}},
+        )
+        diff_dir = job_dir / "artifacts" / "diff"
+        diff_dir.mkdir(parents=True, exist_ok=True)
+        pairs = [
+            {
+                "func_pair_id": "fp0",
+                "func_id_a": "fa0",
+                "func_id_b": "fb0",
+                "match_score": 1.0,
+                "status": "matched_by_name",
+                "evidence": [],
+                "metadata": {"symbol_name": "main", "address_a": 4096, "address_b": 4096},
+            }
+        ]
+        (diff_dir / "function_pairs.json").write_text(json.dumps(pairs), encoding="utf-8")
+        rank_dir = job_dir / "artifacts" / "rank"
+        rank_dir.mkdir(parents=True, exist_ok=True)
+        ranked = {"job_id": name, "created_at": "now", "top_n": 10, "candidates": [{"func_pair_id": "fp0", "rank": 1, "score": 0.9}]}
+        (rank_dir / "ranked_candidates.json").write_text(json.dumps(ranked), encoding="utf-8")
+        details = run_decompile({"backends": {"decompile": "ghidra"}}, Namespace(job=str(job_dir), top=None, timeout=7))
+        artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
+        return details, [m["pseudocode"] for m in artifacts]
+
+    first, code = decompile("job1")
+    assert first["projects"] == {"a": "analyzed", "b": "analyzed"}
+    assert code == [f"int main(void){{return 0x{x64[:8].hex()};}}", f"int main(void){{return 0x{arm64[:8].hex()};}}"]
+    # Ghidra was handed each thin slice under the binary's own name, never the universal file.
+    imported = [Path(line.split()[1]) for line in sessions.read_text(encoding="utf-8").splitlines()]
+    assert [path.name for path in imported] == ["universal", "universal"]
+    assert str(fat) not in map(str, imported)
+    second, cached = decompile("job2")
+    assert (second["cache"]["hits"], second["cache"]["misses"]) == (2, 0)
+    assert cached == code
@@ -1,5 +1,13 @@
+import json
+import random
+from argparse import Namespace
+
+from binfixtures import ElfSpec, Section, Sym, build_elf
+from patchprobe.backends.diff import diaphora
 from patchprobe.backends.diff.diaphora import _match_symbols, _parse_nm_output
+from patchprobe.core import pipeline
 from patchprobe.core.job import BinaryInfo, Job
+from patchprobe.core.normalize import SectionStates
 
 
 def _make_job() -> Job:
@@ -37,3 +45,147 @@ def test_match_symbols_builds_schema_compatible_pairs() -> None:
     assert all("func_pair_id" in p for p in pairs)
     assert all(p["status"] == "matched_by_name" for p in pairs)
     assert all("change_summary" in d for d in diffs)
+
+
+def test_match_symbols_marks_functions_in_identical_sections_unchanged() -> None:
+    section = {"name": ".text", "type": 1, "offset": 0x1000, "size": 0x200, "address": 0x1000, "sha256": "x"}
+    normalized = {
+        "binary_a": {"sections": [section]},
+        "binary_b": {"sections": [section]},
+        "delta": {"sections": {".text": "identical"}},
+    }
+    symbols_a = _parse_nm_output("0000000000001000 T main\n0000000000001100 T helper")
+    symbols_b = _parse_nm_output("0000000000001000 T main\n0000000000001180 T helper")
+    _, diffs = _match_symbols(symbols_a, symbols_b, _make_job(), SectionStates(normalized))
+    by_name = {d["change_summary"]["symbol_name"]: d for d in diffs}
+    assert by_name["main"]["change_summary"]["unchanged"] is True
+    assert by_name["main"]["severity_hint"] == 0.0
+    assert "unchanged" not in by_name["helper"]["change_summary"]
+    assert by_name["helper"]["change_summary"]["section_state"] == "identical"
+
+
+def test_read_symbols_uses_native_reader_without_nm(tmp_path, monkeypatch) -> None:
+    def no_nm(*_args, **_kwargs):
+        raise AssertionError("nm must not run for parseable binaries")
+
+    monkeypatch.setattr(diaphora, "run_command", no_nm)
+    spec = ElfSpec(
+        sections=[Section(".text", b"\x90" * 32, addr=0x1000, flags=0x6)],
+        symbols=[Sym("main", 0x1000, 16, ".text"), Sym("helper", 0x1010, 16, ".text", bind=0)],
+    )
+    path = tmp_path / "a.elf"
+    path.write_bytes(build_elf(spec))
+    binary = BinaryInfo(path=str(path), sha256="a" * 64, file_type="ELF", arch="x64")
+    symbols, source = diaphora._read_symbols(str(path), binary)
+    assert source == "symtab"
+    assert [(s.name, s.symbol_type, s.size) for s in symbols] == [("main", "T", 16), ("helper", "t", 16)]
+
+
+def test_renamed_function_is_paired_by_minhash(tmp_path) -> None:
+    rng = random.Random(5)
+    shared = rng.randbytes(96)
+    edited = shared[:48] + b"\x90\x90" + shared[50:]
+    common = rng.randbytes(32)
+    for name, body, fname in (("a.elf", shared, "parse_header"), ("b.elf", edited, "parse_header_v2")):
+        spec = ElfSpec(
+            sections=[Section(".text", common + body, addr=0x1000, flags=0x6)],
+            symbols=[Sym("main", 0x1000, 32, ".text"), Sym(fname, 0x1020, 96, ".text")],
+        )
+        (tmp_path / name).write_bytes(build_elf(spec))
+    out = tmp_path / "job"
+    cfg = {"storage": {"root": str(tmp_path / "store")}}
+    pipeline.run_ingest(cfg, Namespace(a=str(tmp_path / "a.elf"), b=str(tmp_path / "b.elf"), tag=None, out=str(out)))
+    pipeline.run_normalize(cfg, Namespace(job=str(out)))
+    pipeline.run_diff(cfg, Namespace(job=str(out), backend="diaphora"))
+
+    pairs = json.loads((out / "artifacts" / "diff" / "function_pairs.json").read_text(encoding="utf-8"))
+    fuzzy = [p for p in pairs if p["status"] == "matched_by_minhash"]
+    assert len(fuzzy) == 1
+    assert "symbol_name_a=parse_header" in fuzzy[0]["evidence"]
+    assert 0.5 <= fuzzy[0]["match_score"] < 1.0
+
+
+def test_renamed_callee_is_paired_through_call_graph(tmp_path) -> None:
+    rng = random.Random(7)
+    for name, fname in (("a.elf", "load_config"), ("b.elf", "read_settings")):
+        # main calls the renamed function at 0x1020; the bodies share nothing for MinHash to find.
+        main = b"\x55\xe8\x1a\x00\x00\x00" + b"\x90" * 25 + b"\xc3"
+        body = rng.randbytes(64).replace(b"\xe8", b"\x90")
+        spec = ElfSpec(
+            sections=[Section(".text", main + body, addr=0x1000, flags=0x6)],
+            symbols=[Sym("main", 0x1000, 32, ".text"), Sym(fname, 0x1020, 64, ".text")],
+        )
+        (tmp_path / name).write_bytes(build_elf(spec))
+    out = tmp_path / "job"
+    cfg = {"storage": {"root": str(tmp_path / "store")}}
+    pipeline.run_ingest(cfg, Namespace(a=str(tmp_path / "a.elf"), b=str(tmp_path / "b.elf"), tag=None, out=str(out)))
+    pipeline.run_normalize(cfg, Namespace(job=str(out)))
+    pipeline.run_diff(cfg, Namespace(job=str(out), backend="diaphora"))
+
+    pairs = json.loads((out / "artifacts" / "diff" / "function_pairs.json").read_text(encoding="utf-8"))
+    propagated = [p for p in pairs if p["status"] == "matched_by_callgraph"]
+    assert len(propagated) == 1
+    assert "symbol_name_a=load_config" in propagated[0]["evidence"]
+    assert "callgraph=callee_of:main" in propagated[0]["evidence"]
+
+
+def test_sharded_diff_matches_single_process_output(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(diaphora, "_MIN_SHARD", 2)
+    rng = random.Random(11)
+    bodies = [rng.randbytes(48).replace(b"\xe8", b"\x90") for _ in range(8)]
+    edited = list(bodies)
+    edited[3] = bodies[3][:40] + b"\xcc" * 8
+    for name, code, renamed in (("a.elf", bodies, "old_name"), ("b.elf", edited, "new_name")):
+        names = [f"func_{idx}" if idx != 5 else renamed for idx in range(len(code))]
+        spec = ElfSpec(
+            sections=[Section(".text", b"".join(code), addr=0x1000, flags=0x6)],
+            symbols=[Sym(fname, 0x1000 + (idx * 48), 48, ".text") for idx, fname in enumerate(names)],
+        )
+        (tmp_path / name).write_bytes(build_elf(spec))
+
+    outputs = {}
+    for workers in (1, 2):
+        out = tmp_path / f"job{workers}"
+        cfg = {"storage": {"root": str(tmp_path / "store")}}
+        pipeline.run_ingest(cfg, Namespace(a=str(tmp_path / "a.elf"), b=str(tmp_path / "b.elf"), tag=None, out=str(out)))
+        pipeline.run_normalize(cfg, Namespace(job=str(out)))
+        pipeline.run_diff(cfg, Namespace(job=str(out), backend="diaphora", workers=workers))
+        diff_dir = out / "artifacts" / "diff"
+        outputs[workers] = [(diff_dir / f).read_text(encoding="utf-8") for f in ("function_pairs.json", "diff_results.json")]
+        audit = [json.loads(line) for line in (out / "audit.jsonl").read_text(encoding="utf-8").splitlines()]
+        details = [e for e in audit if e.get("stage") == "diff" and e.get("event") == "success"][-1]["details"]
+        assert details["workers"] == workers
+        assert len(details["shards"]["names"]["item_seconds"]) == (1 if workers == 1 else 4)
+    assert outputs[1] == outputs[2]
+    assert '"matched_by_minhash"' in outputs[2][0]
+
+
+def test_binary_analysis_is_reused_across_jobs(tmp_path) -> None:
+    rng = random.Random(13)
+    bodies = [rng.randbytes(48).replace(b"\xe8", b"\x90") for _ in range(4)]
+    for name, renamed in (("a.elf", "old_name"), ("b.elf", "mid_name"), ("c.elf", "new_name")):
+        names = ["main", "helper", renamed, "cleanup"]
+        spec = ElfSpec(
+            sections=[Section(".text", b"".join(bodies), addr=0x1000, flags=0x6)],
+            symbols=[Sym(fname, 0x1000 + (idx * 48), 48, ".text") for idx, fname in enumerate(names)],
+        )
+        (tmp_path / name).write_bytes(build_elf(spec))
+
+    def diff(a: str, b: str, job: str, store: str) -> tuple[dict, str]:
+        out = tmp_path / job
+        cfg = {"storage": {"root": str(tmp_path / store)}}
+        pipeline.run_ingest(cfg, Namespace(a=str(tmp_path / a), b=str(tmp_path / b), tag=None, out=str(out)))
+        pipeline.run_normalize(cfg, Namespace(job=str(out)))
+        pipeline.run_diff(cfg, Namespace(job=str(out), backend="diaphora"))
+        audit = [json.loads(line) for line in (out / "audit.jsonl").read_text(encoding="utf-8").splitlines()]
+        details = [e for e in audit if e.get("stage") == "diff" and e.get("event") == "success"][-1]["details"]
+        return details, (out / "artifacts" / "diff" / "diff_results.json").read_text(encoding="utf-8")
+
+    first, _ = diff("a.elf", "b.elf", "job1", "store")
+    assert (first["analysis"]["reused_a"], first["analysis"]["reused_b"]) == (False, False)
+    second, warm = diff("b.elf", "c.elf", "job2", "store")
+    assert (second["analysis"]["reused_a"], second["analysis"]["reused_b"]) == (True, False)
+    assert "analysis_a" not in second["shards"]
+    _, cold = diff("b.elf", "c.elf", "job3", "cold")
+    assert warm == cold
+    assert '"source": "minhash"' in warm
@@ -0,0 +1,68 @@
+import json
+from argparse import Namespace
+
+from binfixtures import ElfSpec, Section, Sym, build_elf
+from patchprobe.core import pipeline
+from patchprobe.core.features import CodeFeatures, DiffFeatures, FeatureContext, _BinaryFeatures, select_extractors
+from patchprobe.core.job import BinaryInfo
+
+
+def test_select_extractors_enables_code_features_by_weight() -> None:
+    assert [e.name for e in select_extractors({})] == ["diff"]
+    assert [e.name for e in select_extractors({"branch_delta": 0.2})] == ["diff", "code"]
+    assert CodeFeatures().measure(b"\x74\x02\x90\x90\x0f\x85\x00\x00\x00\x00\xc3", "x64")["branches"] == 2
+    assert DiffFeatures().features[2].scale(9) == 1.0
+    # mov eax, 0x74e8; cmp eax, 0x850f; jz +0; call +0: only the last two are a branch and a call.
+    code = b"\xb8\xe8\x74\x00\x00\x3d\x0f\x85\x00\x00\x74\x00\xe8\x00\x00\x00\x00\xc3"
+    assert CodeFeatures().measure(code, "x64") == {"size": len(code), "branches": 1, "calls": 1}
+
+
+def test_feature_cache_key_includes_format_and_arch() -> None:
+    def key(arch: str) -> str:
+        binary = BinaryInfo(path="fat", sha256="a" * 64, file_type="Mach-O", arch=arch)
+        return FeatureContext._key(None, _BinaryFeatures(binary=binary, path="fat", summary=None), CodeFeatures())
+
+    assert key("x64") != key("arm64")
+
+
+def test_rank_code_features_are_cached_per_function(tmp_path) -> None:
+    bodies = {
+        "a.elf": (b"\x90" * 32, b"\x90" * 32),
+        "b.elf": (b"\x90" * 31 + b"\xcc", b"\x74\x00" * 4 + b"\x90" * 24),
+    }
+    for name, (alpha, zeta) in bodies.items():
+        spec = ElfSpec(
+            sections=[Section(".text", alpha + zeta, addr=0x1000, flags=0x6)],
+            symbols=[Sym("alpha", 0x1000, 32, ".text"), Sym("zeta", 0x1020, 32, ".text")],
+        )
+        (tmp_path / name).write_bytes(build_elf(spec))
+    cfg = {"storage": {"root": str(tmp_path / "store")}}
+
+    def prepare(out, a: str, b: str) -> None:
+        pipeline.run_ingest(cfg, Namespace(a=str(tmp_path / a), b=str(tmp_path / b), tag=None, out=str(out)))
+        pipeline.run_normalize(cfg, Namespace(job=str(out)))
+        pipeline.run_diff(cfg, Namespace(job=str(out), backend="diaphora"))
+
+    out = tmp_path / "job"
+    prepare(out, "a.elf", "b.elf")
+
+    def rank(weights: dict) -> tuple[list[str], dict]:
+        rank_cfg = {**cfg, "ranking": {"top_n": 10, "weights": weights}}
+        pipeline.run_rank(rank_cfg, Namespace(job=str(out), top=None))
+        ranked = json.loads((out / "artifacts" / "rank" / "ranked_candidates.json").read_text(encoding="utf-8"))
+        audit = [json.loads(line) for line in (out / "audit.jsonl").read_text(encoding="utf-8").splitlines()]
+        details = [e for e in audit if e.get("stage") == "rank" and e.get("event") == "success"][-1]["details"]
+        return [c["func_pair_id"] for c in ranked["candidates"]], details["features"]
+
+    default_order, default_features = rank({})
+    assert default_features["extractors"] == ["diff"]
+    order, features = rank({"branch_delta": 0.5})
+    assert order == list(reversed(default_order))
+    assert (features["computed"], features["cached"]) == (4, 0)
+    _, features = rank({"branch_delta": 0.5, "size_delta": 0.1})
+    assert (features["computed"], features["cached"]) == (0, 4)
+    # Measurements follow the binary, not the side it was diffed on.
+    out = tmp_path / "swapped"
+    prepare(out, "b.elf", "a.elf")
+    _, features = rank({"branch_delta": 0.5})
+    assert (features["computed"], features["cached"]) == (0, 4)
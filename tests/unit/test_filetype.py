@@ -1,4 +1,5 @@
 from pathlib import Path
+from binfixtures import MachoSection, build_fat, build_macho
 from patchprobe.utils.filetype import detect_filetype_and_arch
 
 
@@ -19,3 +20,21 @@ def test_elf_arch_from_machine_field(tmp_path: Path) -> None:
     ftype, arch = detect_filetype_and_arch(p)
     assert ftype == "ELF"
     assert arch == "arm64"
+
+
+def test_elf_arch_honours_big_endian_header(tmp_path: Path) -> None:
+    p = tmp_path / "be.elf"
+    data = bytearray(64)
+    data[:6] = b"\x7fELF\x01\x02"
+    data[18:20] = (0x08).to_bytes(2, "big")  # MIPS
+    p.write_bytes(bytes(data))
+    assert detect_filetype_and_arch(p) == ("ELF", "mips")
+
+
+def test_macho_fat_binary_selects_requested_slice(tmp_path: Path) -> None:
+    text = [MachoSection("__TEXT", "__text", b"\xc3" * 16, 0x100000000)]
+    p = tmp_path / "fat"
+    p.write_bytes(build_fat([(0x01000007, build_macho(text, cputype=0x01000007)), (0x0100000C, build_macho(text))]))
+    assert detect_filetype_and_arch(p) == ("Mach-O", "x64")
+    assert detect_filetype_and_arch(p, "arm64") == ("Mach-O", "arm64")
+    assert detect_filetype_and_arch(p, "arm") == ("Mach-O", "unknown")
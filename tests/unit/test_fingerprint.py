@@ -0,0 +1,113 @@
+from pathlib import Path
+
+from binfixtures import ElfSpec, Section, Sym, build_elf
+from patchprobe.backends.diff.diaphora import _match_symbols
+from patchprobe.backends.diff.fingerprint import Fingerprinter, classify, mask_relocations
+from patchprobe.core.job import BinaryInfo, Job
+from patchprobe.core.normalize import _summarize_binary
+from patchprobe.formats.symbols import read_function_symbols
+
+
+def test_mask_relocations_ignores_call_targets_but_not_code() -> None:
+    a = b"\x55\xe8\x10\x00\x00\x00\xc3"
+    b = b"\x55\xe8\x90\x01\x00\x00\xc3"
+    assert mask_relocations(a, "x64") == mask_relocations(b, "x64")
+    assert mask_relocations(a, "x64") != mask_relocations(b"\x56" + b[1:], "x64")
+    # An E8 byte inside an immediate (cmp eax, 0x1e8 / 0x1001e8) is not a call.
+    assert mask_relocations(b"\x3d\xe8\x00\x00\x00", "x64") != mask_relocations(b"\x3d\xe8\x01\x00\x00", "x64")
+    prologue = b"\x48\x83\xec\x28\x48\x8b\x05\x10\x00\x00\x00\xc7\x44\x24\x08\xe8\x01\x00\x00"
+    masked_prologue = b"\x48\x83\xec\x28\x48\x8b\x05\x00\x00\x00\x00\xc7\x44\x24\x08\xe8\x01\x00\x00"
+    assert mask_relocations(prologue + a, "x64") == masked_prologue + b"\x55\xe8\x00\x00\x00\x00\xc3"
+
+    bl_a = (0x94000010).to_bytes(4, "little") + (0x90000001 | (3 << 5)).to_bytes(4, "little")
+    bl_b = (0x94000400).to_bytes(4, "little") + (0xB0000001 | (7 << 5)).to_bytes(4, "little")
+    assert mask_relocations(bl_a, "arm64") == mask_relocations(bl_b, "arm64")
+    assert mask_relocations(bl_a, "arm64") != mask_relocations(bl_a[:4] + (0x90000002).to_bytes(4, "little"), "arm64")
+
+
+def test_rip_relative_operands_are_masked_only_in_64_bit_code() -> None:
+    # lea rax, [rip+disp]; mov ecx, [rip+disp]; ret -- the same globals seen from two function addresses.
+    at_1000 = b"\x48\x8d\x05\xf9\x00\x00\x00\x8b\x0d\xf3\x00\x00\x00\xc3"
+    at_1040 = b"\x48\x8d\x05\xb9\x00\x00\x00\x8b\x0d\xb3\x00\x00\x00\xc3"
+    text = at_1000.ljust(0x40, b"\xcc") + at_1040
+    fp = Fingerprinter(text, {"arch": "x64", "sections": [{"address": 0x1000, "offset": 0, "size": len(text)}]})
+    assert classify(fp.fingerprint(0x1000, len(at_1000)), fp.fingerprint(0x1040, len(at_1040)), 0x1000, 0x1040) == "moved"
+    # A changed immediate after the displacement is still a change.
+    assert mask_relocations(b"\xc7\x05\xf9\x00\x00\x00\x01\x00\x00\x00", "x64") != mask_relocations(
+        b"\xc7\x05\xf9\x00\x00\x00\x02\x00\x00\x00", "x64"
+    )
+    # In 32-bit code mod=00 rm=101 is an absolute address, not PC-relative.
+    assert mask_relocations(b"\x8b\x0d\xf3\x00\x00\x00\xc3", "x86") == b"\x8b\x0d\xf3\x00\x00\x00\xc3"
+
+
+def test_arm64_masks_lo12_immediates_paired_with_adrp() -> None:
+    def words(*values: int) -> bytes:
+        return b"".join(v.to_bytes(4, "little") for v in values)
+
+    def adrp(rd: int, page: int) -> int:
+        return 0x90000000 | ((page & 3) << 29) | ((page >> 2) << 5) | rd
+
+    def add(rd: int, rn: int, imm: int) -> int:
+        return 0x91000000 | (imm << 10) | (rn << 5) | rd
+
+    def ldr(rt: int, rn: int, imm: int) -> int:
+        return 0xF9400000 | ((imm // 8) << 10) | (rn << 5) | rt
+
+    # adrp x8, sym; add x0, x8, :lo12:sym; ldr x1, [x0, #8]; ldr x2, [x8, :lo12:other]
+    a = words(adrp(8, 1), add(0, 8, 0x120), ldr(1, 0, 8), ldr(2, 8, 0x18))
+    b = words(adrp(8, 3), add(0, 8, 0x7A0), ldr(1, 0, 8), ldr(2, 8, 0x98))
+    assert mask_relocations(a, "arm64") == mask_relocations(b, "arm64")
+    # The struct offset off the finished address is real code, as is an add that never saw an adrp.
+    offset_changed = words(adrp(8, 1), add(0, 8, 0x120), ldr(1, 0, 16), ldr(2, 8, 0x18))
+    assert mask_relocations(a, "arm64") != mask_relocations(offset_changed, "arm64")
+    assert mask_relocations(words(add(0, 1, 4)), "arm64") != mask_relocations(words(add(0, 1, 8)), "arm64")
+    # Once the page register is overwritten the pairing ends.
+    movz_x8 = 0xD2800008
+    assert mask_relocations(words(adrp(8, 1), movz_x8, add(0, 8, 4)), "arm64") != mask_relocations(
+        words(adrp(8, 1), movz_x8, add(0, 8, 8)), "arm64"
+    )
+
+
+def test_match_symbols_classifies_identical_moved_retargeted_and_modified(tmp_path: Path) -> None:
+    def build(name: str, text: bytes, syms: list[Sym]) -> tuple[Path, list]:
+        path = tmp_path / name
+        path.write_bytes(build_elf(ElfSpec(sections=[Section(".text", text, addr=0x1000, flags=0x6)], symbols=syms)))
+        return path, read_function_symbols(path.read_bytes(), "ELF")
+
+    same = b"\x55\x48\x89\xe5\x5d\xc3\x90\x90"
+    call_a = b"\x55\xe8\x10\x00\x00\x00\x5d\xc3"
+    call_b = b"\x55\xe8\x20\x00\x00\x00\x5d\xc3"
+    body_a = b"\x31\xc0\xc3\x90\x90\x90\x90\x90"
+    body_b = b"\x31\xc0\xff\xc0\xc3\x90\x90\x90"
+    path_a, syms_a = build("a.elf", same + call_a + body_a + b"\xcc" * 8 + call_a, [
+        Sym("same", 0x1000, 8, ".text"), Sym("moved", 0x1008, 8, ".text"), Sym("changed", 0x1010, 8, ".text"),
+        Sym("retarget", 0x1020, 8, ".text"),
+    ])
+    path_b, syms_b = build("b.elf", same + body_b + b"\xcc" * 8 + call_b + call_b, [
+        Sym("same", 0x1000, 8, ".text"), Sym("changed", 0x1008, 8, ".text"), Sym("moved", 0x1018, 8, ".text"),
+        Sym("retarget", 0x1020, 8, ".text"),
+    ])
+    job = Job(
+        job_id="job1",
+        created_at="2026-01-01T00:00:00Z",
+        tag=None,
+        binary_a=BinaryInfo(path=str(path_a), sha256="a" * 64, file_type="ELF", arch="x64"),
+        binary_b=BinaryInfo(path=str(path_b), sha256="b" * 64, file_type="ELF", arch="x64"),
+        config={},
+    )
+    fingerprints = (
+        Fingerprinter(path_a.read_bytes(), _summarize_binary(path_a, "ELF", "x64", "a" * 64)),
+        Fingerprinter(path_b.read_bytes(), _summarize_binary(path_b, "ELF", "x64", "b" * 64)),
+    )
+    _, diffs = _match_symbols(syms_a, syms_b, job, fingerprints=fingerprints)
+    by_name = {d["change_summary"]["symbol_name"]: d for d in diffs}
+    assert by_name["same"]["change_summary"]["byte_state"] == "identical"
+    assert by_name["moved"]["change_summary"]["byte_state"] == "moved"
+    assert by_name["moved"]["change_summary"]["unchanged"] is True
+    assert by_name["changed"]["change_summary"]["byte_state"] == "modified"
+    assert "unchanged" not in by_name["changed"]["change_summary"]
+    # Same address, only the call target differs: a real change that rank must still see.
+    assert by_name["retarget"]["change_summary"]["byte_state"] == "retargeted"
+    assert "unchanged" not in by_name["retarget"]["change_summary"]
+    assert by_name["retarget"]["severity_hint"] > 0.0
+    assert by_name["changed"]["severity_hint"] > by_name["same"]["severity_hint"]
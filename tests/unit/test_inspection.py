@@ -0,0 +1,45 @@
+import struct
+from pathlib import Path
+
+from patchprobe.formats.pe import parse_header
+from patchprobe.utils.hashing import sha256_file
+from patchprobe.utils.inspection import inspect_binary
+
+
+def test_inspect_binary_reports_hash_type_arch_and_size(tmp_path: Path) -> None:
+    p = tmp_path / "x.elf"
+    data = bytearray(256)
+    data[:4] = b"\x7fELF"
+    data[18:20] = (0x3E).to_bytes(2, "little")
+    p.write_bytes(bytes(data))
+    info = inspect_binary(p)
+    assert info.sha256 == sha256_file(p)
+    assert info.file_type == "ELF"
+    assert info.arch == "x64"
+    assert info.size_bytes == 256
+
+
+def test_inspect_binary_handles_empty_file(tmp_path: Path) -> None:
+    p = tmp_path / "empty.bin"
+    p.write_bytes(b"")
+    info = inspect_binary(p)
+    assert info.file_type == "unknown"
+    assert info.size_bytes == 0
+    assert info.sha256 == sha256_file(p)
+
+
+def test_inspect_binary_tolerates_truncated_pe_optional_header(tmp_path: Path) -> None:
+    for opt_size in (2, 0x1C, 0x5B):
+        data = bytearray(0x40)
+        data[:2] = b"MZ"
+        struct.pack_into("<I", data, 0x3C, 0x40)
+        data += b"PE\x00\x00" + struct.pack("<HHIIIHH", 0x8664, 0, 0, 0, 0, opt_size, 0x22)
+        data += struct.pack("<H", 0x20B) + b"\xff" * (opt_size - 2)
+        p = tmp_path / f"truncated_{opt_size}.exe"
+        p.write_bytes(bytes(data))
+
+        info = inspect_binary(p)
+        hdr = parse_header(bytes(data))
+        assert info.file_type == "PE"
+        assert hdr is not None and hdr.data_directories == []
+        assert hdr.image_base == (0xFFFFFFFFFFFFFFFF if opt_size >= 0x20 else 0)
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+from patchprobe.backends.diff.minhash import MinHashConfig, match_signatures, signature, similarity
+
+
+def test_signature_similarity_tracks_byte_overlap() -> None:
+    rng = random.Random(7)
+    base = rng.randbytes(256)
+    tweaked = base[:200] + rng.randbytes(4) + base[204:]
+    unrelated = rng.randbytes(256)
+    assert signature(base) == signature(bytes(base))
+    assert similarity(signature(base), signature(tweaked)) > 0.7
+    assert similarity(signature(base), signature(unrelated)) < 0.2
+    assert signature(b"\x90\x90") is None
+
+
+def test_match_signatures_pairs_shuffled_and_edited_functions_one_to_one() -> None:
+    rng = random.Random(3)
+    side_a = [rng.randbytes(rng.randint(64, 256)) for _ in range(300)]
+    order = list(range(len(side_a)))
+    rng.shuffle(order)
+    side_b = [side_a[i][:-8] + rng.randbytes(8) if i % 5 == 0 else side_a[i] for i in order]
+    config = MinHashConfig()
+    matches = match_signatures([signature(c) for c in side_a], [signature(c) for c in side_b], config)
+    assert len({i for i, _j, _s in matches}) == len(matches) == len({j for _i, j, _s in matches})
+    assert sum(1 for i, j, _score in matches if order[j] == i) >= 295
+    assert all(score >= config.threshold for _i, _j, score in matches)
+
+
+def test_config_rejects_bands_that_do_not_divide_permutations() -> None:
+    assert MinHashConfig.from_config({"bands": 8, "enabled": True}).bands == 8
+    with pytest.raises(ValueError):
+        MinHashConfig.from_config({"num_perm": 64, "bands": 10})
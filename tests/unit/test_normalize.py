@@ -0,0 +1,118 @@
+import hashlib
+import struct
+from pathlib import Path
+
+from binfixtures import (
+    ElfSpec,
+    MachoSection,
+    PeSection,
+    Section,
+    build_elf,
+    build_fat,
+    build_macho,
+    build_pe,
+    pe_with_codeview,
+)
+from patchprobe.core.normalize import SectionStates, _parse_elf_sections, _section_delta, _summarize_binary
+from patchprobe.formats.symbols import read_function_symbols
+
+
+def test_summarize_pe_reports_debug_info_from_debug_directory(tmp_path: Path) -> None:
+    p = tmp_path / "x.dll"
+    p.write_bytes(pe_with_codeview(bytes(range(20))))
+    summary = _summarize_binary(p, "PE", "x64", "a" * 64)
+    assert summary["has_debug_info_hint"] is True
+    assert [s["name"] for s in summary["sections"]] == [".text", ".rdata"]
+
+
+def test_summarize_pe_ignores_rsds_bytes_outside_debug_directory(tmp_path: Path) -> None:
+    p = tmp_path / "x.dll"
+    p.write_bytes(build_pe([PeSection(".text", b"RSDS" + bytes(20), 0x1000)]))
+    summary = _summarize_binary(p, "PE", "x64", "a" * 64)
+    assert summary["has_debug_info_hint"] is False
+
+
+def test_parse_elf_sections_for_both_classes_and_endiannesses() -> None:
+    for elf_class, endian in ((64, "<"), (32, "<"), (64, ">"), (32, ">")):
+        spec = ElfSpec(
+            sections=[Section(f".text.f{i}", b"\x90" * (i + 1), flags=0x6) for i in range(50)],
+            elf_class=elf_class,
+            endian=endian,
+        )
+        sections = _parse_elf_sections(build_elf(spec))
+        assert len(sections) == 52  # null + 50 + .shstrtab
+        assert sections[1]["name"] == ".text.f0"
+        assert sections[50]["size"] == 50
+        assert sections[-1]["name"] == ".shstrtab"
+
+
+def test_section_delta_classifies_each_section(tmp_path: Path) -> None:
+    def elf(sections: list[Section]) -> Path:
+        p = tmp_path / f"{len(list(tmp_path.iterdir()))}.elf"
+        p.write_bytes(build_elf(ElfSpec(sections=sections)))
+        return p
+
+    a = elf([
+        Section(".text", b"\x90" * 32, addr=0x1000),
+        Section(".rodata", b"abcd", addr=0x2000),
+        Section(".data", b"\x01" * 8, addr=0x3000),
+        Section(".old", b"x", addr=0x4000),
+    ])
+    b = elf([
+        Section(".text", b"\x90" * 32, addr=0x1000),
+        Section(".rodata", b"abce", addr=0x2000),
+        Section(".data", b"\x01" * 16, addr=0x3000),
+        Section(".new", b"y", addr=0x5000),
+    ])
+    summary_a = _summarize_binary(a, "ELF", "x64", "a" * 64)
+    summary_b = _summarize_binary(b, "ELF", "x64", "b" * 64)
+    assert all(len(s["sha256"]) == 64 for s in summary_a["sections"][1:])
+
+    delta = _section_delta(summary_a["sections"], summary_b["sections"])
+    assert delta[".text"] == "identical"
+    assert delta[".rodata"] == "content_changed"
+    assert delta[".data"] == "resized"
+    assert delta[".old"] == "removed"
+    assert delta[".new"] == "added"
+
+    states = SectionStates({"binary_a": summary_a, "binary_b": summary_b, "delta": {"sections": delta}})
+    assert states.identical_section(0x1010, 0x1010) == ".text"
+    assert states.identical_section(0x1010, 0x1014) is None
+    assert states.identical_section(0x2000, 0x2000) is None
+
+
+def test_summarize_macho_parses_chosen_fat_slice(tmp_path: Path) -> None:
+    sections = [
+        MachoSection("__TEXT", "__text", b"\x1f\x20\x03\xd5" * 8, 0x100004000),
+        MachoSection("__TEXT", "__stubs", b"\x10\x00\x00\x90" * 2, 0x100004020),
+        MachoSection("__DATA", "__data", b"\x01" * 8, 0x100008000),
+    ]
+    arm64 = build_macho(sections, function_starts=[0x100004000, 0x100004010])
+    x86 = build_macho([MachoSection("__TEXT", "__text", b"\xc3" * 4, 0x1000)], cputype=0x7, is64=False)
+    p = tmp_path / "fat"
+    p.write_bytes(build_fat([(0x7, x86), (0x0100000C, arm64)]))
+
+    summary = _summarize_binary(p, "Mach-O", "arm64", "a" * 64)
+    assert [s["name"] for s in summary["sections"]] == ["__TEXT,__text", "__TEXT,__stubs", "__DATA,__data"]
+    assert summary["slice"]["arch"] == "arm64" and summary["slice"]["offset"] == 2 * 4096
+    assert summary["function_start_count"] == 2
+    assert summary["has_imports_hint"] is True
+    text = summary["sections"][0]
+    assert text["sha256"] == hashlib.sha256(sections[0].data).hexdigest()
+
+    other = _summarize_binary(p, "Mach-O", "x86", "a" * 64)
+    assert [s["name"] for s in other["sections"]] == ["__TEXT,__text"]
+    assert other["slice"]["offset"] == 4096
+
+
+def test_summarize_macho_ignores_load_commands_past_the_file(tmp_path: Path) -> None:
+    image = bytearray(build_macho([MachoSection("__TEXT", "__text", b"\xc3" * 4, 0x100004000)]))
+    struct.pack_into("<I", image, 20, 0x100000)  # sizeofcmds
+    struct.pack_into("<I", image, 32 + 64, 1000)  # nsects of the first LC_SEGMENT_64
+    commands_end = 32 + 72 + 80
+    p = tmp_path / "truncated"
+    p.write_bytes(bytes(image[:commands_end + 40]))
+
+    summary = _summarize_binary(p, "Mach-O", "arm64", "a" * 64)
+    assert [s["name"] for s in summary["sections"]] == ["__TEXT,__text"]
+    assert read_function_symbols(p.read_bytes(), "Mach-O", "arm64") is not None
@@ -1,6 +1,6 @@
 from pathlib import Path
 
-from patchprobe.storage.object_store import FilesystemObjectStore, get_object_store
+from patchprobe.storage.object_store import FilesystemObjectStore, binary_key, get_object_store
 
 
 def test_filesystem_object_store_put_get_exists(tmp_path: Path) -> None:
@@ -15,3 +15,17 @@ def test_get_object_store_filesystem(tmp_path: Path) -> None:
     store = get_object_store(cfg)
     store.put("x.txt", b"1")
     assert store.get("x.txt") == b"1"
+
+
+def test_put_file_is_content_addressed_and_deduplicated(tmp_path: Path) -> None:
+    src = tmp_path / "input.bin"
+    src.write_bytes(b"binary")
+    store = FilesystemObjectStore(root=str(tmp_path / "store"))
+    key = binary_key("ab" * 32)
+    assert key == f"binaries/ab/ab/{'ab' * 32}/raw"
+
+    path, method = store.put_file(key, src)
+    assert method in {"reflink", "hardlink", "copy"}
+    assert Path(path).read_bytes() == b"binary"
+    _, again = store.put_file(key, src)
+    assert again == "existing"
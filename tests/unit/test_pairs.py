@@ -0,0 +1,47 @@
+import json
+from pathlib import Path
+
+from patchprobe.core.pairs import PairRow, iter_pair_rows, load_pair_table
+
+
+def test_pair_row_prefers_metadata_and_falls_back_to_evidence() -> None:
+    current = {
+        "func_pair_id": "fp1",
+        "func_id_a": "fa1",
+        "func_id_b": "fb1",
+        "match_score": 0.8,
+        "status": "matched_by_minhash",
+        "evidence": ["symbol_name=stale"],
+        "metadata": {"symbol_name": "parse_v2", "symbol_name_a": "parse", "address_a": 0x1000, "address_b": 0x2000},
+    }
+    legacy = {
+        "func_pair_id": "fp2",
+        "func_id_a": "fa2",
+        "func_id_b": "fb2",
+        "match_score": 1.0,
+        "status": "matched_by_name",
+        "evidence": ["symbol_name=main", "addr_a=0x1100", "addr_b=0x2100"],
+    }
+    row = PairRow.from_record(current, {"func_pair_id": "fp1", "change_summary": {"unchanged": True}, "severity_hint": 0.0})
+    assert (row.symbol_name, row.symbol_name_a, row.address_a, row.address_b) == ("parse_v2", "parse", 0x1000, 0x2000)
+    assert row.unchanged is True
+    row = PairRow.from_record(legacy)
+    assert (row.symbol_name, row.symbol_name_a, row.address_a, row.address_b) == ("main", "main", 0x1100, 0x2100)
+    assert row.evidence_count == 3
+    assert not hasattr(row, "__dict__")
+    assert PairRow.from_record({"func_id_a": "x"}) is None
+
+
+def test_pair_table_loads_selection_and_joins_results(tmp_path: Path) -> None:
+    pairs = [
+        {"func_pair_id": f"fp{i}", "func_id_a": f"fa{i}", "func_id_b": f"fb{i}", "match_score": 1.0, "status": "matched_by_name"}
+        for i in range(3)
+    ]
+    results = [{"func_pair_id": f"fp{i}", "change_summary": {}, "severity_hint": i / 10} for i in range(3)]
+    (tmp_path / "function_pairs.json").write_text(json.dumps(pairs), encoding="utf-8")
+    (tmp_path / "diff_results.json").write_text(json.dumps(results), encoding="utf-8")
+    table = load_pair_table(tmp_path, ["fp2", "missing"])
+    assert len(table) == 1
+    assert table.get("fp2").func_id_a == "fa2"
+    assert table.get("fp0") is None
+    assert [row.severity_hint for row in iter_pair_rows(tmp_path)] == [0.0, 0.1, 0.2]
@@ -1,7 +1,13 @@
+import json
 from argparse import Namespace
 from pathlib import Path
 
+import pytest
+
+from binfixtures import MachoSection, build_fat, build_macho
 from patchprobe.core import pipeline
+from patchprobe.core.job import load_job, resolve_binary_path
+from patchprobe.errors import IngestError
 
 
 def test_run_all_creates_normalize_outputs(tmp_path: Path) -> None:
@@ -36,3 +42,83 @@ def test_run_all_creates_normalize_outputs(tmp_path: Path) -> None:
 
     assert (out / "artifacts" / "normalize" / "normalized_metadata.json").exists()
     assert (out / "artifact_index.json").exists()
+
+
+def test_ingest_stores_binaries_and_later_stages_resolve_through_store(tmp_path: Path) -> None:
+    bin_a = tmp_path / "a.bin"
+    bin_b = tmp_path / "b.bin"
+    bin_a.write_bytes(b"\x7fELF" + b"\x00" * 128)
+    bin_b.write_bytes(b"\x7fELF" + b"\x00" * 128)
+    out = tmp_path / "job"
+    cfg = {"storage": {"type": "filesystem", "root": str(tmp_path / "store")}}
+
+    pipeline.run_ingest(cfg, Namespace(a=str(bin_a), b=str(bin_b), tag=None, out=str(out)))
+    job = load_job(str(out))
+    assert job.binary_a.object_key == job.binary_b.object_key
+    stored = list((tmp_path / "store" / "binaries").rglob("raw"))
+    assert len(stored) == 1
+
+    bin_a.unlink()
+    bin_b.unlink()
+    assert resolve_binary_path(job, job.binary_a) == str(stored[0])
+    pipeline.run_normalize(cfg, Namespace(job=str(out)))
+    assert (out / "artifacts" / "normalize" / "normalized_metadata.json").exists()
+
+
+def test_ingest_and_normalize_report_parallel_timing_in_audit(tmp_path: Path) -> None:
+    bin_a = tmp_path / "a.bin"
+    bin_b = tmp_path / "b.bin"
+    bin_a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    bin_b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    out = tmp_path / "job"
+    cfg = {"storage": {"root": str(tmp_path / "store")}}
+
+    pipeline.run_ingest(cfg, Namespace(a=str(bin_a), b=str(bin_b), tag=None, out=str(out)))
+    pipeline.run_normalize(cfg, Namespace(job=str(out)))
+
+    entries = [json.loads(line) for line in (out / "audit.jsonl").read_text(encoding="utf-8").splitlines()]
+    successes = {e["stage"]: e for e in entries if e["event"] == "success"}
+    for stage in ("ingest", "normalize"):
+        parallel = successes[stage]["details"]["parallel"]
+        assert parallel["workers"] == 2
+        assert len(parallel["item_seconds"]) == 2
+        assert parallel["speedup"] > 0
+    job = load_job(str(out))
+    normalized = json.loads((out / "artifacts" / "normalize" / "normalized_metadata.json").read_text(encoding="utf-8"))
+    assert normalized["binary_a"]["sha256"] == job.binary_a.sha256
+    assert normalized["binary_b"]["sha256"] == job.binary_b.sha256
+
+
+def test_normalize_reuses_cached_summary_across_jobs(tmp_path: Path) -> None:
+    bin_a = tmp_path / "a.bin"
+    bin_b = tmp_path / "b.bin"
+    bin_a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    bin_b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    cfg = {"storage": {"root": str(tmp_path / "store")}}
+
+    def normalize_details(out: Path) -> dict:
+        pipeline.run_ingest(cfg, Namespace(a=str(bin_a), b=str(bin_b), tag=None, out=str(out)))
+        pipeline.run_normalize(cfg, Namespace(job=str(out)))
+        entries = [json.loads(line) for line in (out / "audit.jsonl").read_text(encoding="utf-8").splitlines()]
+        return [e for e in entries if e["stage"] == "normalize" and e["event"] == "success"][-1]["details"]
+
+    first = normalize_details(tmp_path / "job1")
+    second = normalize_details(tmp_path / "job2")
+    assert (first["cache"]["hits"], first["cache"]["misses"]) == (0, 2)
+    assert (second["cache"]["hits"], second["cache"]["misses"]) == (2, 0)
+    normalized = json.loads((tmp_path / "job2" / "artifacts" / "normalize" / "normalized_metadata.json").read_text(encoding="utf-8"))
+    assert normalized["binary_a"]["path"] == resolve_binary_path(load_job(str(tmp_path / "job2")), load_job(str(tmp_path / "job2")).binary_a)
+
+
+def test_ingest_selects_requested_macho_slice(tmp_path: Path) -> None:
+    text = [MachoSection("__TEXT", "__text", b"\xc3" * 16, 0x100004000)]
+    fat = tmp_path / "fat"
+    fat.write_bytes(build_fat([(0x01000007, build_macho(text, cputype=0x01000007)), (0x0100000C, build_macho(text))]))
+    cfg = {"storage": {"type": "filesystem", "root": str(tmp_path / "store")}}
+
+    pipeline.run_ingest(cfg, Namespace(a=str(fat), b=str(fat), tag=None, out=str(tmp_path / "job"), arch="arm64"))
+    assert load_job(str(tmp_path / "job")).binary_b.arch == "arm64"
+
+    with pytest.raises(IngestError) as exc:
+        pipeline.run_ingest(cfg, Namespace(a=str(fat), b=str(fat), tag=None, out=str(tmp_path / "job2"), arch="arm"))
+    assert exc.value.details["available_arches"] == ["x64", "arm64"]
@@ -1,7 +1,12 @@
 import json
+import random
 from argparse import Namespace
 from pathlib import Path
 
+import pytest
+
+from patchprobe.core import rank
+from patchprobe.core.features import CodeFeatures, DiffFeatures
 from patchprobe.core.job import BinaryInfo, create_job
 from patchprobe.core.rank import run
 
@@ -43,3 +48,102 @@ def test_rank_scores_and_orders_candidates(tmp_path: Path) -> None:
     assert ranked["candidates"][0]["func_pair_id"] == "fp2"
     assert ranked["candidates"][0]["rank"] == 1
     assert (job_dir / "artifacts" / "rank" / "ranked_candidates.artifact.json").exists()
+
+
+def test_rank_skips_pairs_marked_unchanged(tmp_path: Path) -> None:
+    job_dir = tmp_path / "job"
+    create_job(
+        str(job_dir),
+        None,
+        BinaryInfo(path=str(tmp_path / "a.bin"), sha256="a" * 64, file_type="ELF", arch="x64"),
+        BinaryInfo(path=str(tmp_path / "b.bin"), sha256="b" * 64, file_type="ELF", arch="x64"),
+        {},
+    )
+    diff_dir = job_dir / "artifacts" / "diff"
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    function_pairs = [
+        {"func_pair_id": "fp1", "func_id_a": "fa1", "func_id_b": "fb1", "match_score": 1.0, "status": "ok", "evidence": []},
+        {"func_pair_id": "fp2", "func_id_a": "fa2", "func_id_b": "fb2", "match_score": 1.0, "status": "ok", "evidence": []},
+    ]
+    diff_results = [
+        {"func_pair_id": "fp1", "change_summary": {"unchanged": True}, "severity_hint": 0.0},
+        {"func_pair_id": "fp2", "change_summary": {}, "severity_hint": 0.2},
+    ]
+    (diff_dir / "function_pairs.json").write_text(json.dumps(function_pairs), encoding="utf-8")
+    (diff_dir / "diff_results.json").write_text(json.dumps(diff_results), encoding="utf-8")
+
+    details = run({"ranking": {"top_n": 10}}, Namespace(job=str(job_dir), top=None))
+
+    ranked = json.loads((job_dir / "artifacts" / "rank" / "ranked_candidates.json").read_text(encoding="utf-8"))
+    assert [c["func_pair_id"] for c in ranked["candidates"]] == ["fp2"]
+    assert details["skipped_unchanged"] == 1
+
+
+def test_rank_streams_jsonl_and_keeps_input_order_on_ties(tmp_path: Path) -> None:
+    job_dir = tmp_path / "job"
+    create_job(
+        str(job_dir),
+        None,
+        BinaryInfo(path=str(tmp_path / "a.bin"), sha256="a" * 64, file_type="ELF", arch="x64"),
+        BinaryInfo(path=str(tmp_path / "b.bin"), sha256="b" * 64, file_type="ELF", arch="x64"),
+        {},
+    )
+    diff_dir = job_dir / "artifacts" / "diff"
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    severities = [0.5, 0.9, 0.5, 0.5]
+    pairs = [
+        {"func_pair_id": f"fp{i}", "func_id_a": "fa", "func_id_b": "fb", "match_score": 1.0, "status": "ok", "evidence": []}
+        for i in range(len(severities))
+    ]
+    results = [{"func_pair_id": f"fp{i}", "change_summary": {}, "severity_hint": s} for i, s in enumerate(severities)]
+    (diff_dir / "function_pairs.jsonl").write_text("".join(json.dumps(p) + "\n" for p in pairs), encoding="utf-8")
+    (diff_dir / "diff_results.jsonl").write_text("".join(json.dumps(r) + "\n" for r in results), encoding="utf-8")
+
+    run({"ranking": {"top_n": 3}}, Namespace(job=str(job_dir), top=None))
+
+    ranked = json.loads((job_dir / "artifacts" / "rank" / "ranked_candidates.json").read_text(encoding="utf-8"))
+    assert [c["func_pair_id"] for c in ranked["candidates"]] == ["fp1", "fp0", "fp2"]
+
+
+def test_numpy_ranking_matches_pure_python_order() -> None:
+    pytest.importorskip("numpy")
+    rng = random.Random(3)
+    features = [*DiffFeatures.features, *CodeFeatures.features]
+    vectors = [
+        (
+            f"fp{i}",
+            (
+                rng.choice([0.0, 0.2, 0.5, 0.6, rng.random()]),
+                rng.choice([1.0, 0.7, rng.random()]),
+                rng.randint(0, 8),
+                rng.choice([0.0, rng.random() * 2]),
+                rng.randint(0, 12),
+                rng.randint(0, 3),
+            ),
+        )
+        for i in range(2000)
+    ]
+    weights = {"severity_hint": 0.7, "match_score": 0.2, "evidence": 0.1, "branch_delta": 0.05, "size_delta": 0.1}
+    for top_n in (1, 30, 500, 5000):
+        expected = rank._top_candidates(iter(vectors), features, weights, top_n)
+        assert rank._top_candidates_numpy(iter(vectors), features, weights, top_n) == expected
+
+
+def test_numpy_ranking_rekeys_each_distinct_score_once_on_ties(monkeypatch) -> None:
+    pytest.importorskip("numpy")
+    features = list(DiffFeatures.features)
+    # Evidence is weighted out, so rows differ but scores only take two values.
+    weights = {"evidence": 0.0}
+    vectors = [(f"fp{i}", (0.5 if i % 3 else 0.6, 1.0, i % 6)) for i in range(200_000)]
+    expected = rank._top_candidates(iter(vectors), features, weights, 30)
+    calls = []
+    score = rank._score
+    monkeypatch.setattr(rank, "_score", lambda scaled, weights: calls.append(scaled) or score(scaled, weights))
+    assert rank._top_candidates_numpy(iter(vectors), features, weights, 30) == expected
+    assert len(calls) == 1
+    calls.clear()
+    # The boundary falls inside the tied 0.5 band: its first rows in input order fill the remainder.
+    top = rank._top_candidates_numpy(iter(vectors), features, weights, 66_670)
+    assert len(calls) == 2
+    assert [c["func_pair_id"] for c in top[-3:]] == ["fp1", "fp2", "fp4"]
+    assert top == rank._top_candidates(iter(vectors), features, weights, 66_670)
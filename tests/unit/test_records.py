@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+
+from patchprobe.core.records import FUNCTION_PAIRS, iter_pair_results, iter_records, write_records
+
+_INPUTS = {"binary_a_sha256": "a" * 64, "binary_b_sha256": "b" * 64, "upstream_artifact_hashes": []}
+
+
+def _pair(idx: int) -> dict:
+    return {
+        "func_pair_id": f"fp{idx}",
+        "func_id_a": f"fa{idx}",
+        "func_id_b": f"fb{idx}",
+        "match_score": 1.0,
+        "status": "matched_by_name",
+        "evidence": [f"symbol_name=f{idx}"],
+    }
+
+
+def test_jsonl_records_stream_and_hash_like_json(tmp_path: Path) -> None:
+    pairs = [_pair(i) for i in range(3)]
+    envelopes = {}
+    for fmt in ("json", "jsonl"):
+        out = tmp_path / fmt
+        count = write_records(
+            out,
+            FUNCTION_PAIRS,
+            iter(pairs),
+            fmt,
+            artifact_type="diff.function_pairs",
+            inputs=_INPUTS,
+            payload_schema="function_pair.schema.json",
+        )
+        assert count == 3
+        assert list(iter_records(out, FUNCTION_PAIRS)) == pairs
+        envelopes[fmt] = json.loads((out / "function_pairs.artifact.json").read_text(encoding="utf-8"))
+    assert (tmp_path / "jsonl" / "function_pairs.jsonl").read_text(encoding="utf-8").count("\n") == 3
+    assert envelopes["jsonl"]["payload"] == {"format": "jsonl", "path": "function_pairs.jsonl", "count": 3}
+    assert envelopes["json"]["payload_sha256"] == envelopes["jsonl"]["payload_sha256"]
+
+
+def test_switching_format_removes_stale_file(tmp_path: Path) -> None:
+    kwargs = {"artifact_type": "diff.function_pairs", "inputs": _INPUTS, "payload_schema": "function_pair.schema.json"}
+    write_records(tmp_path, FUNCTION_PAIRS, [_pair(1)], "jsonl", **kwargs)
+    write_records(tmp_path, FUNCTION_PAIRS, [_pair(2)], "json", **kwargs)
+    assert not (tmp_path / "function_pairs.jsonl").exists()
+    assert [p["func_pair_id"] for p in iter_records(tmp_path, FUNCTION_PAIRS)] == ["fp2"]
+
+
+def test_iter_pair_results_falls_back_when_streams_diverge(tmp_path: Path) -> None:
+    (tmp_path / "function_pairs.jsonl").write_text(
+        "\n".join(json.dumps(_pair(i)) for i in range(3)) + "\n", encoding="utf-8"
+    )
+    results = [{"func_pair_id": f"fp{i}", "severity_hint": i / 10} for i in (0, 2, 1)]
+    (tmp_path / "diff_results.jsonl").write_text("\n".join(json.dumps(r) for r in results), encoding="utf-8")
+    joined = [(p["func_pair_id"], r.get("func_pair_id")) for p, r in iter_pair_results(tmp_path)]
+    assert joined == [("fp0", "fp0"), ("fp1", "fp1"), ("fp2", "fp2")]
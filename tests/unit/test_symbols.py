@@ -0,0 +1,72 @@
+import struct
+
+from binfixtures import ElfSpec, MachoSection, PeSection, Section, Sym, build_elf, build_macho, build_pe
+from patchprobe.formats.symbols import read_function_symbols
+
+
+def test_elf_function_symbols_carry_sizes_and_binding() -> None:
+    for elf_class, endian in ((64, "<"), (32, ">")):
+        spec = ElfSpec(
+            sections=[Section(".text", b"\x90" * 64, addr=0x1000, flags=0x6), Section(".data", b"\x00" * 8, addr=0x2000)],
+            symbols=[
+                Sym("main", 0x1000, 32, ".text"),
+                Sym("helper", 0x1020, 16, ".text", bind=0),
+                Sym("hook", 0x1030, 8, ".text", bind=2),
+                Sym("_start", 0x1038, 0, ".text", sym_type=0),
+                Sym("$x", 0x1000, 0, ".text", bind=0, sym_type=0),
+                Sym("counter", 0x2000, 8, ".data", sym_type=1),
+            ],
+            elf_class=elf_class,
+            endian=endian,
+        )
+        symbols = read_function_symbols(build_elf(spec), "ELF")
+        assert [(s.name, s.symbol_type, s.address, s.size) for s in symbols] == [
+            ("main", "T", 0x1000, 32),
+            ("helper", "t", 0x1020, 16),
+            ("hook", "W", 0x1030, 8),
+            ("_start", "T", 0x1038, 0),
+        ]
+
+
+def test_pe_exports_get_sizes_up_to_next_export() -> None:
+    edata_rva = 0x2000
+    names = [b"Alpha\x00", b"Beta\x00"]
+    funcs = [0x1000, 0x1040]
+    table = 40
+    funcs_rva = edata_rva + table
+    names_rva = funcs_rva + 8
+    ords_rva = names_rva + 8
+    strings_rva = ords_rva + 4
+    edata = bytearray(struct.pack("<IIHHIIIIIII", 0, 0, 0, 0, 0, 1, 2, 2, funcs_rva, names_rva, ords_rva))
+    edata += struct.pack("<II", *funcs)
+    edata += struct.pack("<II", strings_rva, strings_rva + len(names[0]))
+    edata += struct.pack("<HH", 0, 1)
+    edata += b"".join(names)
+    image = build_pe(
+        [PeSection(".text", b"\xcc" * 0x80, 0x1000), PeSection(".edata", bytes(edata), edata_rva, 0x40000040)],
+        data_dirs={0: (edata_rva, len(edata))},
+    )
+    symbols = read_function_symbols(image, "PE")
+    assert [(s.name, s.address, s.size) for s in symbols] == [
+        ("Alpha", 0x140001000, 0x40),
+        ("Beta", 0x140001040, 0x40),
+    ]
+
+
+def test_macho_symbols_sized_by_function_starts() -> None:
+    sections = [
+        MachoSection("__TEXT", "__text", b"\xc3" * 0x30, 0x100004000, flags=0x80000400),
+        MachoSection("__DATA", "__data", b"\x00" * 8, 0x100008000),
+    ]
+    image = build_macho(
+        sections,
+        function_starts=[0x100004000, 0x100004010, 0x100004020],
+        symbols=[("_main", 1, 0x100004000), ("_tail", 1, 0x100004020), ("_global", 2, 0x100008000)],
+    )
+    symbols = read_function_symbols(image, "Mach-O", "arm64")
+    assert [(s.name, s.symbol_type, s.size) for s in symbols] == [("_main", "T", 0x10), ("_tail", "T", 0x10)]
+
+
+def test_unparseable_input_returns_none_for_nm_fallback() -> None:
+    assert read_function_symbols(b"\x7fELF" + b"\x00" * 8, "ELF") is None
+    assert read_function_symbols(b"junk", "unknown") is None
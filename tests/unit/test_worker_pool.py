@@ -0,0 +1,152 @@
+import json
+import os
+import subprocess
+import sys
+from argparse import Namespace
+from pathlib import Path
+
+import pytest
+
+from patchprobe.backends.decompile.worker_pool import ADDRESS_PLACEHOLDER, GhidraWorker, WorkerPool
+from patchprobe.core.decompile import run as run_decompile
+from patchprobe.core.job import BinaryInfo, create_job
+from patchprobe.errors import DecompileError
+
+FAKE_WORKER = Path(__file__).with_name("fake_ghidra_worker.py")
+
+
+def _target(tmp_path: Path, name: str) -> dict:
+    return {
+        "function_name": name,
+        "address": None,
+        "output_json": str(tmp_path / f"{name}.json"),
+        "output_txt": str(tmp_path / f"{name}.txt"),
+    }
+
+
+def _start(index: int) -> GhidraWorker:
+    return GhidraWorker([sys.executable, str(FAKE_WORKER), ADDRESS_PLACEHOLDER], startup_timeout=30)
+
+
+def test_pool_recycles_workers_after_max_requests(tmp_path: Path) -> None:
+    with WorkerPool(_start, max_requests=2) as pool:
+        pids = [pool.request("decompile", 30, target=_target(tmp_path, f"f{i}"))["pid"] for i in range(5)]
+
+    assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+    assert pool.stats()["started"] == 3
+    assert pool.stats()["recycled"] == 2
+    assert (tmp_path / "f4.txt").read_text(encoding="utf-8").startswith("int f4(void)")
+
+
+def test_pool_replaces_hung_and_crashed_workers(tmp_path: Path) -> None:
+    with WorkerPool(_start) as pool:
+        with pytest.raises(DecompileError) as hung:
+            pool.request("decompile", 0.5, target=_target(tmp_path, "hang"))
+        with pytest.raises(DecompileError):
+            pool.request("decompile", 30, target=_target(tmp_path, "crash"))
+        response = pool.request("decompile", 30, target=_target(tmp_path, "main"))
+
+    assert hung.value.details["timeout_seconds"] == 0.5
+    assert response["status"] == "ok"
+    assert pool.stats() == {
+        "started": 3,
+        "recycled": 0,
+        "timeouts": 1,
+        "failed": 1,
+        "health_failures": 0,
+        "startup_error": None,
+    }
+
+
+def test_decompile_backend_feeds_targets_to_warm_workers(tmp_path: Path, monkeypatch) -> None:
+    a = tmp_path / "a.bin"
+    b = tmp_path / "b.bin"
+    a.write_bytes(b"\x7fELF" + b"\x00" * 64)
+    b.write_bytes(b"\x7fELF" + b"\x01" * 64)
+    job_dir = tmp_path / "job"
+    create_job(
+        str(job_dir),
+        None,
+        BinaryInfo(path=str(a), sha256="a" * 64, file_type="ELF", arch="x64"),
+        BinaryInfo(path=str(b), sha256="b" * 64, file_type="ELF", arch="x64"),
+        {
+            "storage": {"root": str(tmp_path / "store")},
+            "decompile": {"worker_pool": {"enabled": True, "request_timeout": 2}},
+        },
+    )
+    names = ["main", "hang", "parse"]
+    diff_dir = job_dir / "artifacts" / "diff"
+    diff_dir.mkdir(parents=True, exist_ok=True)
+    (diff_dir / "function_pairs.json").write_text(
+        json.dumps(
+            [
+                {"func_pair_id": f"fp{i}", "func_id_a": f"fa{i}", "func_id_b": f"fb{i}", "match_score": 1.0, "status": "matched_by_name", "evidence": [f"symbol_name={name}"]}
+                for i, name in enumerate(names)
+            ]
+        ),
+        encoding="utf-8",
+    )
+    rank_dir = job_dir / "artifacts" / "rank"
+    rank_dir.mkdir(parents=True, exist_ok=True)
+    candidates = [{"func_pair_id": f"fp{i}", "rank": i + 1, "score": 0.9} for i in range(len(names))]
+    (rank_dir / "ranked_candidates.json").write_text(
+        json.dumps({"job_id": "job", "created_at": "now", "top_n": 10, "candidates": candidates}), encoding="utf-8"
+    )
+    # The runner passes its fourth argument (the pool address) through to the post-script, like analyzeHeadless.
+    fake_runner = tmp_path / "fake_runner.sh"
+    modes = tmp_path / "modes.log"
+    fake_runner.write_text(
+        "#!/usr/bin/env bash\n"
+        f"echo \"$6 $(basename \"$2\")\" >> {modes}\n"
+        f"exec {sys.executable} {FAKE_WORKER} \"$4\" \"$(basename \"$2\")\" \"$1\" \"$6\"\n",
+        encoding="utf-8",
+    )
+    os.chmod(fake_runner, 0o755)
+    monkeypatch.setenv("PATCHDIFF_GHIDRA_RUNNER", str(fake_runner))
+
+    def decompile() -> dict:
+        return run_decompile({"backends": {"decompile": "ghidra"}}, Namespace(job=str(job_dir), top=None, timeout=7))
+
+    details = decompile()
+
+    artifacts = json.loads((job_dir / "artifacts" / "decompile" / "decompile_artifacts.json").read_text(encoding="utf-8"))
+    assert [m["func_id"] for m in artifacts] == ["fa0", "fb0", "fa1", "fb1", "fa2", "fb2"]
+    assert [m["status"] for m in artifacts] == ["ghidra_headless_success", "ghidra_headless_success"] + [
+        "ghidra_headless_failed"
+    ] * 2 + ["ghidra_headless_success"] * 2
+    assert details["projects"] == {"a": "analyzed", "b": "analyzed"}
+    assert details["workers"]["a"]["timeouts"] == 1
+    assert details["workers"]["a"]["started"] == 2
+    # The hung import worker was killed before saving, so its replacement had to import again.
+    assert modes.read_text(encoding="utf-8").split("\n")[:2] == ["import a.bin", "import a.bin"]
+
+    assert decompile()["projects"] == {"a": "reused", "b": "reused"}
+    # A cached project whose program is gone loses its marker, and the run after that analyzes again.
+    store_a = next((tmp_path / "store" / "ghidra_projects").rglob("a.bin"))
+    store_a.unlink()
+    assert decompile()["projects"] == {"a": "invalidated", "b": "reused"}
+    assert decompile()["projects"] == {"a": "analyzed", "b": "reused"}
+
+
+def test_worker_that_never_reports_ready_is_killed(monkeypatch) -> None:
+    started = []
+    popen = subprocess.Popen
+
+    def record(*args, **kwargs):
+        started.append(popen(*args, **kwargs))
+        return started[-1]
+
+    monkeypatch.setattr(subprocess, "Popen", record)
+    with pytest.raises(DecompileError):
+        GhidraWorker([sys.executable, str(FAKE_WORKER), ADDRESS_PLACEHOLDER, "mute"], startup_timeout=1)
+
+    assert started[0].poll() is not None
+
+
+def test_worker_that_cannot_be_started_fails_its_targets(tmp_path: Path) -> None:
+    missing = tmp_path / "analyzeHeadless"
+    with WorkerPool(lambda index: GhidraWorker([str(missing), ADDRESS_PLACEHOLDER], startup_timeout=1)) as pool:
+        with pytest.raises(DecompileError):
+            pool.request("decompile", 1, target=_target(tmp_path, "main"))
+
+    assert pool.stats()["startup_error"] == "worker could not be started"